@@ -23,6 +23,7 @@ from app.services.report_service import (
     get_type_reports
 )
 from app.schemas.report.report import ReportAdminRead, ReportCreate, ReportRead, ReportSecurityRead, ReportSeoRead
+from app.services.progress_tracker import progress_tracker
 
 class Controller:
     Base.metadata.create_all(engine)
@@ -56,6 +57,24 @@ def read_report(report_id: int, db: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Report not found")
     return db_report
 
+@router.get("/{report_id}/progress", response_model=dict)
+def read_report_progress(report_id: int, db: Session = Depends(get_session)):
+    # Served from memory (fed by the workers' progress events); the database is only read for unknown reports.
+    progress = progress_tracker.get(report_id)
+    if progress is not None:
+        return progress
+    db_report = get_report(db, report_id)
+    if db_report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return {
+        "report_id": report_id,
+        "user_id": db_report.user_id,
+        "percent": db_report.progression or 0.0,
+        "status": db_report.status,
+        "tools": {},
+        "updated_at": None
+    }
+
 @router.delete("/{report_id}", response_model=dict)
 def delete_report(report_id: int, db: Session = Depends(get_session)):
     success = delete_report_db(db, report_id)
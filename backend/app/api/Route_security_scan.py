@@ -7,13 +7,15 @@ import json
 from sqlalchemy.orm import Session
 from app.configuration.auth_bearer import get_current_user
 from app.configuration.configuration_manager import jira_configurator, slack_configurator, email_configurator
+from app.configuration.rabbitmq import SCAN_QUEUE
+from app.configuration.rabbitmq_publisher import publisher
 from app.database.database import get_session
 from app.models.data_models import ScanRequest
 from app.models.user import User
+from app.services.pentesting_tests.scan_functions.scan_dispatch import SCAN_DISPATCH_MODE, dispatch_tool_jobs
 from app.services.pentesting_tests.scan_functions.scan_thread import ThreadScan
 import json
 from fastapi import status
-import pika
 
 with open("setting.json") as setting_file:
     setting = json.load(setting_file)
@@ -28,44 +30,6 @@ def get_jira_config():
         "jira_board": getattr(jira_configurator, 'jira_board', None),
         "jira_project_key": getattr(jira_configurator, 'jira_project_key', None)
     }
-def connect_to_rabbitmq(max_retries=10, delay=5):
-    rabbitmq_host = os.getenv('RABBITMQ_HOST', 'localhost')
-    rabbitmq_user = os.getenv('RABBITMQ_USER', 'user')
-    rabbitmq_pass = os.getenv('RABBITMQ_PASS', 'pass')
-    rabbitmq_port = int(os.getenv('RABBITMQ_PORT', '5672'))
-    
-    print(f"🔍 Tentative de connexion à RabbitMQ: {rabbitmq_host}:{rabbitmq_port}")
-    print(f"   Utilisateur: {rabbitmq_user}")
-    
-    for i in range(max_retries):
-        try:
-            credentials = pika.PlainCredentials(rabbitmq_user, rabbitmq_pass)
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_host, 
-                port=rabbitmq_port, 
-                credentials=credentials,
-                heartbeat=600,
-                blocked_connection_timeout=300,
-                # Add connection timeout
-                socket_timeout=10,
-                connection_attempts=3,
-                retry_delay=2
-            )
-            connection = pika.BlockingConnection(parameters)
-            print(f"✅ Connexion RabbitMQ réussie sur {rabbitmq_host}:{rabbitmq_port}")
-            return connection
-        except pika.exceptions.AMQPConnectionError as e:
-            print(f"❌ Connexion échouée à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}). Tentative {i + 1}/{max_retries}")
-            print(f"   Erreur: {e}")
-            if i < max_retries - 1:
-                time.sleep(delay)
-        except Exception as e:
-            print(f"❌ Erreur inattendue lors de la connexion RabbitMQ: {e}")
-            if i < max_retries - 1:
-                time.sleep(delay)
-    
-    raise Exception(f"⛔ Impossible de se connecter à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}) après {max_retries} tentatives.")
-
 
 @router.post("/scan/rabbitmq/")
 def scan_url(scan_request: ScanRequest, db: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
@@ -76,28 +40,23 @@ def scan_url(scan_request: ScanRequest, db: Session = Depends(get_session), curr
     scanner = ThreadScan(script_dir="/scanner", setting=setting, url=url, scan_tools=scan_tools)
     scanner.create_report_entry(db, user_id, authentification)
     report_id = scanner.report_db_id
-    message = {
-        "url": url,
-        "scan_tools": scan_tools,
-        "user_id": user_id,
-        "auth": {
-            "username": scan_request.username,
-            "password": scan_request.password,
-            "token_auth": scan_request.token_auth,
-            "cookies": scan_request.cookies
-        },
-        "report_id": report_id
+    auth = {
+        "username": scan_request.username,
+        "password": scan_request.password,
+        "token_auth": scan_request.token_auth,
+        "cookies": scan_request.cookies
     }
-    connection = connect_to_rabbitmq()
-    channel = connection.channel()
-    channel.queue_declare(queue='scan_queue', durable=True)
-    channel.basic_publish(
-        exchange='',
-        routing_key='scan_queue',
-        body=json.dumps(message),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
-    connection.close()
+    if SCAN_DISPATCH_MODE == "per_tool":
+        dispatch_tool_jobs(scanner, user_id, report_id, auth, publisher.publish_from_thread)
+    else:
+        message = {
+            "url": url,
+            "scan_tools": scan_tools,
+            "user_id": user_id,
+            "auth": auth,
+            "report_id": report_id
+        }
+        publisher.publish_from_thread(SCAN_QUEUE, message)
     return {
         "message": f"Scan task queued for {url}",
         "report_id": report_id
@@ -1,38 +1,52 @@
 import io
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from jinja2 import Environment, FileSystemLoader
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.configuration.rabbitmq import SEO_QUEUE
+from app.configuration.rabbitmq_publisher import publisher
 from app.database.database import get_session
 
 from app.models.report import Report
 from app.models.seo import SEOCrawledPage, SEOReportDetails
 from app.schemas.seo_scan.details_seo_report import SEOReportRequest, SEOReportResponse
-from app.services.seo_service import run_seo_analysis
 
 router = APIRouter(tags=["Seo-scan"])
 
 
 @router.post("/seo-report/user/{user_id}", response_model=SEOReportResponse)
-async def create_seo_report(
+def create_seo_report(
     user_id: int,
     request: SEOReportRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session)
 ):
     new_report = Report(
         user_id=user_id,
         scan_type="seo",
         url=str(request.url),
-        status="running"
+        status="queued"
     )
     db.add(new_report)
     db.commit()
     db.refresh(new_report)
-    background_tasks.add_task(run_seo_analysis, new_report.id, str(request.url), db)   
+    # The analysis runs in the SEO worker pool (seo_consumer.py), not in the API process.
+    try:
+        publisher.publish_from_thread(SEO_QUEUE, {
+            "report_id": new_report.id,
+            "url": str(request.url),
+            "user_id": user_id,
+            "incremental": request.incremental
+        })
+    except Exception as e:
+        new_report.status = "failed"
+        db.commit()
+        print(f"❌ Impossible de publier l'analyse SEO {new_report.id}: {e}")
+        raise HTTPException(status_code=503, detail="SEO queue unavailable")
     return SEOReportResponse(
+        report_id=new_report.id,
+        status="queued",
         url=str(request.url),
         average_score=0.0,
         server_info={},
@@ -48,27 +62,48 @@ async def get_seo_report(report_id: int, db: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Report not found")
     seo_details = db.query(SEOReportDetails).filter(SEOReportDetails.report_id == report_id).first()
     if not seo_details:
-        raise HTTPException(status_code=404, detail="SEO report details not found")
+        # Still waiting in seo_queue: the details row is created when a worker picks the job up.
+        return SEOReportResponse(
+            report_id=report.id,
+            status=report.status.value if hasattr(report.status, "value") else report.status,
+            url=report.url,
+            average_score=0.0,
+            server_info={},
+            total_pages_analyzed=0,
+            crawled_links=[],
+            pages=[]
+        )
     
-    pages = db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == seo_details.id).all()
+    pages = db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == seo_details.id).order_by(SEOCrawledPage.id).all()
+
+    # While the crawl is running the aggregates are not set yet: serve the pages written so far.
+    status = report.status.value if hasattr(report.status, "value") else report.status
+    partial_score = sum(page.seo_score or 0 for page in pages) / len(pages) if pages else 0.0
     
     response = SEOReportResponse(
+        report_id=report.id,
+        status=status,
+        progress=1.0 if status == "completed" else (report.progression or 0) / 100,
         url=report.url,
-        average_score=seo_details.average_score,
+        average_score=seo_details.average_score if seo_details.average_score is not None else partial_score,
         server_info={
-            "ip": seo_details.server_ip,
-            "os": seo_details.server_os,
-            "server": seo_details.server_software,
-            "backend": seo_details.server_backend,
-            "frontend": seo_details.server_frontend,
-            "cms": seo_details.server_cms
+            "ip": seo_details.server_ip or "",
+            "os": seo_details.server_os or "",
+            "server": seo_details.server_software or "",
+            "backend": seo_details.server_backend or [],
+            "frontend": seo_details.server_frontend or [],
+            "cms": seo_details.server_cms or ""
         },
-        total_pages_analyzed=seo_details.total_pages_analyzed,
+        total_pages_analyzed=seo_details.total_pages_analyzed or len(pages),
         crawled_links=[page.url for page in pages],
         screenshot=seo_details.screenshot,
-        keywords=seo_details.keywords,
-        phrases=seo_details.phrases,
-        pages_404=seo_details.pages_404,
+        keywords=seo_details.keywords or {},
+        phrases=seo_details.phrases or {},
+        pages_404=seo_details.pages_404 or [],
+        cache_hits=seo_details.cache_hits or 0,
+        cache_misses=seo_details.cache_misses or 0,
+        incremental=bool(seo_details.incremental),
+        removed_pages=seo_details.removed_pages or [],
         pages=[
             {
                 "url": page.url,
@@ -86,7 +121,9 @@ async def get_seo_report(report_id: int, db: Session = Depends(get_session)):
                 "header_tags": page.header_tags,
                 "images_missing_alt": page.images_missing_alt,
                 "good_practices": page.good_practices,
-                "bad_practices": page.bad_practices
+                "bad_practices": page.bad_practices,
+                "change_status": page.change_status,
+                "changes": page.changes
             } for page in pages
         ]
     )
@@ -103,25 +140,35 @@ async def get_all_seo_reports(db: Session = Depends(get_session)):
         if not seo_details:
             continue            
         pages = db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == seo_details.id).all()
+        # Running or failed crawls have no aggregates: same defaults as GET /seo-report/{id}.
+        status = report.status.value if hasattr(report.status, "value") else report.status
+        partial_score = sum(page.seo_score or 0 for page in pages) / len(pages) if pages else 0.0
         
         result = SEOReportResponse(
             id=seo_details.id,
+            report_id=report.id,
+            status=status,
+            progress=1.0 if status == "completed" else (report.progression or 0) / 100,
             url=report.url,
-            average_score=seo_details.average_score,
+            average_score=seo_details.average_score if seo_details.average_score is not None else partial_score,
             server_info={
-                "ip": seo_details.server_ip,
-                "os": seo_details.server_os,
-                "server": seo_details.server_software,
-                "backend": seo_details.server_backend,
-                "frontend": seo_details.server_frontend,
-                "cms": seo_details.server_cms
+                "ip": seo_details.server_ip or "",
+                "os": seo_details.server_os or "",
+                "server": seo_details.server_software or "",
+                "backend": seo_details.server_backend or [],
+                "frontend": seo_details.server_frontend or [],
+                "cms": seo_details.server_cms or ""
             },
-            total_pages_analyzed=seo_details.total_pages_analyzed,
+            total_pages_analyzed=seo_details.total_pages_analyzed or len(pages),
             crawled_links=[page.url for page in pages],
             screenshot=seo_details.screenshot,
-            keywords=seo_details.keywords,
-            phrases=seo_details.phrases,
-            pages_404=seo_details.pages_404,
+            keywords=seo_details.keywords or {},
+            phrases=seo_details.phrases or {},
+            pages_404=seo_details.pages_404 or [],
+            cache_hits=seo_details.cache_hits or 0,
+            cache_misses=seo_details.cache_misses or 0,
+            incremental=bool(seo_details.incremental),
+            removed_pages=seo_details.removed_pages or [],
             pages=[
                 {
                     "url": page.url,
@@ -139,7 +186,9 @@ async def get_all_seo_reports(db: Session = Depends(get_session)):
                     "header_tags": page.header_tags,
                     "images_missing_alt": page.images_missing_alt,
                     "good_practices": page.good_practices,
-                    "bad_practices": page.bad_practices
+                    "bad_practices": page.bad_practices,
+                    "change_status": page.change_status,
+                    "changes": page.changes
                 } for page in pages
             ]
         )
@@ -166,23 +215,28 @@ async def download_seo_report_html(report_id: int, db: Session = Depends(get_ses
     if not seo_details:
         raise HTTPException(status_code=404, detail="SEO report details not found")
     pages = db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == seo_details.id).all()
+    partial_score = sum(page.seo_score or 0 for page in pages) / len(pages) if pages else 0.0
     report_data = {
         "url": report.url,
-        "average_score": seo_details.average_score,
+        "average_score": seo_details.average_score if seo_details.average_score is not None else partial_score,
         "server_info": {
-            "ip": seo_details.server_ip,
-            "os": seo_details.server_os,
-            "server": seo_details.server_software,
-            "backend": seo_details.server_backend,
-            "frontend": seo_details.server_frontend,
-            "cms": seo_details.server_cms
+            "ip": seo_details.server_ip or "",
+            "os": seo_details.server_os or "",
+            "server": seo_details.server_software or "",
+            "backend": seo_details.server_backend or [],
+            "frontend": seo_details.server_frontend or [],
+            "cms": seo_details.server_cms or ""
         },
-        "total_pages_analyzed": seo_details.total_pages_analyzed,
+        "total_pages_analyzed": seo_details.total_pages_analyzed or len(pages),
         "crawled_links": [page.url for page in pages],
         "screenshot": seo_details.screenshot,
-        "keywords": seo_details.keywords,
-        "phrases": seo_details.phrases,
-        "pages_404": seo_details.pages_404,
+        "keywords": seo_details.keywords or {},
+        "phrases": seo_details.phrases or {},
+        "pages_404": seo_details.pages_404 or [],
+        "cache_hits": seo_details.cache_hits or 0,
+        "cache_misses": seo_details.cache_misses or 0,
+        "incremental": bool(seo_details.incremental),
+        "removed_pages": seo_details.removed_pages or [],
         "pages": [
             {
                 "url": page.url,
@@ -200,7 +254,9 @@ async def download_seo_report_html(report_id: int, db: Session = Depends(get_ses
                 "header_tags": page.header_tags,
                 "images_missing_alt": page.images_missing_alt,
                 "good_practices": page.good_practices,
-                "bad_practices": page.bad_practices
+                "bad_practices": page.bad_practices,
+                "change_status": page.change_status,
+                "changes": page.changes
             } for page in pages
         ]
     }
@@ -0,0 +1,129 @@
+import os
+import time
+from urllib.parse import quote
+import pika
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Quorum queue: a broker refuses to redeclare an existing queue with another type,
+# so the classic "scan_queue" of older deployments is replaced by a new name and
+# drained into it by scan_consumer at startup (move_legacy_queue).
+SCAN_QUEUE = os.getenv("SCAN_QUEUE", "scan_jobs")
+LEGACY_SCAN_QUEUE = "scan_queue"
+SEO_QUEUE = os.getenv("SEO_QUEUE", "seo_queue")
+DEAD_LETTER_SUFFIX = ".dlq"
+# Deliveries (including redeliveries after a worker died) before a message is dead-lettered.
+QUEUE_DELIVERY_LIMIT = int(os.getenv("QUEUE_DELIVERY_LIMIT", 3))
+# Direct exchange carrying live notifications to the websocket_server replicas.
+NOTIFICATION_EXCHANGE = os.getenv("NOTIFICATION_EXCHANGE", "notifications")
+# Fanout exchange carrying coalesced scan progress from the workers to the API replicas.
+PROGRESS_EXCHANGE = os.getenv("PROGRESS_EXCHANGE", "scan_progress")
+
+
+def rabbitmq_url():
+    rabbitmq_host = os.getenv('RABBITMQ_HOST', 'localhost')
+    rabbitmq_user = os.getenv('RABBITMQ_USER', 'user')
+    rabbitmq_pass = os.getenv('RABBITMQ_PASS', 'pass')
+    rabbitmq_port = int(os.getenv('RABBITMQ_PORT', '5672'))
+    return f"amqp://{quote(rabbitmq_user, safe='')}:{quote(rabbitmq_pass, safe='')}@{rabbitmq_host}:{rabbitmq_port}/"
+
+
+def connect_to_rabbitmq(max_retries=10, delay=5):
+    rabbitmq_host = os.getenv('RABBITMQ_HOST', 'localhost')
+    rabbitmq_user = os.getenv('RABBITMQ_USER', 'user')
+    rabbitmq_pass = os.getenv('RABBITMQ_PASS', 'pass')
+    rabbitmq_port = int(os.getenv('RABBITMQ_PORT', '5672'))
+
+    print(f"🔍 Tentative de connexion à RabbitMQ: {rabbitmq_host}:{rabbitmq_port}")
+    print(f"   Utilisateur: {rabbitmq_user}")
+
+    for i in range(max_retries):
+        try:
+            credentials = pika.PlainCredentials(rabbitmq_user, rabbitmq_pass)
+            parameters = pika.ConnectionParameters(
+                host=rabbitmq_host,
+                port=rabbitmq_port,
+                credentials=credentials,
+                heartbeat=600,
+                blocked_connection_timeout=300,
+                # Add connection timeout
+                socket_timeout=10,
+                connection_attempts=3,
+                retry_delay=2
+            )
+            connection = pika.BlockingConnection(parameters)
+            print(f"✅ Connexion RabbitMQ réussie sur {rabbitmq_host}:{rabbitmq_port}")
+            return connection
+        except pika.exceptions.AMQPConnectionError as e:
+            print(f"❌ Connexion échouée à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}). Tentative {i + 1}/{max_retries}")
+            print(f"   Erreur: {e}")
+            if i < max_retries - 1:
+                time.sleep(delay)
+        except Exception as e:
+            print(f"❌ Erreur inattendue lors de la connexion RabbitMQ: {e}")
+            if i < max_retries - 1:
+                time.sleep(delay)
+
+    raise Exception(f"⛔ Impossible de se connecter à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}) après {max_retries} tentatives.")
+
+
+def dead_letter_queue(queue):
+    return f"{queue}{DEAD_LETTER_SUFFIX}"
+
+
+def queue_arguments(queue):
+    return {
+        "x-queue-type": "quorum",
+        "x-delivery-limit": QUEUE_DELIVERY_LIMIT,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": dead_letter_queue(queue)
+    }
+
+
+def declare_queue(channel, queue):
+    """Declare a work queue and its dead-letter queue.
+
+    Every producer and consumer must declare through here (or with
+    queue_arguments): RabbitMQ refuses to redeclare a queue with different
+    arguments. Quorum queues count deliveries, so a message that keeps
+    killing its worker is dead-lettered after QUEUE_DELIVERY_LIMIT attempts
+    instead of looping forever.
+    """
+    channel.queue_declare(queue=dead_letter_queue(queue), durable=True)
+    channel.queue_declare(queue=queue, durable=True, arguments=queue_arguments(queue))
+
+
+def move_legacy_queue(connection, legacy_queue, queue):
+    """Move the messages left in a queue replaced by `queue`, then delete it if it is empty.
+
+    `queue` must already be declared. Returns the number of messages moved.
+    """
+    channel = connection.channel()
+    try:
+        channel.queue_declare(queue=legacy_queue, passive=True)
+    except pika.exceptions.ChannelClosedByBroker:
+        # Never existed, or already migrated.
+        return 0
+    channel.confirm_delivery()
+    moved = 0
+    while True:
+        method, properties, body = channel.basic_get(queue=legacy_queue)
+        if method is None:
+            break
+        channel.basic_publish(exchange="", routing_key=queue, body=body, properties=properties)
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+        moved += 1
+    try:
+        channel.queue_delete(queue=legacy_queue, if_empty=True)
+        channel.close()
+    except pika.exceptions.ChannelClosedByBroker:
+        # Something was published to it meanwhile: moved at the next startup.
+        pass
+    print(f"📦 {moved} message(s) déplacé(s) de '{legacy_queue}' vers '{queue}'")
+    return moved
+
+
+def user_routing_key(user_id):
+    """Routing key of a user's live notifications on NOTIFICATION_EXCHANGE."""
+    return f"user.{user_id}"
@@ -0,0 +1,74 @@
+import os
+import json
+import asyncio
+import aio_pika
+from aio_pika.pool import Pool
+from anyio import from_thread
+from app.configuration.rabbitmq import rabbitmq_url, dead_letter_queue, queue_arguments
+
+RABBITMQ_CHANNEL_POOL_SIZE = int(os.getenv("RABBITMQ_CHANNEL_POOL_SIZE", 8))
+
+
+class RabbitMQPublisher:
+    """Long-lived publisher for the API process.
+
+    One robust connection (reconnects and restores its channels on its own)
+    and a pool of channels with publisher confirms: publish() returns once
+    the broker has taken the message, without any per-request handshake.
+    """
+
+    def __init__(self, pool_size=RABBITMQ_CHANNEL_POOL_SIZE):
+        self.pool_size = pool_size
+        self.connection = None
+        self.channel_pool = None
+        self.declared_queues = set()
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.lock:
+            if self.connection and not self.connection.is_closed:
+                return
+            self.connection = await aio_pika.connect_robust(rabbitmq_url(), heartbeat=600)
+            self.channel_pool = Pool(self.open_channel, max_size=self.pool_size)
+            self.declared_queues = set()
+            print(f"✅ Publisher RabbitMQ prêt ({self.pool_size} canaux)")
+
+    async def open_channel(self):
+        return await self.connection.channel(publisher_confirms=True)
+
+    async def declare(self, channel, queue):
+        if queue in self.declared_queues:
+            return
+        await channel.declare_queue(dead_letter_queue(queue), durable=True)
+        await channel.declare_queue(queue, durable=True, arguments=queue_arguments(queue))
+        self.declared_queues.add(queue)
+
+    async def publish(self, queue, message, headers=None):
+        if self.channel_pool is None:
+            await self.start()
+        async with self.channel_pool.acquire() as channel:
+            await self.declare(channel, queue)
+            await channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(message).encode("utf-8"),
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    content_type="application/json",
+                    headers=headers
+                ),
+                routing_key=queue
+            )
+
+    def publish_from_thread(self, queue, message, headers=None):
+        # For sync routes running in FastAPI's threadpool: the connection lives on the app event loop.
+        from_thread.run(self.publish, queue, message, headers)
+
+    async def close(self):
+        if self.channel_pool is not None:
+            await self.channel_pool.close()
+            self.channel_pool = None
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+
+publisher = RabbitMQPublisher()
@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+PENTESTING_DIR = BACKEND_DIR / "app" / "services" / "pentesting_tests"
+
+# Folder name -> (environment variable, default location).
+SCAN_FOLDERS = {
+    "Reports": ("SCAN_REPORTS_DIR", PENTESTING_DIR / "Reports"),
+    "Results": ("SCAN_RESULTS_DIR", PENTESTING_DIR / "Results"),
+    "vulnerabilities_model": ("VULNERABILITIES_MODEL_DIR", PENTESTING_DIR / "vulnerabilities_model"),
+    "tools": ("SCAN_TOOLS_DIR", BACKEND_DIR / "tools"),
+}
+# Created at startup when missing; the others ship with the code or the image.
+OUTPUT_FOLDERS = ("Reports", "Results")
+
+
+class ScanPaths:
+    """Locations of the scan folders, resolved once per process.
+
+    Replaces the os.walk of the working tree that every scanner used to do
+    to find them, whose cost grew with every scan kept under Results/.
+    """
+
+    def __init__(self):
+        self.paths = {}
+        self.missing_reported = set()
+        self.configure()
+
+    def configure(self, **overrides):
+        """Resolve every folder from the environment; overrides (folder name -> path) win."""
+        paths = {}
+        for folder, (env_var, default) in SCAN_FOLDERS.items():
+            paths[folder] = Path(overrides.get(folder) or os.getenv(env_var) or default).resolve()
+        for folder in OUTPUT_FOLDERS:
+            paths[folder].mkdir(parents=True, exist_ok=True)
+        self.paths = paths
+
+    def get(self, folder):
+        if folder not in self.paths:
+            raise KeyError(f"Dossier de scan inconnu: {folder} (connus: {', '.join(self.paths)})")
+        path = self.paths[folder]
+        if folder not in self.missing_reported and not path.exists():
+            self.missing_reported.add(folder)
+            print(f"Le dossier {folder} n'a pas été trouvé: {path}")
+        return path
+
+
+scan_paths = ScanPaths()
@@ -0,0 +1,38 @@
+from sqlalchemy import text
+from app.database.database import engine
+
+# Base.metadata.create_all() creates the missing tables but never alters an
+# existing one: the columns added to a model after its table was created are
+# listed here and added at startup (main.py), or by hand with
+#   python -m app.database.migrations
+# Every statement is idempotent (PostgreSQL "ADD COLUMN IF NOT EXISTS"), and
+# the defaults fill the rows that already exist.
+SCHEMA_UPGRADES = [
+    # SEO page cache
+    "ALTER TABLE seo_report_details ADD COLUMN IF NOT EXISTS cache_hits INTEGER DEFAULT 0",
+    "ALTER TABLE seo_report_details ADD COLUMN IF NOT EXISTS cache_misses INTEGER DEFAULT 0",
+    # Incremental SEO re-crawl
+    "ALTER TABLE seo_report_details ADD COLUMN IF NOT EXISTS incremental BOOLEAN DEFAULT false",
+    "ALTER TABLE seo_report_details ADD COLUMN IF NOT EXISTS previous_report_id INTEGER",
+    "ALTER TABLE seo_report_details ADD COLUMN IF NOT EXISTS removed_pages VARCHAR[]",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS lang VARCHAR",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS etag VARCHAR",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS last_modified VARCHAR",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS internal_urls VARCHAR[]",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS change_status VARCHAR",
+    "ALTER TABLE seo_crawled_pages ADD COLUMN IF NOT EXISTS changes JSONB",
+    # Shared scan-result cache
+    "ALTER TABLE security_report_details ADD COLUMN IF NOT EXISTS cached_tools VARCHAR",
+]
+
+
+def upgrade_schema(bind=engine):
+    with bind.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
+    print(f"✅ Schéma à jour ({len(SCHEMA_UPGRADES)} colonne(s) vérifiée(s))")
+
+
+if __name__ == "__main__":
+    upgrade_schema()
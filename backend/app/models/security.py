@@ -13,6 +13,8 @@ class SecurityReportDetails(Base):
     total_Low = Column(Integer)
     total_Informational = Column(Integer)
     tools_used = Column(String)
+    # Tools whose result came from the shared scan-result cache.
+    cached_tools = Column(String)
     host_metadata = Column(JSON)
 
     report = relationship("Report", back_populates="security_details")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, ARRAY
+from sqlalchemy import Boolean, Column, Integer, String, Float, Text, ForeignKey, ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from app.database.database import Base
@@ -22,6 +22,11 @@ class SEOReportDetails(Base):
     keywords = Column(JSONB)
     phrases = Column(JSONB)
     pages_404 = Column(ARRAY(String))
+    cache_hits = Column(Integer, default=0)
+    cache_misses = Column(Integer, default=0)
+    incremental = Column(Boolean, default=False)
+    previous_report_id = Column(Integer, nullable=True)
+    removed_pages = Column(ARRAY(String))
 
     report = relationship("Report", back_populates="seo_details")
     crawled_pages = relationship("SEOCrawledPage", back_populates="seo_report", cascade="all, delete-orphan")
@@ -48,5 +53,13 @@ class SEOCrawledPage(Base):
     bad_practices = Column(ARRAY(String))
     header_tags = Column(JSONB)
     images_missing_alt = Column(ARRAY(String))
+    lang = Column(String)
+
+    content_hash = Column(String)
+    etag = Column(String)
+    last_modified = Column(String)
+    internal_urls = Column(ARRAY(String))
+    change_status = Column(String)
+    changes = Column(JSONB)
 
     seo_report = relationship("SEOReportDetails", back_populates="crawled_pages")
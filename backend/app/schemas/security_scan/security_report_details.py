@@ -12,6 +12,7 @@ class SecurityReportDetailsBase(BaseModel):
     total_Low: Optional[int]
     total_Informational: Optional[int]
     tools_used: Optional[str]
+    cached_tools: Optional[str] = None
     host_metadata: Optional[Any] 
     created_at: Optional[datetime]
 
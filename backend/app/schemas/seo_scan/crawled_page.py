@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 class SEOCrawledPageCreate(BaseModel):
@@ -39,6 +39,10 @@ class SEOCrawledPageBase(BaseModel):
     bad_practices: Optional[List[str]]
     header_tags: Optional[Dict[str, List[str]]] 
     images_missing_alt: Optional[List[str]]
+    lang: Optional[str] = None
+    content_hash: Optional[str] = None
+    change_status: Optional[str] = None
+    changes: Optional[Dict[str, Dict[str, Any]]] = None
 
 class SEOCrawledPageCreate(SEOCrawledPageBase):
     pass
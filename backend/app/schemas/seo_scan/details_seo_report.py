@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, HttpUrl
 
 from app.schemas.seo_scan.crawled_page import SEOCrawledPageCreate, SEOCrawledPageRead
@@ -32,12 +32,18 @@ class SEOPageReport(BaseModel):
     images_missing_alt: Optional[Union[List[str], str]] = None
     good_practices: List[str] = []
     bad_practices: List[str] = []
+    change_status: Optional[str] = None
+    changes: Optional[Dict[str, Dict[str, Any]]] = None
 
 class SEOReportRequest(BaseModel):
     url: HttpUrl
+    incremental: bool = False
 
 class SEOReportResponse(BaseModel):
     id: Optional[int] = None
+    report_id: Optional[int] = None
+    status: Optional[str] = None
+    progress: float = 0.0
     url: str
     average_score: float
     server_info: ServerInfo
@@ -47,6 +53,10 @@ class SEOReportResponse(BaseModel):
     keywords: Dict[str, int] = {}
     phrases: Dict[str, int] = {}
     pages_404: List[str] = []
+    cache_hits: int = 0
+    cache_misses: int = 0
+    incremental: bool = False
+    removed_pages: List[str] = []
     pages: List[SEOPageReport] = []
 
 class SEOReportCreate(BaseModel):
@@ -63,6 +73,11 @@ class SEOReportCreate(BaseModel):
     keywords: Dict[str, int] = {}
     phrases: Dict[str, int] = {}
     pages_404: List[str] = []
+    cache_hits: int = 0
+    cache_misses: int = 0
+    incremental: bool = False
+    previous_report_id: Optional[int] = None
+    removed_pages: List[str] = []
 
 class SEOReportDetailsBase(BaseModel):
     average_score: Optional[float]
@@ -79,6 +94,11 @@ class SEOReportDetailsBase(BaseModel):
     keywords: Optional[Dict[str, int]] 
     phrases: Optional[Dict[str, int]]
     pages_404: Optional[List[str]]
+    cache_hits: Optional[int] = 0
+    cache_misses: Optional[int] = 0
+    incremental: Optional[bool] = False
+    previous_report_id: Optional[int] = None
+    removed_pages: Optional[List[str]] = []
 
 class SEOReportDetailsCreate(SEOReportDetailsBase):
     crawled_pages: Optional[List[SEOCrawledPageCreate]] = []
@@ -0,0 +1,123 @@
+import os
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+# Browsers started with seo_consumer, so the first screenshot does not pay for a Chrome start.
+BROWSER_POOL_WARM = int(os.getenv("BROWSER_POOL_WARM", 1))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", 50))
+BROWSER_PAGE_LOAD_TIMEOUT = int(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", 30))
+
+
+class PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.main_handle = driver.current_window_handle
+
+
+class BrowserPool:
+    def __init__(self, max_browsers=BROWSER_POOL_SIZE, max_uses=BROWSER_MAX_USES):
+        self.max_browsers = max_browsers
+        self.max_uses = max_uses
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_browsers)
+        self.closed = False
+
+    def create_browser(self):
+        options = Options()
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        chrome_bin = os.getenv("CHROME_BIN")
+        if chrome_bin:
+            options.binary_location = chrome_bin
+        service = Service(CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else Service()
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.set_page_load_timeout(BROWSER_PAGE_LOAD_TIMEOUT)
+        return PooledBrowser(driver)
+
+    def acquire(self):
+        self.slots.acquire()
+        with self.lock:
+            browser = self.idle.pop() if self.idle else None
+        if browser:
+            return browser
+        try:
+            return self.create_browser()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, browser, broken=False):
+        try:
+            browser.uses += 1
+            if broken or self.closed or browser.uses >= self.max_uses:
+                self.quit(browser)
+            else:
+                with self.lock:
+                    self.idle.append(browser)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def tab(self):
+        browser = self.acquire()
+        try:
+            try:
+                browser.driver.switch_to.new_window('tab')
+            except Exception:
+                # The idle browser died (crash, OOM kill...): replace it once.
+                self.quit(browser)
+                browser = self.create_browser()
+                browser.driver.switch_to.new_window('tab')
+        except Exception:
+            self.release(browser, broken=True)
+            raise
+        # An error raised by the caller (page load timeout...) does not make the
+        # browser unusable: it is only discarded if its tab cannot be closed.
+        broken = False
+        try:
+            yield browser.driver
+        finally:
+            try:
+                browser.driver.close()
+                browser.driver.switch_to.window(browser.main_handle)
+            except Exception:
+                broken = True
+            self.release(browser, broken=broken)
+
+    def warm_up(self, count=BROWSER_POOL_WARM):
+        count = min(count, self.max_browsers)
+        browsers = []
+        try:
+            for _ in range(count):
+                browsers.append(self.acquire())
+        except Exception as e:
+            print(f"Error warming up browser pool: {e}")
+        for browser in browsers:
+            browser.uses -= 1
+            self.release(browser)
+
+    def shutdown(self):
+        self.closed = True
+        with self.lock:
+            browsers, self.idle = self.idle, []
+        for browser in browsers:
+            self.quit(browser)
+
+    @staticmethod
+    def quit(browser):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            print(f"Error closing driver: {e}")
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,195 @@
+import os
+import ssl
+import time
+import heapq
+import atexit
+import random
+import smtplib
+import itertools
+import threading
+from slack_sdk import WebClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", 5))
+# First retry after DELIVERY_RETRY_DELAY seconds, doubled on each attempt up to DELIVERY_RETRY_MAX_DELAY.
+DELIVERY_RETRY_DELAY = float(os.getenv("DELIVERY_RETRY_DELAY", 5))
+DELIVERY_RETRY_MAX_DELAY = float(os.getenv("DELIVERY_RETRY_MAX_DELAY", 300))
+DELIVERY_QUEUE_SIZE = int(os.getenv("DELIVERY_QUEUE_SIZE", 1000))
+# An SMTP connection left unused that long is closed; a burst of emails shares one.
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 30))
+
+
+class PermanentDeliveryError(Exception):
+    """Raised by a delivery job that must not be retried (bad credentials, unknown channel...)."""
+
+
+class SlackClientPool:
+    """One WebClient per token, sharing a single SSL context."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ssl_context = ssl.create_default_context()
+        self.clients = {}
+
+    def get(self, token):
+        with self.lock:
+            client = self.clients.get(token)
+            if client is None:
+                client = WebClient(token=token, timeout=30, ssl=self.ssl_context)
+                self.clients[token] = client
+            return client
+
+
+class SMTPConnectionPool:
+    """Logged-in SMTP_SSL connections kept open between emails, one per (server, port, sender)."""
+
+    def __init__(self, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # key -> (connection, last use)
+        self.connections = {}
+
+    def send(self, server, port, sender, password, recipients, message):
+        key = (server, port, sender)
+        with self.lock:
+            for attempt in range(2):
+                connection = self.connections.pop(key, (None, 0))[0]
+                try:
+                    if connection is None:
+                        connection = smtplib.SMTP_SSL(server, port, timeout=30)
+                        connection.login(sender, password)
+                    connection.sendmail(sender, recipients, message)
+                    self.connections[key] = (connection, time.monotonic())
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    # Closed by the server while idle: reconnect once.
+                    self.close_connection(connection)
+                    if attempt == 1:
+                        raise
+                except smtplib.SMTPAuthenticationError as e:
+                    self.close_connection(connection)
+                    raise PermanentDeliveryError(f"Authentification SMTP refusée: {e}")
+                except Exception:
+                    self.close_connection(connection)
+                    raise
+
+    def close_idle(self):
+        now = time.monotonic()
+        with self.lock:
+            for key, (connection, last_use) in list(self.connections.items()):
+                if now - last_use >= self.idle_timeout:
+                    del self.connections[key]
+                    self.close_connection(connection)
+
+    def close_all(self):
+        with self.lock:
+            for connection, _ in self.connections.values():
+                self.close_connection(connection)
+            self.connections = {}
+
+    @staticmethod
+    def close_connection(connection):
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except Exception:
+            pass
+
+
+class DeliveryQueue:
+    """Background delivery of Slack messages and emails.
+
+    submit() returns at once; a single thread runs the jobs in order and
+    retries the failed ones with exponential backoff (and some jitter), up
+    to DELIVERY_MAX_ATTEMPTS, unless they raise PermanentDeliveryError.
+    """
+
+    def __init__(self, max_attempts=DELIVERY_MAX_ATTEMPTS, retry_delay=DELIVERY_RETRY_DELAY, max_retry_delay=DELIVERY_RETRY_MAX_DELAY, max_size=DELIVERY_QUEUE_SIZE):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_size = max_size
+        self.condition = threading.Condition()
+        # (due time, sequence, name, attempt, func, args, kwargs)
+        self.jobs = []
+        self.sequence = itertools.count()
+        self.running = 0
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        # Same lifecycle as ws_publisher: started on first use, again in forked children.
+        with self.condition:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid is not None and self.pid != os.getpid():
+                self.jobs, self.running = [], 0
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="delivery-queue", daemon=True)
+            self.thread.start()
+
+    def submit(self, name, func, *args, **kwargs):
+        self.ensure_started()
+        with self.condition:
+            if len(self.jobs) >= self.max_size:
+                print(f"⚠️ File d'envoi pleine, {name} abandonné")
+                return False
+            heapq.heappush(self.jobs, (time.monotonic(), next(self.sequence), name, 1, func, args, kwargs))
+            self.condition.notify()
+        return True
+
+    def next_job(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.jobs and self.jobs[0][0] <= now:
+                    self.running += 1
+                    return heapq.heappop(self.jobs)
+                timeout = smtp_pool.idle_timeout
+                if self.jobs:
+                    timeout = min(timeout, self.jobs[0][0] - now)
+                self.condition.wait(timeout)
+                smtp_pool.close_idle()
+
+    def run(self):
+        while True:
+            due, sequence, name, attempt, func, args, kwargs = self.next_job()
+            try:
+                func(*args, **kwargs)
+            except PermanentDeliveryError as e:
+                print(f"❌ Envoi {name} abandonné: {e}")
+            except Exception as e:
+                if attempt >= self.max_attempts:
+                    print(f"❌ Envoi {name} abandonné après {attempt} tentatives: {e}")
+                else:
+                    delay = min(self.retry_delay * 2 ** (attempt - 1), self.max_retry_delay)
+                    delay *= random.uniform(0.8, 1.2)
+                    print(f"⚠️ Envoi {name} échoué (tentative {attempt}/{self.max_attempts}), nouvel essai dans {delay:.0f}s: {e}")
+                    with self.condition:
+                        heapq.heappush(self.jobs, (time.monotonic() + delay, next(self.sequence), name, attempt + 1, func, args, kwargs))
+            finally:
+                with self.condition:
+                    self.running -= 1
+                    self.condition.notify_all()
+
+    def flush(self, timeout=10):
+        """Wait (bounded) for the jobs due now, e.g. before a script exits. Pending retries are not awaited."""
+        if self.thread is None or self.pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.running or (self.jobs and self.jobs[0][0] <= time.monotonic()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(min(remaining, 0.1))
+        smtp_pool.close_all()
+
+
+slack_clients = SlackClientPool()
+smtp_pool = SMTPConnectionPool()
+delivery_queue = DeliveryQueue()
+atexit.register(delivery_queue.flush)
@@ -0,0 +1,177 @@
+import os
+import time
+import atexit
+import threading
+from datetime import datetime
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from dotenv import load_dotenv
+from app.database.database import SessionLocal
+from app.models.notification import Notification
+
+load_dotenv()
+
+NOTIFICATION_FLUSH_INTERVAL_MS = int(os.getenv("NOTIFICATION_FLUSH_INTERVAL_MS", 500))
+NOTIFICATION_FLUSH_ROWS = int(os.getenv("NOTIFICATION_FLUSH_ROWS", 100))
+# Rows kept waiting while the database is unreachable; the oldest are dropped beyond that.
+NOTIFICATION_MAX_PENDING = int(os.getenv("NOTIFICATION_MAX_PENDING", 10000))
+# How "progression" notifications are stored: "all" (one row each, as before),
+# "latest" (only the last one per user, whatever the scan: the others are
+# deleted) or "none" (pushed live, never stored).
+NOTIFICATION_PROGRESS_STORE = os.getenv("NOTIFICATION_PROGRESS_STORE", "all").lower()
+EPHEMERAL_TYPES = ("progression",)
+
+
+class NotificationBuffer:
+    """Write-behind buffer for the notifications table.
+
+    add() only records the notification in memory; a background thread
+    writes what was gathered in one transaction every
+    NOTIFICATION_FLUSH_INTERVAL_MS, or as soon as NOTIFICATION_FLUSH_ROWS
+    are waiting. The same message repeated for a user within one flush is
+    stored once, and progress pings can be reduced to the latest one per
+    user (see NOTIFICATION_PROGRESS_STORE). When the batch is refused (a
+    row breaking a constraint...), its rows are written one by one and only
+    the failing ones are dropped; while the database is unreachable, the
+    batch is kept for the next flush.
+    """
+
+    def __init__(self, interval_ms=NOTIFICATION_FLUSH_INTERVAL_MS, max_rows=NOTIFICATION_FLUSH_ROWS, progress_store=NOTIFICATION_PROGRESS_STORE, max_pending=NOTIFICATION_MAX_PENDING):
+        self.interval = interval_ms / 1000
+        self.max_rows = max_rows
+        self.progress_store = progress_store
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        # One flush at a time, so "latest" progress rows are replaced in order.
+        self.flush_lock = threading.Lock()
+        self.pending = []
+        # user_id -> latest progress notification, when only the latest is stored.
+        self.latest_progress = {}
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        # Same lifecycle as ws_publisher: started on first use, again in forked children.
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid is not None and self.pid != os.getpid():
+                self.pending, self.latest_progress = [], {}
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="notification-buffer", daemon=True)
+            self.thread.start()
+
+    def add(self, user_id, message, notif_type="info"):
+        if notif_type in EPHEMERAL_TYPES and self.progress_store == "none":
+            return
+        self.ensure_started()
+        row = {"message": message, "user_id": user_id, "type": notif_type, "created_at": datetime.utcnow()}
+        with self.lock:
+            if notif_type in EPHEMERAL_TYPES and self.progress_store == "latest":
+                self.latest_progress[user_id] = row
+                return
+            self.pending.append(row)
+            full = len(self.pending) >= self.max_rows
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush_once()
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            latest_progress, self.latest_progress = self.latest_progress, {}
+        rows, seen = [], set()
+        for row in pending:
+            key = (row["user_id"], row["type"], row["message"])
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+        return rows, latest_progress
+
+    def requeue(self, rows, latest_progress):
+        with self.lock:
+            self.pending = (rows + self.pending)[-self.max_pending:]
+            for user_id, row in latest_progress.items():
+                self.latest_progress.setdefault(user_id, row)
+
+    def flush_once(self):
+        with self.flush_lock:
+            return self.write(*self.take())
+
+    def write(self, rows, latest_progress):
+        if not rows and not latest_progress:
+            return 0
+        db = SessionLocal()
+        try:
+            try:
+                self.delete_progress(db, latest_progress)
+                db.bulk_insert_mappings(Notification, rows + list(latest_progress.values()))
+                db.commit()
+                return len(rows) + len(latest_progress)
+            except OperationalError as e:
+                db.rollback()
+                print(f"❌ Échec de l'enregistrement de {len(rows) + len(latest_progress)} notification(s): {e}")
+                self.requeue(rows, latest_progress)
+                return 0
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Lot de notifications refusé, enregistrement ligne par ligne: {e}")
+            return self.write_each(db, rows, latest_progress)
+        finally:
+            db.close()
+
+    def write_each(self, db, rows, latest_progress):
+        written = 0
+        items = [(row, None) for row in rows] + [(row, user_id) for user_id, row in latest_progress.items()]
+        for index, (row, progress_user) in enumerate(items):
+            try:
+                if progress_user is not None:
+                    self.delete_progress(db, {progress_user: row})
+                db.bulk_insert_mappings(Notification, [row])
+                db.commit()
+                written += 1
+            except OperationalError as e:
+                db.rollback()
+                print(f"❌ Base de données indisponible, {len(items) - index} notification(s) remises en attente: {e}")
+                remaining = items[index:]
+                self.requeue(
+                    [row for row, user_id in remaining if user_id is None],
+                    {user_id: row for row, user_id in remaining if user_id is not None}
+                )
+                break
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Notification abandonnée pour l'utilisateur {row['user_id']}: {e}")
+        return written
+
+    @staticmethod
+    def delete_progress(db, latest_progress):
+        if latest_progress:
+            db.execute(delete(Notification).where(
+                Notification.user_id.in_(list(latest_progress)),
+                Notification.type.in_(EPHEMERAL_TYPES)
+            ))
+
+    def flush(self, timeout=2):
+        """Write what is buffered now, e.g. before a script exits."""
+        if self.thread is None or self.pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not self.pending and not self.latest_progress:
+                    return
+            if not self.flush_once():
+                return
+
+
+notification_buffer = NotificationBuffer()
+atexit.register(notification_buffer.flush)
@@ -1,32 +1,46 @@
 import os
-import smtplib
-import ssl
-import asyncio
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import time
 import requests
-import websockets
 from fastapi import HTTPException
 from requests.auth import HTTPBasicAuth
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from sqlalchemy.orm import Session
 from app.configuration.smtp_config import smtp_config
-from app.models.notification import Notification
 from dotenv import load_dotenv
 import json
 from jinja2 import Environment, FileSystemLoader
 import base64
+from app.database.database import SessionLocal
 from app.models.parametres_envoi_rapports import ParametresEnvoiRapports
+from app.services.ws_publisher import ws_publisher
+from app.services.notification_buffer import notification_buffer
+from app.services.delivery_queue import PermanentDeliveryError, delivery_queue, slack_clients, smtp_pool
 
 load_dotenv()
 
-class Notifier:
-    def __init__(self):
-        self.websocket_base_url = "ws://localhost:8001/ws"
+LOGO_PATH = "static/images/logo.png"
+# Slack errors that no retry will fix.
+SLACK_PERMANENT_ERRORS = {"invalid_auth", "not_authed", "token_revoked", "account_inactive", "channel_not_found", "not_in_channel", "is_archived"}
+# Built once; auto_reload still picks up edited templates.
+template_env = Environment(loader=FileSystemLoader("templates"))
+logo_cache = {}
+
+def load_logo():
+    # Base64 data URI of the logo, re-encoded only when the file changes.
+    try:
+        stat = os.stat(LOGO_PATH)
+    except OSError:
+        return ""
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if logo_cache.get("signature") != signature:
+        with open(LOGO_PATH, "rb") as image_file:
+            logo_cache["data"] = "data:image/png;base64," + base64.b64encode(image_file.read()).decode("utf-8")
+        logo_cache["signature"] = signature
+    return logo_cache["data"]
 
+class Notifier:
     def extract_context_from_report(self, report_path: str) -> dict:
         if not os.path.exists(report_path):
             print(f"⚠️ Rapport introuvable à {report_path}")
@@ -49,37 +63,31 @@ class Notifier:
             "dashboard_url": os.getenv("FRONT_LINK", "") + "tester/dashboard",
         }
     async def send_ws_message(self, message: str, notif_type: str = "info", user_id: int = 0):
-        try:
-            websocket_url = f"{self.websocket_base_url}/{user_id}"
-            payload = json.dumps({
-                "message": message,
-                "type": notif_type,
-                "user_id": user_id,
-                "created_at": None
-            })
-            async with websockets.connect(websocket_url) as websocket:
-                await websocket.send(payload)
-        except Exception as e:
-            print(f"WebSocket error for user {user_id}: {e}")
+        await self.send_ws_payload({
+            "message": message,
+            "type": notif_type,
+            "user_id": user_id,
+            "created_at": None
+        }, user_id)
+
+    async def send_ws_payload(self, payload: dict, user_id: int = 0):
+        ws_publisher.publish(user_id, payload)
+
+    def send_event(self, payload: dict, user_id: int):
+        # Structured live events (e.g. SEO pages) are pushed only, not stored as notifications.
+        ws_publisher.publish(user_id, {**payload, "user_id": user_id})
 
     def send_to_websocket(self, message: str, db: Session, user_id: int, notif_type: str = "info"):
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.send_ws_message(message, notif_type, user_id))
-        except Exception as e:
-            print(f"Failed to send WebSocket message to user {user_id}: {e}")
-        finally:
-            loop.close()
+        # Queued for the background sender: never waits on the WebSocket server.
+        ws_publisher.publish(user_id, {
+            "message": message,
+            "type": notif_type,
+            "user_id": user_id,
+            "created_at": None
+        })
 
-        try:
-            notification = Notification(message=message, user_id=user_id, type=notif_type)
-            db.add(notification)
-            db.commit()
-            db.refresh(notification)
-        except Exception as e:
-            print(f"Failed to save notification to database for user {user_id}: {e}")
-            db.rollback()
+        # Stored in batches by the write-behind buffer; db is kept for the callers' signature.
+        notification_buffer.add(user_id, message, notif_type)
 
     def send_info(self, message: str, db: Session, user_id: int):
         self.send_to_websocket(message, db, user_id, "info")
@@ -97,8 +105,11 @@ class Notifier:
         self.send_to_websocket(message, db, user_id, "progression")
 
     def send_message_to_slack(self, token, channel_id, message, details_url=None, file=None):
-        ssl_context = ssl.create_default_context()
-        client = WebClient(token=token, timeout=30, ssl=ssl_context)
+        # Sent by the delivery queue: the scan never waits on Slack.
+        delivery_queue.submit("Slack", self.post_to_slack, token, channel_id, message, details_url, file)
+
+    def post_to_slack(self, token, channel_id, message, details_url=None, file=None):
+        client = slack_clients.get(token)
         try:
             if file and os.path.exists(file):
                 with open(file, "rb") as file_obj:
@@ -139,56 +150,49 @@ class Notifier:
             print("Slack message sent successfully!")
             return response
         except SlackApiError as e:
-            print(f"Slack API error: {e}")
-            return None
-
-    def wait_for_file(self, path, timeout=10):
-        for _ in range(timeout):
-            if os.path.exists(path):
-                return True
-            time.sleep(1)
-        return False
+            if e.response.get("error") in SLACK_PERMANENT_ERRORS:
+                raise PermanentDeliveryError(f"Slack API error: {e}")
+            raise
 
     def send_email_from_user_config(self, subject: str, body: str, db: Session, user_id: int, attachment_path: str = None):
-        param = db.query(ParametresEnvoiRapports).filter_by(user_id=user_id).first()
+        # The settings lookup, the wait for the report and the attachment all run in the delivery queue, not on the scan thread.
+        delivery_queue.submit(f"email '{subject}'", self.deliver_report_email, subject, body, user_id, attachment_path)
+
+    def deliver_report_email(self, subject, body, user_id, attachment_path=None):
+        from app.models.user import User  # Adapte selon ta structure
+        db = SessionLocal()
+        try:
+            param = db.query(ParametresEnvoiRapports).filter_by(user_id=user_id).first()
+            user = db.query(User).filter_by(id=user_id).first()
+        finally:
+            db.close()
         if not param:
             print(f"Aucun paramètre d'envoi trouvé pour l'utilisateur {user_id}")
             return
-        try:
-            sender = smtp_config.username 
-            password = smtp_config.password
-            server = smtp_config.server
-            port = smtp_config.port
-            recipients = json.loads(param.liste_emails) if param.liste_emails else []
-            attachment_file = os.path.join(attachment_path, "final_report.json")
-            if not attachment_file or not self.wait_for_file(attachment_file, timeout=10):
-                print(f"❌ Fichier d'attachement introuvable pour l'utilisateur {user_id} après attente : {attachment_file}")
-                return
-
-            if not recipients:
-                print(f"Aucun destinataire email configuré pour l'utilisateur {user_id}")
-                return
-
-            context_data = self.extract_context_from_report(attachment_file)
-
-            from app.models.user import User  # Adapte selon ta structure
-            user = db.query(User).filter_by(id=user_id).first()
 
-            self.send_email(
-                subject=subject,
-                body=body,
-                sender=sender,
-                recipients=recipients,
-                password=password,
-                server=server,
-                port=port,
-                attachment_path=attachment_file,
-                users=user,
-                verification_code=None,
-                extra_context=context_data
-            )
-        except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email pour l'utilisateur {user_id} : {e}")
+        recipients = json.loads(param.liste_emails) if param.liste_emails else []
+        if not recipients:
+            print(f"Aucun destinataire email configuré pour l'utilisateur {user_id}")
+            return
+
+        attachment_file = os.path.join(attachment_path, "final_report.json")
+        if not os.path.exists(attachment_file):
+            # Still being written: the delivery queue retries with backoff.
+            raise FileNotFoundError(f"Fichier d'attachement introuvable pour l'utilisateur {user_id} : {attachment_file}")
+
+        self.deliver_email(
+            subject=subject,
+            body=body,
+            sender=smtp_config.username,
+            recipients=recipients,
+            password=smtp_config.password,
+            server=smtp_config.server,
+            port=smtp_config.port,
+            attachment_path=attachment_file,
+            users=user,
+            verification_code=None,
+            extra_context=self.extract_context_from_report(attachment_file)
+        )
 
     def send_results(self, token, channel_id, results, db, user_id):
         param = db.query(ParametresEnvoiRapports).filter_by(user_id=user_id).first()
@@ -198,7 +202,7 @@ class Notifier:
         if token and channel_id:
             report_file = os.path.join(results, "final_report.json") 
             if os.path.isfile(report_file):
-                self.send_message_to_slack(token, channel_id, None, report_file)
+                self.send_message_to_slack(token, channel_id, None, file=report_file)
             else:
                 print(f"Fichier de rapport introuvable pour Slack : {report_file}")
         else:
@@ -216,14 +220,16 @@ class Notifier:
         return results
 
     def send_email(self, subject, body, sender, recipients, password, server, port, attachment_path=None, users=None, verification_code=None, extra_context=None):
-        logo_path = "static/images/logo.png"
-        base64_image = ""
-        if os.path.exists(logo_path):
-            with open(logo_path, "rb") as image_file:
-                base64_image = "data:image/png;base64," + base64.b64encode(image_file.read()).decode("utf-8")
+        # Rendered and sent by the delivery queue, over a pooled SMTP connection.
+        delivery_queue.submit(
+            f"email '{subject}'", self.deliver_email, subject, body, sender, recipients, password, server, port,
+            attachment_path, users, verification_code, extra_context
+        )
+
+    def deliver_email(self, subject, body, sender, recipients, password, server, port, attachment_path=None, users=None, verification_code=None, extra_context=None):
+        base64_image = load_logo()
 
         name = f"{users.first_name} {users.last_name}" if users else "User"
-        template_env = Environment(loader=FileSystemLoader("templates"))
         template = template_env.get_template("email-report.html")
 
         context = {
@@ -261,9 +267,7 @@ class Notifier:
                 part['Content-Disposition'] = f'attachment; filename="{os.path.basename(attachment_path)}"'
                 msg.attach(part)
 
-        with smtplib.SMTP_SSL(server, port) as smtp_server:
-            smtp_server.login(sender, password)
-            smtp_server.sendmail(sender, recipients, msg.as_string())
+        smtp_pool.send(server, port, sender, password, recipients, msg.as_string())
 
         print("Email sent with HTML template!")
 
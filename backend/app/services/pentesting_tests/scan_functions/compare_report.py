@@ -1,132 +1,215 @@
 from datetime import datetime
 import os
+import copy
 import json
-from collections import defaultdict
-from pathlib import Path
+import threading
+from app.services.pentesting_tests.scan_functions.vulnerability_index import vulnerability_index
+
+# Host fingerprinting tools: their output goes to host_metadata, not to the findings.
+METADATA_TOOLS = ["whatweb", "wafw00f"]
+FINAL_REPORT_FILE = "final_report.json"
 
 class CompareReport:
-    def __init__(self, report_path,  unique_id, url, startTime, authentification):
+    """Cross-tool aggregation of a scan.
+
+    Tool reports are merged one at a time into a live state as the tools
+    finish (add_tool_report / load_reports only read the files not merged
+    yet), so a partial final report can be saved at any point and the
+    final one only costs the last tool's findings. Findings streamed by a
+    running tool (add_streamed_finding) are shown provisionally until that
+    tool's report file is merged, which replaces them.
+    """
+
+    def __init__(self, report_path,  unique_id, url, startTime, authentification, cached_tools=None):
         self.report_path = report_path
-        self.final_report = defaultdict(list)
+        self.final_report = {}
         self.tools_used = set() 
         self.unique_id = unique_id
         self.url = url
         self.startTime = startTime
         self.authentification = authentification
+        self.cached_tools = list(cached_tools or [])
         self.total_vulnerabilities = 0
         self.total_High = self.total_Medium = self.total_Low = self.total_Informational = 0
         self.vulnerability_mapping = self.get_vulnerability_mapping()
         self.host_metadata = []
+        # vuln_name -> {"total", "vulnerabilities": {merge key: vuln}, "details"}
+        self.merged = {}
+        self.merged_tools = set()
+        # tool -> {vuln name: [count, attacks, details]} streamed while the tool runs.
+        self.streamed = {}
+        # Merge state the last final report was built from (self.merged, or a copy with the streamed findings).
+        self.built = self.merged
+        # Categories changed since the last call to take_dirty_categories().
+        self.dirty_categories = set()
+        self.lock = threading.RLock()
 
     def get_vulnerability_mapping(self):
-        for path in Path('.').rglob('vulnerabilities_model/vulnerability_mapping.json'):
-            try:
-                with open(path, "r", encoding="utf-8") as file:
-                    return json.load(file)
-            except json.JSONDecodeError as e:
-                print(f"❌ Erreur JSON : {e}")
-        print("❌ Fichier de mapping non trouvé.")
-        return {}
+        # Indexed once per process; only re-read when vulnerability_mapping.json changes.
+        vulnerability_index.refresh()
+        return vulnerability_index.mapping
     
     def find_vuln_name(self, vuln_name):
-        for key, value in self.vulnerability_mapping.items():
-            if "aliases" in value and vuln_name in value["aliases"]:
-                return key
-        return vuln_name
+        entry = vulnerability_index.lookup(vuln_name)
+        return entry[0] if entry else vuln_name
     
     def find_vuln_tools(self, vuln_name):
-        for key, value in self.vulnerability_mapping.items():
-            if "aliases" in value and vuln_name in value["aliases"]:
-                return value["tools"]
-        return []
+        entry = vulnerability_index.lookup(vuln_name)
+        return entry[1] if entry else []
 
-    def merge_report(self, report_file, tool_name):
-        with open(report_file, 'r', encoding='utf-8') as f:
-            report = json.load(f)
+    @staticmethod
+    def merge_key(vuln):
+        parameter_keys = set(vuln.get("parameters", {}).keys())
+        return (
+            vuln.get("method", ""),
+            vuln.get("url", ""),
+            json.dumps(sorted(parameter_keys)) 
+        )
+
+    def add_tool_report(self, tool_name, report):
+        """Merge one tool's normalized report into the live state."""
+        with self.lock:
+            self.merge_into(self.merged, tool_name, report)
+
+    def merge_into(self, merged, tool_name, report):
+        with self.lock:
             for vuln_name, vuln_data in report.items():
                 mapped_vuln_name = self.find_vuln_name(vuln_name)
-                if isinstance(vuln_data, list):
-                    count = vuln_data[0] if isinstance(vuln_data[0], int) else 0
-                    details = vuln_data[1] if isinstance(vuln_data[1], list) else []
-                    comm_details = vuln_data[2] if len(vuln_data) > 2 and isinstance(vuln_data[2], dict) else {}
-                    if isinstance(count, int) and isinstance(details, list):
-                        for detail in details:
-                            if "real_name" not in detail or not isinstance(detail["real_name"], list):
-                                detail["real_name"] = []
-                            detail["real_name"].append(vuln_name)
-
-                            if "detected_by" not in detail or not isinstance(detail["detected_by"], list):
-                                detail["detected_by"] = []
-                            if tool_name not in detail["detected_by"]:
-                                detail["detected_by"].append(tool_name)
-                    else:
-                        print(f"⚠️ Format inattendu pour {vuln_name}")
-                    self.final_report[mapped_vuln_name].append([count, details, comm_details])                    
-                else:
+                if not isinstance(vuln_data, list):
                     print(f"⚠️ Données mal formatées pour {vuln_name}: {vuln_data}")
+                    continue
+                count = vuln_data[0] if isinstance(vuln_data[0], int) else 0
+                details = vuln_data[1] if isinstance(vuln_data[1], list) else []
+                comm_details = vuln_data[2] if len(vuln_data) > 2 and isinstance(vuln_data[2], dict) else {}
+                if not (isinstance(count, int) and isinstance(details, list)):
+                    print(f"⚠️ Format inattendu pour {vuln_name}")
+                category = merged.setdefault(mapped_vuln_name, {"total": 0, "vulnerabilities": {}, "details": []})
+                category["total"] += count
+                for detail in details:
+                    if "real_name" not in detail or not isinstance(detail["real_name"], list):
+                        detail["real_name"] = []
+                    detail["real_name"].append(vuln_name)
+
+                    if "detected_by" not in detail or not isinstance(detail["detected_by"], list):
+                        detail["detected_by"] = []
+                    if tool_name not in detail["detected_by"]:
+                        detail["detected_by"].append(tool_name)
+                    self.merge_vulnerability(category["vulnerabilities"], detail)
+                if comm_details:
+                    category["details"].append(comm_details)
+                self.dirty_categories.add(mapped_vuln_name)
+
+    def merge_vulnerability(self, merged_vulnerabilities, vuln):
+        key = self.merge_key(vuln)
+        if key in merged_vulnerabilities:
+            existing_vuln = merged_vulnerabilities[key]
+            if isinstance(existing_vuln["attack"], list):
+                if vuln.get("attack") and vuln["attack"] not in existing_vuln.get("attack", []):
+                    existing_vuln["attack"].append(vuln["attack"])
+            else:
+                existing_vuln["attack"] = [existing_vuln["attack"], vuln["attack"]]
+            existing_vuln["detected_by"].extend(vuln["detected_by"])
+            existing_vuln["detected_by"] = list(set(existing_vuln["detected_by"]))
+        else:
+            vuln_copy = vuln.copy()
+            vuln_copy["attack"] = [vuln_copy.get("attack", "")]
+            vuln_copy["real_name"] = vuln_copy["real_name"] if "real_name" in vuln_copy else []
+            merged_vulnerabilities[key] = vuln_copy
+
+    def add_streamed_finding(self, tool_name, vuln_name, attacks, details=None):
+        """Record a finding printed by a tool that is still running (Scan.finding_listener)."""
+        with self.lock:
+            if tool_name in self.merged_tools:
+                return
+            # Copies: the tool keeps filling its own objects for its report file.
+            entry = self.streamed.setdefault(tool_name, {}).setdefault(vuln_name, [0, [], {}])
+            entry[0] += len(attacks)
+            entry[1].extend(copy.deepcopy(attacks))
+            if details:
+                entry[2] = copy.deepcopy(details)
+            self.dirty_categories.add(self.find_vuln_name(vuln_name))
+
+    def drop_streamed(self, tool_name):
+        # The tool's report file supersedes what it streamed.
+        with self.lock:
+            for vuln_name in self.streamed.pop(tool_name, {}):
+                self.dirty_categories.add(self.find_vuln_name(vuln_name))
+
+    def merge_report(self, report_file, tool_name):
+        with open(report_file, 'r', encoding='utf-8') as f:
+            self.add_tool_report(tool_name, json.load(f))
+
+    def add_tool_file(self, file_path):
+        tool_name = os.path.splitext(os.path.basename(file_path))[0]
+        with self.lock:
+            if tool_name in self.merged_tools:
+                return
+            # Parsed before anything is merged: a file still being written is retried on the next load_reports().
+            with open(file_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            if tool_name.lower() in METADATA_TOOLS:
+                self.other_data = report
+                if isinstance(report, list):
+                    self.host_metadata.extend(report)
+            else:
+                self.add_tool_report(tool_name, report)
+            self.merged_tools.add(tool_name)
+            self.tools_used.add(tool_name) 
+            self.drop_streamed(tool_name)
 
     def load_reports(self):
+        """Merge the tool reports of the folder that are not merged yet."""
         if not os.path.exists(self.report_path):
             print(f"❌ Le dossier {self.report_path} n'existe pas.")
             return
         for file_name in os.listdir(self.report_path):
-            if file_name.endswith(".json"):
-                file_path = os.path.join(self.report_path, file_name)
-                tool_name = os.path.splitext(file_name)[0]
-                self.tools_used.add(tool_name) 
-                if tool_name.lower() in ["whatweb", "wafw00f"]:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        report = json.load(f)
-                        self.other_data = report
-                        if isinstance(report, list):
-                            self.host_metadata.extend(report)
-                else:
-                    self.merge_report(file_path, tool_name)
-
-    def merge_vulnerabilities(self, data):
-        report = []
-        for vuln_name, reports in data.items():  
-            total_count = 0
-            merged_vulnerabilities = {}
-            all_comm = []
-            for entry in reports:  
-                if len(entry) > 0 and isinstance(entry[0], int):
-                    total_count += entry[0]
-                if len(entry) > 1 and isinstance(entry[1], list):
-                    for vuln in entry[1]:
-                        parameter_keys = set(vuln.get("parameters", {}).keys())
-                        key = (
-                            vuln.get("method", ""),
-                            vuln.get("url", ""),
-                            json.dumps(sorted(parameter_keys)) 
-                        )
-                        if key in merged_vulnerabilities:
-                            existing_vuln = merged_vulnerabilities[key]
-                            if isinstance(existing_vuln["attack"], list):
-                                if vuln.get("attack") and vuln["attack"] not in existing_vuln.get("attack", []):
-                                    existing_vuln["attack"].append(vuln["attack"])
-                            else:
-                                existing_vuln["attack"] = [existing_vuln["attack"], vuln["attack"]]
-                            existing_vuln["detected_by"].extend(vuln["detected_by"])
-                            existing_vuln["detected_by"] = list(set(existing_vuln["detected_by"]))
-                        else:
-                            vuln_copy = vuln.copy()
-                            vuln_copy["attack"] = [vuln_copy.get("attack", "")]
-                            vuln_copy["real_name"] = vuln_copy["real_name"] if "real_name" in vuln_copy else []
-                            merged_vulnerabilities[key] = vuln_copy
-                if len(entry) > 2 and isinstance(entry[2], dict) and entry[2]:                        
-                    all_comm.append(entry[2])
-
-            self.total_vulnerabilities+=total_count
-            report.append({
+            if file_name.endswith(".json") and file_name != FINAL_REPORT_FILE:
+                try:
+                    self.add_tool_file(os.path.join(self.report_path, file_name))
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"❌ Rapport {file_name} illisible: {e}")
+
+    def take_dirty_categories(self):
+        with self.lock:
+            dirty, self.dirty_categories = self.dirty_categories, set()
+            return dirty
+
+    def category_vulnerabilities(self, vuln_name):
+        """(merge key, scored vulnerability) pairs of a category of the last built report."""
+        return list(zip(self.built[vuln_name]["vulnerabilities"].keys(), self.final_report[vuln_name]["vulnerabilities"]))
+
+    def with_streamed(self):
+        # Live state plus the findings of the tools still running, merged into copies.
+        merged = {
+            vuln_name: {
+                "total": category["total"],
+                "vulnerabilities": {
+                    key: dict(vuln, attack=list(vuln["attack"]), detected_by=list(vuln["detected_by"]), real_name=list(vuln["real_name"]))
+                    for key, vuln in category["vulnerabilities"].items()
+                },
+                "details": list(category["details"])
+            }
+            for vuln_name, category in self.merged.items()
+        }
+        for tool_name, report in self.streamed.items():
+            self.merge_into(merged, tool_name, copy.deepcopy(report))
+        return merged
+
+    def build_final_report(self):
+        # Scoring works on copies: the live state keeps the tools' own confidence values.
+        with self.lock:
+            self.built = self.with_streamed() if self.streamed else self.merged
+            self.final_report = {
                 vuln_name: {
-                    "total": total_count,
-                    "vulnerabilities": list(merged_vulnerabilities.values()),
-                    "details": all_comm
+                    "total": category["total"],
+                    "vulnerabilities": [dict(vuln, attack=list(vuln["attack"]), detected_by=list(vuln["detected_by"])) for vuln in category["vulnerabilities"].values()],
+                    "details": list(category["details"])
                 }
-            })
-        return report
-       
+                for vuln_name, category in self.built.items()
+            }
+        self.total_vulnerabilities = sum(category["total"] for category in self.final_report.values())
+        return self.final_report
+
     def calculate_confidence_scores(self):
         for vuln_name, data in self.final_report.items():
             tools = self.find_vuln_tools(vuln_name)
@@ -155,10 +238,10 @@ class CompareReport:
                 v["confidence"] = confidence
                 v["risk"] = risk
 
-    def save_final_report(self):
-        merged_report = self.merge_vulnerabilities(self.final_report)
-        self.final_report = {vuln_name: data for item in merged_report for vuln_name, data in item.items()}
+    def save_final_report(self, status="completed"):
+        self.build_final_report()
         self.calculate_confidence_scores() 
+        self.total_High = self.total_Medium = self.total_Low = self.total_Informational = 0
         for vuln_name, reports in self.final_report.items():
             if reports["risk"] == "High":
                 self.total_High += reports["total"]
@@ -175,6 +258,7 @@ class CompareReport:
           "id":  self.unique_id,
           "authentification":  self.authentification,          
           "url":self.url,
+          "status": status,
           "start_scan_date":self.startTime,
           "last_scan_date": end_time.strftime('%Y-%m-%d %H:%M:%S'),
           "scan_duration": str(duration), 
@@ -183,11 +267,15 @@ class CompareReport:
           "total_Medium": self.total_Medium,
           "total_Low": self.total_Low,
           "total_Informational": self.total_Informational,
-          "tools_used":  list(self.tools_used)
+          "tools_used":  list(self.tools_used),
+          "cached_tools": self.cached_tools
         } 
-        self.final_report= {"details":details, "vulnerability_categories": self.final_report, "host_metadata": self.host_metadata}
-        output_file = os.path.join(self.report_path, "final_report.json")
-        with open(output_file, "w", encoding="utf-8") as file:
-            json.dump(self.final_report, file, indent=4, ensure_ascii=False)
-        print(f"✅ Rapport final sauvegardé sous : {output_file}")
-        
\ No newline at end of file
+        report = {"details":details, "vulnerability_categories": self.final_report, "host_metadata": self.host_metadata}
+        output_file = os.path.join(self.report_path, FINAL_REPORT_FILE)
+        # Partial reports are rewritten while the API may be reading them.
+        tmp_file = f"{output_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, output_file)
+        print(f"✅ Rapport {'final' if status == 'completed' else 'partiel'} sauvegardé sous : {output_file}")
+        return report
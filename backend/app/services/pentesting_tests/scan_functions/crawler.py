@@ -1,12 +1,12 @@
 import asyncio
 import json
 import os
-from pathlib import Path
 import subprocess
 import time
 from zapv2 import ZAPv2
 from dotenv import load_dotenv
 import websockets
+from app.configuration.scan_paths import scan_paths
 
 load_dotenv()
 
@@ -80,14 +80,7 @@ class Crawler:
             await websocket.send(message)
 
     def get_folder_path(self, folder):
-        current_path = None
-        for root, dirs, files in os.walk(os.path.abspath('.')):
-            if folder in dirs:
-                current_path = os.path.join(root, folder)
-                break
-        if not current_path:
-            print(f"Le dossier {folder} n'a pas été trouvé dans le projet.")
-        return Path(current_path) 
+        return scan_paths.get(folder)
 
     def get_file(self, *args):
         folder_path = self.get_folder_path("Results") 
@@ -0,0 +1,69 @@
+import os
+import json
+import threading
+from types import MappingProxyType
+from app.configuration.scan_paths import scan_paths
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ModelStore:
+    """Process-wide cache of the vulnerabilities_model JSON files.
+
+    Every model is parsed once and handed out as a read-only view shared by
+    all scanners (dicts become mappingproxy, lists become tuples). Scanners
+    that fill a model in place must take a copy() first. A model is parsed
+    again when its file changes on disk.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.models = {}
+
+    def model_path(self, name):
+        return os.path.join(self.folder or scan_paths.get("vulnerabilities_model"), name)
+
+    def load_all(self):
+        folder = self.folder or scan_paths.get("vulnerabilities_model")
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".json"):
+                self.view(name)
+        print(f"📚 {len(self.models)} modèles de vulnérabilités chargés")
+
+    def entry(self, name):
+        # (signature, frozen view, source text), reloaded when the file changes.
+        path = self.model_path(name)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.models.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached
+        with self.lock:
+            cached = self.models.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached
+            with open(path, "r", encoding="utf-8") as file:
+                text = file.read()
+            entry = (signature, freeze(json.loads(text)), text)
+            self.models[name] = entry
+            if cached is not None:
+                print(f"🔄 Modèle {name} rechargé")
+            return entry
+
+    def view(self, name):
+        return self.entry(name)[1]
+
+    def copy(self, name):
+        """Private mutable copy, for scanners that fill the model in place."""
+        # Re-parsing the cached text is faster than a recursive copy of the view.
+        return json.loads(self.entry(name)[2])
+
+
+model_store = ModelStore()
@@ -1,15 +1,15 @@
 import os
-from datetime import datetime
 import json
-from sqlalchemy.orm import Session
-from app.models.report import Report
-from app.models.security import SecurityReportDetails, Vulnerability, VulnerabilityCategory
+from app.services.notifier import Notifier
+from app.services.progress_tracker import progress_tracker
+from app.services.pentesting_tests.scan_functions.model_store import model_store
 from app.services.pentesting_tests.scan_functions.scan_check import ScanChecker
-from pathlib import Path
 from urllib.parse import urlparse
 from dotenv import load_dotenv 
+from app.configuration.scan_paths import scan_paths
 
 load_dotenv()
+notifier = Notifier()
 
 class Scan:
     def __init__(self, setting, url, json_filename):
@@ -18,20 +18,38 @@ class Scan:
         self.hostname =  urlparse(url).netloc
         self.json_path = self.get_vulnerabilities_json_path(json_filename)
         self.ajax_option = False
+        # Called with (tool, name, attacks, details) for each finding streamed by a tool.
+        self.finding_listener = None
+        # Set by ThreadScan.run_scan: progress is tracked per report and tool.
+        self.report_id = None
+        self.tool_name = None
 
-        with open(self.json_path, 'r') as file:
-            self.vulnerabilities = json.load(file)
-            self.vulnerabilities = self.vulnerabilities.copy()
+        # Read-only view shared by every scanner of the process; use model_store.copy() to fill one in.
+        self.vulnerabilities = model_store.view(json_filename)
+
+    def emit_finding(self, tool, name, attacks, details=None):
+        details = details or {}
+        if self.finding_listener is not None:
+            try:
+                self.finding_listener(tool, name, attacks, details)
+            except Exception as e:
+                print(f"⚠️ Erreur lors de l'agrégation du résultat {tool}: {e}")
+        notifier.send_event({
+            "type": "scan_finding",
+            "tool": tool,
+            "name": name,
+            "risk": details.get("risk", ""),
+            "count": len(attacks),
+            "urls": [attack.get("url") for attack in attacks[:10] if isinstance(attack, dict) and attack.get("url")],
+            "message": f"🔎 {tool}: {name}"
+        }, self.user_id)
+
+    def report_progress(self, phase, percent):
+        # Coalesced by progress_tracker: safe to call on every poll of the tool.
+        progress_tracker.update(self.report_id, self.user_id, tool=self.tool_name, phase=phase, percent=percent)
 
     def get_folder_path(self, folder):
-        current_path = None
-        for root, dirs, files in os.walk(os.path.abspath('.')):
-            if folder in dirs:
-                current_path = os.path.join(root, folder)
-                break
-        if not current_path:
-            print(f"Le dossier {folder} n'a pas été trouvé dans le projet.")
-        return  Path(current_path)
+        return scan_paths.get(folder)
     
     def get_vulnerabilities_json_path(self, filename):
         vulnerabilities_type_path= self.get_folder_path('vulnerabilities_model')
@@ -47,81 +65,27 @@ class Scan:
                 json.dump({}, convert_file)
         return file_path
 
+    def write_report_file(self, report_file_path, results):
+        # CompareReport reads the report folder while tools run: never leave a half-written .json there.
+        tmp_path = f"{report_file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, report_file_path)
+
       # Save scan results to a JSON file
     def save_report_to_json(self, results, report_name, folder_report):
         if not os.path.exists(folder_report):
             os.makedirs(folder_report)
-        report_file_path = self.get_file_path(folder_report, f'{report_name}.json')
+        # Not get_file_path: its empty placeholder would be merged as the tool's report.
+        report_file_path = os.path.join(os.path.normpath(os.path.abspath(folder_report)), f'{report_name}.json')
         try:
-            with open(report_file_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=4)
+            self.write_report_file(report_file_path, results)
             print(f"Report saved to {report_file_path}")
             return report_file_path
         except Exception as e:
             print(f"Error saving the report: {e}")
             return None
 
-    def save_report(self, user_id: int, report_path: str, db: Session):
-        try:
-            report_file_path = report_path / "final_report.json"
-            with open(report_file_path, 'rb') as file:
-                data = json.loads(file.read().decode('utf-8'))
-            details = data["details"]
-            host_metadata = data.get("host_metadata", {})
-            all_vulns = data.get("vulnerability_categories", {})
-            report = db.query(Report).filter(Report.id == self.report_db_id).first()
-            if not report:
-                print("❌ Rapport introuvable. Impossible de modifier un rapport inexistant.")
-                return
-            report.scan_finished_at = datetime.now()
-            report.status = "completed"
-            db.commit()
-            print("✅ Rapport existant mis à jour.")
-            db.query(SecurityReportDetails).filter(SecurityReportDetails.report_id == report.id).delete()
-            db.commit()
-            security_details = SecurityReportDetails(
-                report_id=report.id,
-                number_vulnerabilities=details.get("number_vulnerabilities", 0),
-                total_High=details.get("total_High", 0),
-                total_Medium=details.get("total_Medium", 0),
-                total_Low=details.get("total_Low", 0),
-                total_Informational=details.get("total_Informational", 0),
-                tools_used=",".join(details.get("tools_used", [])),
-                host_metadata = host_metadata
-
-            )
-            db.add(security_details)
-            db.flush()
-            # Insertion des catégories et vulnérabilités
-            for category_name, category_data in all_vulns.items():
-                category = VulnerabilityCategory(
-                    security_report_id=security_details.id,
-                    title=category_name,
-                    total=category_data.get("total", 0),
-                    risk=category_data.get("risk", ""),
-                    details=json.dumps(category_data.get("details", [])),
-                    tools=",".join(category_data.get("all_tools", []))
-                )
-                db.add(category)
-                db.flush()
-                for vuln in category_data.get("vulnerabilities", []):
-                    v = Vulnerability(
-                        category_id=category.id,
-                        url=vuln.get("url"),
-                        method=vuln.get("method"),
-                        parameters=vuln.get("parameter"),
-                        attack=json.dumps(vuln.get("attack")),
-                        real_name=", ".join(vuln.get("real_name", [])),
-                        detected_by=", ".join(vuln.get("detected_by", [])),
-                        confidence=vuln.get("confidence", ""),
-                        confidence_score=str(vuln.get("confidence_score", ""))
-                    )
-                    db.add(v)
-            db.commit()
-            print("✅ Détails et vulnérabilités mis à jour avec succès.")
-        except Exception as e:
-            db.rollback()
-            print(f"❌ Erreur lors de la mise à jour du rapport : {e}")
     @staticmethod
     def setup_scan(setting, url):
         Scan_check = ScanChecker()
@@ -1,8 +1,8 @@
 import os
-from pathlib import Path
 import shutil
 import sys
 import subprocess
+from app.configuration.scan_paths import scan_paths
 
 class ScanChecker:
     def __init__(self):
@@ -17,14 +17,7 @@ class ScanChecker:
         self.script_dir = os.path.abspath(os.path.dirname(sys.argv[0]))
     
     def get_folder_path(self, folder):
-        current_path = None
-        for root, dirs, files in os.walk(os.path.abspath('.')):
-            if folder in dirs:
-                current_path = os.path.join(root, folder)
-                break
-        if not current_path:
-            print(f"Le dossier {folder} n'a pas été trouvé dans le projet.")
-        return  Path(current_path)
+        return scan_paths.get(folder)
     
     def check(self):
         output = subprocess.run("wapiti --version", shell=True, capture_output=True, text=True).stdout.strip("\n")
@@ -0,0 +1,89 @@
+import os
+import json
+
+# "monolithic": whole scans go to SCAN_QUEUE (scan_consumer.py).
+# "per_tool": one job per tool on scan.<tool> queues (tool_worker.py).
+SCAN_DISPATCH_MODE = os.getenv("SCAN_DISPATCH_MODE", "monolithic")
+TOOL_QUEUE_PREFIX = "scan."
+
+MANIFEST_FILE = "dispatch.json"
+DONE_DIR = ".tools_done"
+STARTED_MARKER = ".started"
+FINALIZED_MARKER = ".finalized"
+
+
+def tool_queue(tool):
+    return f"{TOOL_QUEUE_PREFIX}{tool.lower()}"
+
+
+def write_manifest(results_path, manifest):
+    path = os.path.join(results_path, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(results_path):
+    with open(os.path.join(results_path, MANIFEST_FILE), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def dispatch_tool_jobs(scanner, user_id, report_id, auth, publish):
+    """Fan a scan out to one job per tool; the scan's Results folder is the shared fan-in state.
+
+    publish(queue, message) sends one message, e.g. publisher.publish_from_thread.
+    """
+    tools = [tool.lower() for tool in scanner.liste_scan_tools]
+    # Not in report_path: CompareReport merges every .json file found there.
+    write_manifest(scanner.results_path, {
+        "report_id": report_id,
+        "user_id": user_id,
+        "url": scanner.url,
+        "unique_id": scanner.unique_id,
+        "start_time": scanner.startTime,
+        "tools": tools
+    })
+
+    for tool in tools:
+        publish(tool_queue(tool), {
+            "report_id": report_id,
+            "user_id": user_id,
+            "url": scanner.url,
+            "tool": tool,
+            "unique_id": scanner.unique_id,
+            "start_time": scanner.startTime,
+            "auth": auth
+        })
+    print(f"📤 Scan {report_id} réparti sur {len(tools)} files: {', '.join(tool_queue(tool) for tool in tools)}")
+    return tools
+
+
+def mark_tool_done(results_path, tool, status="completed"):
+    """Record a finished tool and return (done, total) for the scan."""
+    done_dir = os.path.join(results_path, DONE_DIR)
+    os.makedirs(done_dir, exist_ok=True)
+    with open(os.path.join(done_dir, tool.lower()), "w", encoding="utf-8") as file:
+        file.write(status)
+    manifest = load_manifest(results_path)
+    done = set(os.listdir(done_dir))
+    return len(done & set(manifest["tools"])), len(manifest["tools"])
+
+
+def claim_marker(results_path, marker):
+    # O_EXCL makes exactly one worker win, even across hosts sharing the Results volume.
+    try:
+        fd = os.open(os.path.join(results_path, marker), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def claim_start(results_path):
+    """True for the first tool job of the scan to start, which sends the "scan started" notifications."""
+    return claim_marker(results_path, STARTED_MARKER)
+
+
+def claim_finalization(results_path):
+    return claim_marker(results_path, FINALIZED_MARKER)
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import hashlib
+from app.services.url_discovery import normalize_url
+
+SCAN_CACHE_DIR = os.getenv("SCAN_CACHE_DIR", os.path.abspath("ScanCache"))
+# Freshness window in seconds; 0 disables the cache.
+SCAN_CACHE_TTL = int(os.getenv("SCAN_CACHE_TTL", 6 * 3600))
+
+# File written by each tool's read_report in the report folder.
+TOOL_REPORT_FILES = {
+    "zap": "zap.json",
+    "wapiti": "wapiti.json",
+    "sqlmap": "sqlmap.json",
+    "xsstrike": "XSStrike.json",
+    "nikto": "nikto.json",
+    "nmap": "nmap.json",
+    "pwnxss": "PwnXSS.json",
+    "nuclei": "nuclei.json",
+    "wafw00f": "wafw00f.json",
+    "whatweb": "Whatweb.json",
+}
+
+# setting.json / SecurityPreferences fields that change a tool's output.
+TOOL_SETTING_KEYS = {
+    "zap": ["zap_d", "zap_dc"],
+    "wapiti": ["wapiti_level", "wapiti_scan_time"],
+    "sqlmap": ["sqlmap_level", "sqlmap_risk", "sqlmap_threads", "sqlmap_technique", "depth_crawl"],
+    "xsstrike": ["depth_crawl"],
+    "nikto": ["depth_crawl", "nikto_timeout"],
+    "nmap": ["nmap_timing"],
+    "pwnxss": ["depth_crawl", "pwnxss_threads"],
+    "nuclei": ["nuclei_rate_limit"],
+    "wafw00f": [],
+    "whatweb": ["whatweb_aggression"],
+}
+
+
+def auth_fingerprint(username=None, password=None, token_auth=None, cookies=None):
+    # Authenticated scans see other pages: they must never share results with anonymous ones.
+    if not (username or password or token_auth or cookies):
+        return None
+    credentials = json.dumps([username, password, token_auth, cookies], sort_keys=True, default=str)
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+
+class ScanResultCache:
+    """Per-tool results shared between reports of the same target.
+
+    Entries are keyed by the normalized URL, the tool, the settings that tool
+    depends on and a fingerprint of the credentials, and hold the JSON that
+    the tool's read_report left in the report folder. Putting that file back
+    into a new report folder is all CompareReport needs to reuse it.
+    """
+
+    def __init__(self, cache_dir=SCAN_CACHE_DIR, ttl=SCAN_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def key(self, url, tool, setting, auth=None):
+        tool = tool.lower()
+        setting = setting or {}
+        material = {
+            "url": normalize_url(url),
+            "tool": tool,
+            "settings": {name: setting.get(name) for name in TOOL_SETTING_KEYS.get(tool, [])},
+            "auth": auth,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, url, tool, setting, auth=None):
+        """Return (report, age in seconds) of a fresh entry, or None."""
+        if not self.enabled or tool.lower() not in TOOL_REPORT_FILES:
+            return None
+        path = self.entry_path(self.key(url, tool, setting, auth))
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        age = time.time() - entry.get("created_at", 0)
+        if age > self.ttl:
+            return None
+        return entry["report"], age
+
+    def put(self, url, tool, setting, report, auth=None):
+        if not self.enabled or tool.lower() not in TOOL_REPORT_FILES:
+            return
+        path = self.entry_path(self.key(url, tool, setting, auth))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"tool": tool.lower(), "url": url, "created_at": time.time(), "report": report}, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def restore(self, url, tool, setting, report_path, auth=None):
+        """Write a cached result into report_path; True on a hit."""
+        cached = self.get(url, tool, setting, auth)
+        if cached is None:
+            return False
+        report, age = cached
+        # Same atomic write as Scan.write_report_file: CompareReport may be reading the folder.
+        path = os.path.join(report_path, TOOL_REPORT_FILES[tool.lower()])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+        print(f"♻️ Résultat {tool} réutilisé depuis le cache ({int(age // 60)} min)")
+        return True
+
+    def store(self, url, tool, setting, report_path, auth=None):
+        """Cache the result read_report just left in report_path."""
+        try:
+            with open(os.path.join(report_path, TOOL_REPORT_FILES[tool.lower()]), "r", encoding="utf-8") as file:
+                report = json.load(file)
+        except (KeyError, FileNotFoundError, json.JSONDecodeError):
+            return
+        try:
+            self.put(url, tool, setting, report, auth)
+        except OSError as e:
+            print(f"⚠️ Impossible de mettre en cache le résultat {tool}: {e}")
+
+
+scan_result_cache = ScanResultCache()
@@ -1,9 +1,11 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import threading
+import functools
 from requests import Session
 from app.models.report import Report
 from app.services.notifier import Notifier
+from app.services.progress_tracker import progress_tracker
 from app.services.pentesting_tests.scan_functions.crawler import Crawler
 from app.services.pentesting_tests.scan_functions.getCookies import dynamic_authentication, get_cookies_after_login
 from app.services.pentesting_tests.scan_functions.scan import Scan
@@ -20,6 +22,9 @@ from app.services.pentesting_tests.scan_functions.scan_tools.whatweb_scan import
 from app.services.pentesting_tests.scan_functions.scan_tools.wafw00f_scan import wafw00f_scan
 
 from app.services.pentesting_tests.scan_functions.compare_report import CompareReport
+from app.services.pentesting_tests.scan_functions.security_report_writer import SecurityReportWriter
+from app.services.pentesting_tests.scan_functions.tool_scheduler import tool_scheduler
+from app.services.pentesting_tests.scan_functions.scan_result_cache import scan_result_cache, auth_fingerprint
 import time
 from urllib.parse import urlparse
 import time
@@ -27,15 +32,19 @@ import os
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 notifier = Notifier() 
+CACHED_TOOLS_DIR = ".cached_tools"
+# Minimum seconds between two partial reports triggered by streamed findings.
+PARTIAL_REPORT_INTERVAL = float(os.getenv("PARTIAL_REPORT_INTERVAL", 15))
 
 class ThreadScan(Scan):
-    def __init__(self, script_dir, setting, url, scan_tools):
+    def __init__(self, script_dir, setting, url, scan_tools, unique_id=None, start_time=None):
         self.script_dir = script_dir
         self.setting = setting
         self.url = url
         self.hostname = urlparse(url).netloc
         timestamp = int(time.time())
-        self.unique_id = f"{self.hostname.replace(':', '_')}-{timestamp}"
+        # Per-tool workers rebuild the scan of another host: they must reuse its folders.
+        self.unique_id = unique_id or f"{self.hostname.replace(':', '_')}-{timestamp}"
         self.report_path =  self.get_folder_path("Reports") / self.unique_id
         self.results_path =  self.get_folder_path("Results") / self.unique_id
         self.liste_scan_tools=scan_tools
@@ -46,20 +55,34 @@ class ThreadScan(Scan):
         if not os.path.exists(self.results_path):
             os.makedirs(self.results_path)
         Scan.setup_scan(self.setting, self.url)
-        self.startTime=  datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.startTime= start_time or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         self.total_scans = 0
         self.completed_scans = 0
+        self.progress_lock = threading.Lock()
+        # Live cross-tool aggregation, fed as each tool finishes.
+        self.comparator = None
+        self.report_writer = None
+        self.report_lock = threading.Lock()
+        self.authentification = False
+        # Only run_all_scans owns the whole report; per-tool workers merge at fan-in.
+        self.publish_partials = False
+        self.last_partial_report = 0
 
     def run_scan(self, scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, 
-        jira_project_key, db, user_id, username=None, password=None, token_auth=None, cookies=None):
+        jira_project_key, db, user_id, username=None, password=None, token_auth=None, cookies=None, check_cache=True):
+        """Run one tool; returns True when its report was produced (or restored from the cache)."""
 
         if self.stop_event.is_set():
             print(f"🚫 Scan {scan_type} interrompu avant démarrage.")
-            return
+            return False
         if self.stop_event.is_set():
             print(f"🚫 Scan {scan_type} interrompu en cours d'exécution.")
-            return
-        
+            return False
+
+        auth = auth_fingerprint(username, password, token_auth, cookies)
+        if check_cache and self.restore_from_cache(scan_type, db, user_id, auth):
+            return True
+
         if username and password and cookies=="":
             cookies = get_cookies_after_login(self.url, username, password)
             # cookies = dynamic_authentication(self.url, username, password)
@@ -79,8 +102,12 @@ class ThreadScan(Scan):
         scanner_class = scanners.get(scan_type)
         if not scanner_class:
             print(f"❌ Scan type '{scan_type}' non reconnu.")
-            return
+            return False
         scanner = scanner_class(self.setting, self.url, self.report_path, self.results_path,db, user_id)
+        scanner.report_id = getattr(self, "report_db_id", None)
+        scanner.tool_name = scan_type
+        scanner.finding_listener = functools.partial(self.on_finding, db, user_id)
+        progress_tracker.update(scanner.report_id, user_id, tool=scan_type, phase="running", percent=0)
         print(f"🚀 Lancement du scan {scan_type} sur {self.url}...")
         try:
             if(scan_type=="zap"):
@@ -91,21 +118,91 @@ class ThreadScan(Scan):
             else:
                 scanner.start(username=username, password=password, token_auth=token_auth, cookies=cookies)
             scanner.read_report(token, channel_id, emails, db, user_id)
+            scan_result_cache.store(self.url, scan_type, self.setting, self.report_path, auth)
             # scanner.check_results_for_risk(token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id)
             print(f"✅ Scan {scan_type} terminé avec succès !")
+            return True
         except Exception as e:
             print(f"❌ Erreur lors du scan {scan_type}: {e}")
+            return False
     
+    def on_finding(self, db, user_id, tool, name, attacks, details):
+        # Streamed findings reach the shared aggregation right away, replaced by the tool's file when it finishes.
+        with self.report_lock:
+            self.get_comparator().add_streamed_finding(tool, name, attacks, details)
+        if self.publish_partials and time.monotonic() - self.last_partial_report >= PARTIAL_REPORT_INTERVAL:
+            self.publish_partial_report(tool, db, user_id)
+
+    def restore_from_cache(self, scan_type, db, user_id, auth):
+        if not scan_result_cache.restore(self.url, scan_type, self.setting, self.report_path, auth):
+            return False
+        self.mark_cached(scan_type)
+        notifier.send_to_websocket(f"♻️ Résultat {scan_type} récent réutilisé", db=db, user_id=user_id, notif_type="info")
+        return True
+
+    def mark_cached(self, scan_type):
+        # On disk rather than in memory: with per-tool dispatch each tool runs in another process.
+        cached_dir = os.path.join(self.results_path, CACHED_TOOLS_DIR)
+        os.makedirs(cached_dir, exist_ok=True)
+        open(os.path.join(cached_dir, scan_type.lower()), "w").close()
+
+    def cached_tools(self):
+        cached_dir = os.path.join(self.results_path, CACHED_TOOLS_DIR)
+        return sorted(os.listdir(cached_dir)) if os.path.isdir(cached_dir) else []
+
     def run_scan_with_progress(self, scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username=None, password=None, token_auth=None, cookies=None):
         if self.stop_event.is_set():
             print(f"🚫 Scan {scan_type} ignoré à cause de l'annulation.")
             return
-        self.run_scan(scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username, password, token_auth, cookies)
-        self.completed_scans += 1
-        percent_done = int((self.completed_scans / self.total_scans) * 100)
-        progress_message = f"📊 Progression: {percent_done}% ({self.completed_scans}/{self.total_scans})"
-        print(progress_message)
-        notifier.send_to_websocket(progress_message, db=db, user_id=user_id, notif_type="progression")
+        # A cache hit only copies a file: it does not wait for a slot behind the running heavy tools.
+        if not self.restore_from_cache(scan_type, db, user_id, auth_fingerprint(username, password, token_auth, cookies)):
+            with tool_scheduler.slot(scan_type, self.stop_event) as cost_class:
+                print(f"⚙️ Scan {scan_type} démarré (classe {cost_class})")
+                self.run_scan(scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username, password, token_auth, cookies, check_cache=False)
+        self.publish_partial_report(scan_type, db, user_id)
+        with self.progress_lock:
+            self.completed_scans += 1
+            completed_scans = self.completed_scans
+        print(f"📊 Progression: {int((completed_scans / self.total_scans) * 100)}% ({completed_scans}/{self.total_scans})")
+        progress_tracker.tool_done(getattr(self, "report_db_id", None), user_id, scan_type)
+
+    def get_comparator(self):
+        if self.comparator is None:
+            self.comparator = CompareReport(self.report_path, self.unique_id, self.url, self.startTime, self.authentification)
+        self.comparator.cached_tools = self.cached_tools()
+        return self.comparator
+
+    def save_report(self, comparator, report, db, finished=True):
+        if self.report_writer is None:
+            self.report_writer = SecurityReportWriter(db, self.report_db_id)
+        self.report_writer.sync(comparator, report, finished=finished)
+
+    def publish_partial_report(self, scan_type, db, user_id):
+        # Merge what this tool just wrote so results show up while the slow tools still run.
+        if getattr(self, "report_db_id", None) is None:
+            return
+        self.last_partial_report = time.monotonic()
+        try:
+            with self.report_lock:
+                comparator = self.get_comparator()
+                comparator.load_reports()
+                report = comparator.save_final_report(status="running")
+                self.save_report(comparator, report, db, finished=False)
+            details = report["details"]
+            notifier.send_event({
+                "type": "scan_partial_report",
+                "report_id": self.report_db_id,
+                "tool": scan_type,
+                "message": f"📄 Résultats {scan_type} fusionnés",
+                "number_vulnerabilities": details["number_vulnerabilities"],
+                "total_High": details["total_High"],
+                "total_Medium": details["total_Medium"],
+                "total_Low": details["total_Low"],
+                "total_Informational": details["total_Informational"],
+                "tools_used": details["tools_used"]
+            }, user_id)
+        except Exception as e:
+            print(f"⚠️ Rapport partiel non mis à jour après {scan_type}: {e}")
 
     def create_report_entry(self, db: Session, user_id: int, authentification: bool):
         new_report = Report(
@@ -125,34 +222,51 @@ class ThreadScan(Scan):
     def run_all_scans(self, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username=None, password=None, token_auth=None, cookies=None):
         self.notify_scan_start(token, channel_id, db, user_id)
         authentification = bool(username or password or token_auth or cookies)
+        self.authentification = authentification
         # crawler = Crawler(self.url, self.setting, self.hostname, self.unique_id)
         # crawler.start_spider_scan()  
         scan_types = self.liste_scan_tools
         self.total_scans = len(scan_types)
         self.completed_scans = 0
-        with ThreadPoolExecutor(max_workers=3) as executor:  
-            future_to_scan = {
-                executor.submit(self.run_scan_with_progress, scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username, password, token_auth, cookies): scan_type
-                for scan_type in scan_types
-            }
-            for future in as_completed(future_to_scan):
-                if self.stop_event.is_set():
-                    print("🚫 Arrêt des scans demandé, interruption...")
-                    break
-                scan_type = future_to_scan[future]
-                try:
-                    future.result()  
-                except Exception as exc:
-                    print(f"❌ Scan {scan_type} a échoué avec une exception : {exc}")
+        self.publish_partials = True
+        progress_tracker.start(getattr(self, "report_db_id", None), user_id, scan_types)
+        # Concurrency is bounded by the shared per-cost-class budgets of tool_scheduler,
+        # not by the pool size: every tool of a wave gets its own thread.
+        for wave in tool_scheduler.plan(scan_types):
+            if self.stop_event.is_set():
+                break
+            with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+                future_to_scan = {
+                    executor.submit(self.run_scan_with_progress, scan_type, token, channel_id, emails, jira_email, jira_token, jira_domain, jira_board, jira_project_key, db, user_id, username, password, token_auth, cookies): scan_type
+                    for scan_type in wave
+                }
+                for future in as_completed(future_to_scan):
+                    if self.stop_event.is_set():
+                        print("🚫 Arrêt des scans demandé, interruption...")
+                        break
+                    scan_type = future_to_scan[future]
+                    try:
+                        future.result()  
+                    except Exception as exc:
+                        print(f"❌ Scan {scan_type} a échoué avec une exception : {exc}")
 
         if username or password or token_auth or cookies:
             authentification= True
         else:
             authentification= False
-        comparator = CompareReport(self.report_path, self.unique_id, self.url, self.startTime, authentification)
-        comparator.load_reports()
-        comparator.save_final_report()
-        self.save_report(user_id, self.report_path, db)
+        self.finalize_scan(token, channel_id, db, user_id, authentification)
+
+    def finalize_scan(self, token, channel_id, db, user_id, authentification):
+        self.authentification = authentification
+        with self.report_lock:
+            comparator = self.get_comparator()
+            comparator.authentification = authentification
+            # Only the reports not merged by publish_partial_report are read here.
+            comparator.load_reports()
+            report = comparator.save_final_report()
+            self.save_report(comparator, report, db)
+        # Same spelling as StatutReportEnum; a cancelled scan keeps the percent it reached.
+        progress_tracker.finish(getattr(self, "report_db_id", None), user_id, status="canceled" if self.stop_event.is_set() else "completed")
         self.notify_scan_completion(token, channel_id, db, user_id)
 
     def notify_scan_start(self, token, channel_id, db, user_id):
@@ -92,8 +92,7 @@ class PwnXSS_scan(Scan):
             }
 
             json_report_path = os.path.join(self.report_path, "PwnXSS.json")
-            with open(json_report_path, 'w', encoding='utf-8') as json_file:
-                json_file.write(json.dumps(vulnerabilities_details, indent=4))  
+            self.write_report_file(json_report_path, vulnerabilities_details)
 
             notifier.send_to_websocket("✅[Finished] PwnXSS Scan completed.", self.db, self.user_id, notif_type="success")
 
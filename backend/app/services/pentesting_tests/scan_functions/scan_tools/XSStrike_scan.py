@@ -6,9 +6,51 @@ from sqlalchemy.orm import Session
 import urllib.parse
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
+from app.services.pentesting_tests.scan_functions.tool_stream import stream_process, strip_ansi
 import re
 notifier =Notifier()
 
+class XSStrikeLog:
+    """Line by line reader of the XSStrike console log."""
+
+    def __init__(self):
+        self.parsed_pages = []
+        self.vuln_pages = []
+        self.vuln_urls = []
+        self.vuln_objects = []
+        self.specific_vulnerable_objects = []
+        self.vulnerabilities = []
+
+    def feed(self, line):
+        """Consume one log line; returns the vulnerability it reports, if any."""
+        self.parsed_pages.extend(re.findall(r"Parsing\s+([^\s]+)", line))
+        self.vuln_urls.extend(re.findall(r"\[\+\] Potentially vulnerable objects found at\s+(\S+)", line))
+        self.vuln_objects.extend(re.findall(r"\d+\s+\t+([^\n]+)", line))
+        self.specific_vulnerable_objects.extend(re.findall(r"document\.cookie\s*=\s*\"[^\"]*\";", line))
+        page = re.search(r"Vulnerable webpage:\s+(\S+)", line)
+        if page:
+            self.vuln_pages.append(page.group(1))
+        vector = re.search(r"Vector for\s+(\w+):\s+([^\n]+)", line)
+        if vector:
+            vulnerability = {
+                # Vectors follow the "Vulnerable webpage" line of their page.
+                "page": self.vuln_pages[-1] if self.vuln_pages else "Unknown",
+                "parameters": vector.group(1),
+                "payload": vector.group(2).strip()
+            }
+            self.vulnerabilities.append(vulnerability)
+            return vulnerability
+        return None
+
+    def report(self):
+        return {
+            "parsed_pages": self.parsed_pages,  
+            "vulnerable_pages": self.vuln_pages,
+            "vulnerable_objects": {vuln_url: self.vuln_objects + self.specific_vulnerable_objects for vuln_url in self.vuln_urls}, 
+            "vulnerabilities": self.vulnerabilities
+        }
+
+
 class XSStrike_scan(Scan):
     def __init__(self, setting, url, report_path, results_path, db, user_id):
         super().__init__(setting, url,'XSStrike.json')
@@ -18,52 +60,26 @@ class XSStrike_scan(Scan):
         self.db =db
         self.user_id= user_id 
 
-    def clean_log(self,log_path):
-        with open(log_path, "r", encoding="utf-8") as file:
-            log_content = file.read()
-        clean_content = re.sub(r'\x1b\[[0-9;]*[A-Za-z]', '', log_content)
-        with open(log_path, "w", encoding="utf-8") as file:
-            file.write(clean_content)   
-        print("✅ Log nettoyé avec succès!")
-
-    def parse_log(self, log_path, res_path):
-        with open(log_path, "r", encoding="utf-8") as file:
-            log_content = file.read()
-
-        parsed_pages = re.findall(r"Parsing\s+([^\s]+)", log_content)
-        vuln_pages = re.findall(r"Vulnerable webpage:\s+(\S+)", log_content)
-        vuln_entries = re.findall(r"Vector for\s+(\w+):\s+([^\n]+)", log_content)
-        vuln_entries_clean = [(param, payload.split("\n")[0].strip()) for param, payload in vuln_entries]
-        vuln_urls = re.findall(r"\[\+\] Potentially vulnerable objects found at\s+(\S+)", log_content)
-        vuln_objects = re.findall(r"\d+\s+\t+([^\n]+)", log_content)  
-        specific_vulnerable_objects = re.findall(r"document\.cookie\s*=\s*\"[^\"]*\";", log_content) 
-        vuln_objects_dict = {}        
-        for vuln_url in vuln_urls:
-            vuln_objects_dict[vuln_url] = []
-
-        for vuln_url in vuln_urls:
-            vuln_objects_dict[vuln_url] = vuln_objects + specific_vulnerable_objects
-
-        vulnerabilities = []
-        for i, (param, payload) in enumerate(vuln_entries_clean):
-            page = vuln_pages[i] if i < len(vuln_pages) else "Unknown"
-            vulnerabilities.append({
-                "page": page,
-                "parameters": param,
-                "payload": payload
-            })
-
-        report = {
-            "parsed_pages": parsed_pages,  
-            "vulnerable_pages": vuln_pages,
-            "vulnerable_objects": vuln_objects_dict, 
-            "vulnerabilities": vulnerabilities
+    def attack_from_vulnerability(self, vulnerability):
+        return {
+            "url": vulnerability["page"],
+            "method": "GET",
+            "parameters":  {vulnerability["parameters"]: urllib.parse.unquote(vulnerability["payload"])},
+            "attack": urllib.parse.unquote(vulnerability["payload"])
         }
-        with open(res_path, "w", encoding="utf-8") as json_file:
-            json.dump(report, json_file, indent=4)
 
+    def save_log_report(self, log, res_path):
+        with open(res_path, "w", encoding="utf-8") as json_file:
+            json.dump(log.report(), json_file, indent=4)
         print(f"✅ Rapport XSS généré avec succès: {res_path}")
 
+    def parse_log(self, log_path, res_path):
+        log = XSStrikeLog()
+        with open(log_path, "r", encoding="utf-8") as file:
+            for line in file:
+                log.feed(strip_ansi(line.rstrip("\n")))
+        self.save_log_report(log, res_path)
+
     def start(self, username, password, token_auth, cookies):
         print("Starting the scan XSStrike...")
         notifier.send_to_websocket("Starting the scan XSStrike...", self.db, self.user_id, notif_type="info")
@@ -72,27 +88,25 @@ class XSStrike_scan(Scan):
             XSStrike_path =  self.get_folder_path("tools")/ "XSStrike" / "xsstrike.py"
             if not os.path.exists(XSStrike_path):
                 raise FileNotFoundError(f"XSStrike.py not found at {XSStrike_path}")
-            command = (
-                f"python {XSStrike_path} -u {self.url} --crawl -l 5 --threads 10 > {self.resultat_path}/XSStrike.txt 2>&1"
-            )
+            command = ["python", str(XSStrike_path), "-u", self.url, "--crawl", "-l", "5", "--threads", "10"]
             if cookies:
-                command+=f" --cookies {cookies}"
-
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            for line in iter(process.stdout.readline, ''):
-                output = line.strip()
-                print(output)
-            process.wait()            
+                command += ["--cookies", cookies]
+
+            # The log is parsed while XSStrike runs: each vector is reported as soon as it is found.
+            log = XSStrikeLog()
+            with open(f"{self.resultat_path}/XSStrike.txt", "w", encoding="utf-8") as log_file:
+                def on_line(line):
+                    line = strip_ansi(line)
+                    log_file.write(line + "\n")
+                    vulnerability = log.feed(line)
+                    if vulnerability:
+                        self.emit_finding("xsstrike", "Cross Site Scripting", [self.attack_from_vulnerability(vulnerability)], {"risk": "High"})
+                returncode, error_message = stream_process(command, on_line)
+            if returncode != 0:
+                print(f"❌ XSStrike s'est terminé avec le code {returncode}: {error_message}")
             notifier.send_to_websocket("[Finished] XSStrike Scan completed.", self.db, self.user_id, notif_type="success")
-            
-            self.clean_log(f"{self.resultat_path}/XSStrike.txt")
-            self.parse_log(f"{self.resultat_path}/XSStrike.txt",f"{self.resultat_path}/XSStrike.json")
+
+            self.save_log_report(log, f"{self.resultat_path}/XSStrike.json")
 
         except subprocess.CalledProcessError as e:
             print("An error occurred during the scan:", e)
@@ -119,14 +133,7 @@ class XSStrike_scan(Scan):
             if "vulnerabilities" not in data:
                 print("Clé 'vulnerabilities' non trouvée dans le JSON")
                 raise HTTPException(status_code=500, detail="Clé 'vulnerabilities' manquante")
-            details=[]
-            for d in data["vulnerabilities"]: 
-                details.append({
-                    "url": d["page"],
-                    "method": "GET",
-                    "parameters":  {d["parameters"]: urllib.parse.unquote(d["payload"])},
-                    "attack": urllib.parse.unquote(d["payload"])
-                })
+            details=[self.attack_from_vulnerability(d) for d in data["vulnerabilities"]]
             XSStrike_vulnerabilities_details = {
                 "Cross Site Scripting": [len(details), details]
             }
@@ -5,9 +5,9 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
-from urllib.parse import urlparse, parse_qs, urljoin
-import requests
-from bs4 import BeautifulSoup
+from app.services.pentesting_tests.scan_functions.model_store import model_store
+from urllib.parse import urlparse, parse_qs
+from app.services.url_discovery import URLDiscovery
 notifier =Notifier()
 class nikto_scan(Scan):
     def __init__(self, setting, url, report_path, results_path, db, user_id):
@@ -23,30 +23,8 @@ class nikto_scan(Scan):
         return parsed_url.netloc == '' or parsed_url.netloc == urlparse(self.url).netloc
 
     def crawl_website(self, base_url, max_depth=2):
-        visited = set()
-        to_visit = [(base_url, 0)]
-        base_domain = urlparse(base_url).netloc
-
-        while to_visit:
-            current_url, depth = to_visit.pop(0)
-            normalized_url = urlparse(current_url)._replace(query="").geturl()
-            if normalized_url in visited or depth > max_depth:
-                continue
-            visited.add(normalized_url)
-
-            try:
-                response = requests.get(current_url, timeout=5)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for tag in soup.find_all('a', href=True):
-                    href = tag.get('href')
-                    full_url = urljoin(current_url, href)
-                    parsed = urlparse(full_url)
-                    if parsed.netloc == base_domain:
-                        cleaned_url = parsed._replace(fragment="", query="").geturl()
-                        to_visit.append((cleaned_url, depth + 1))
-            except Exception as e:
-                print(f"❌ Erreur lors du crawl de {current_url} : {e}")
-        return visited
+        discovery = URLDiscovery(base_url, keep_query=False)
+        return list(discovery.crawl(max_depth=max_depth))
 
     def extract_url_parameters(self, url):
         parsed_url = urlparse(url)
@@ -70,8 +48,7 @@ class nikto_scan(Scan):
         return vulnerabilities_by_id
 
     def extract_transformed_data(self, data, details_file):
-        with open(details_file, "r", encoding="utf-8") as file:
-            details = json.load(file)
+        details = model_store.view(os.path.basename(details_file))
 
         transformed_data = {}
         for vuln_id, (count, entries, comm) in data.items():
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
+from app.services.pentesting_tests.scan_functions.tool_stream import NmapXMLStream, stream_process
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse, parse_qs
 import json
@@ -50,29 +51,34 @@ class nmap_scan(Scan):
                     attacks.append(attack_info)
         return attacks
     
+    def add_port_scripts(self, vuln_data, port):
+        for script in port.findall("script"):
+            script_id = script.get("id")
+            script_output = script.get("output", "")
+            if "Couldn't find any" in script_output or "No vulnerabilities found" in script_output:
+                continue  
+            if script_id not in vuln_data:
+                vuln_data[script_id] = [0, [], {}]
+            structured_attacks, details = self.parse_raw_output(script_id, script, script_output)
+            vuln_data[script_id][0] += len(structured_attacks)
+            vuln_data[script_id][1].extend(structured_attacks)
+            vuln_data[script_id][2]=details
+            self.emit_finding("nmap", script_id, structured_attacks, details)
+
+    def save_vuln_details(self, vuln_data, output_json):
+        if not vuln_data:
+            print("❌ No vulnerabilities found in XML.")
+        self.write_report_file(output_json, vuln_data)
+        print(f"✅ Extraction terminée. Résultats enregistrés dans {output_json}")
+
     def extract_vuln_details(self, xml_file, output_json):
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
             vuln_data = {}
-            for host in root.findall("host"):
-                for port in host.findall("ports/port"):
-                    for script in port.findall("script"):
-                        script_id = script.get("id")
-                        script_output = script.get("output", "")
-                        if "Couldn't find any" in script_output or "No vulnerabilities found" in script_output:
-                            continue  
-                        if script_id not in vuln_data:
-                            vuln_data[script_id] = [0, [], {}]
-                        structured_attacks, details = self.parse_raw_output(script_id, script, script_output)
-                        vuln_data[script_id][0] += len(structured_attacks)
-                        vuln_data[script_id][1].extend(structured_attacks)
-                        vuln_data[script_id][2]=details
-            if not vuln_data:
-                print("❌ No vulnerabilities found in XML.")
-            with open(output_json, "w", encoding="utf-8") as json_file:
-                json.dump(vuln_data, json_file, indent=4, ensure_ascii=False)
-            print(f"✅ Extraction terminée. Résultats enregistrés dans {output_json}")
+            with open(xml_file, "r", encoding="utf-8") as file:
+                stream = NmapXMLStream(lambda port: self.add_port_scripts(vuln_data, port))
+                for line in file:
+                    stream.feed(line.rstrip("\n"))
+            self.save_vuln_details(vuln_data, output_json)
 
         except Exception as e:
             print(f"❌ Error while reading XML File: {e}")
@@ -183,21 +189,21 @@ class nmap_scan(Scan):
             if password and username:
                 command+= f" --script-args http-auth.username={username},http-auth.password={password}"
         
-            command = ["bash", "commands.sh", self.url, self.hostname, "nmap", username, password, cookies,]
-            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            for line in iter(process.stdout.readline, ''):
-                output = line.strip()
-                print(output)
-            process.wait()
+            # Without a results argument commands.sh makes nmap write its XML to stdout (-oX -):
+            # each port is parsed and reported as soon as nmap is done with it.
+            command = ["bash", "commands.sh", self.url, self.hostname, "nmap", username or "", password or "", cookies or ""]
+            vuln_data = {}
+            with open(f"{self.resultat_path}/nmap.xml", "w", encoding="utf-8") as raw_xml:
+                stream = NmapXMLStream(lambda port: self.add_port_scripts(vuln_data, port), raw_file=raw_xml)
+                returncode, error_message = stream_process(command, stream.feed)
 
-            if process.returncode != 0:
-                error_message = process.stderr.read().strip()
+            if returncode != 0:
                 print(f"❌ Erreur lors de l'exécution de la commande : {error_message}")
                 notifier.send_to_websocket(f"❌ Erreur : {error_message}", self.db, self.user_id, notif_type="error")
 
-            notifier.send_to_websocket("✅ [Finished] Nmap Scan completed.", self.db, self.user_id, type="success")  
+            notifier.send_to_websocket("✅ [Finished] Nmap Scan completed.", self.db, self.user_id, notif_type="success")  
             report_path = f"{self.report_path}/nmap.json"
-            self.extract_vuln_details(f"{self.resultat_path}/nmap.xml", report_path)
+            self.save_vuln_details(vuln_data, report_path)
             print(f"✅ Résultats enregistrés dans {report_path}!")                      
 
         except subprocess.CalledProcessError as e:
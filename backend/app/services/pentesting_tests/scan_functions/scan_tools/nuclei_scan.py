@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 import yaml
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
+from app.services.pentesting_tests.scan_functions.tool_stream import iter_json_lines, stream_process
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 notifier= Notifier()
@@ -78,7 +79,6 @@ class nuclei_scan(Scan):
                     header_key="x-pdcp-key",
                     header_value="<api-key-here>"
                 )
-                command = ["bash", "commands.sh", self.url, self.hostname, "nuclei", username, password, cookies]
 
                 # ++++ command = [
                 #     "docker", "run", "--rm",
@@ -96,20 +96,23 @@ class nuclei_scan(Scan):
                 # ]
                 # command=  f"nuclei -u {self.url} -json-export {self.resultat_path}\\nuclei.json"
                 # commandlast= f"docker exec nuclei_container -u {self.url} -json-export {self.resultat_path}\\nuclei.json"
-                if os.path.exists(secret_file):
-                    command += ["-sf", {secret_file}]
-                print(command)
-            process = subprocess.Popen(
-               command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            for line in iter(process.stdout.readline, ''):
-                output = line.strip()
-                print(output)
-            process.wait()
+            # Without a results argument commands.sh runs nuclei with -jsonl: every finding is
+            # aggregated and pushed as soon as it is printed, and appended to nuclei.jsonl.
+            command = ["bash", "commands.sh", self.url, self.hostname, "nuclei", username or "", password or "", cookies or ""]
+            print(command)
+            nuclei_vulnerabilities_details = {}
+            with open(self.jsonl_path(), "w", encoding="utf-8") as jsonl_file:
+                def on_line(line):
+                    for vuln in iter_json_lines([line]):
+                        jsonl_file.write(json.dumps(vuln) + "\n")
+                        template_id, res, details = self.add_nuclei_finding(nuclei_vulnerabilities_details, vuln)
+                        self.emit_finding("nuclei", template_id, [res], details)
+                        return
+                    print(line)
+                returncode, error_message = stream_process(command, on_line)
+            if returncode != 0:
+                print(f"❌ Erreur lors de l'exécution de nuclei : {error_message}")
+                notifier.send_to_websocket(f"❌ Erreur : {error_message}", self.db, self.user_id, notif_type="error")
             notifier.send_to_websocket("[Finished] nuclei Scan completed.", self.db, self.user_id, notif_type="success")
             
         except subprocess.CalledProcessError as e:
@@ -121,47 +124,60 @@ class nuclei_scan(Scan):
         params = parse_qs(parsed_url.query)
         return {key: values if len(values) > 1 else values[0] for key, values in params.items()}
 
+    def jsonl_path(self):
+        return f"{self.resultat_path}/nuclei.jsonl"
+
+    def add_nuclei_finding(self, nuclei_vulnerabilities_details, vuln):
+        template_id = vuln.get("template-id", "")
+        details = {}
+        res={}
+        fields = [
+            "name", "severity", "description", "remediation",  "url", "matched-at"
+            ,"path", "type","host","scheme" ,"port", "request", "response" ,"ip" ,"extracted-results", "meta","interaction", "curl-command"
+        ]
+        for field in fields:
+            if field in vuln:
+                details[field] = vuln[field]
+        if "info" in vuln:
+            info_fields = ["severity", "description","reference",  "remediation"]
+            details.update({key: vuln["info"].get(key) for key in info_fields if key in vuln["info"]})
+        if template_id not in nuclei_vulnerabilities_details:
+            nuclei_vulnerabilities_details[template_id] = [0, [], {}]
+        res["url"]=details.get('matched-at', details.get('url', ''))
+        match = re.match(r"^(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD)", details.get('request', ''))
+        res["method"]= match.group(0) if match else ""
+        res["parameters"]= self.extract_url_parameters(res["url"])
+        res["type"]= details.get("type", "")
+        res["extracted-results"]=  details.get('extracted-results', []) 
+        nuclei_vulnerabilities_details[template_id][0] += 1
+        nuclei_vulnerabilities_details[template_id][1].append(res)
+        nuclei_vulnerabilities_details[template_id][2] = {
+            "description": details.get('description', ''),
+            "solution":  details.get('remediation', ''),
+            "risk":  details.get('severity', ''), 
+            "reference":  details.get('reference', []), 
+        }
+        return template_id, res, nuclei_vulnerabilities_details[template_id][2]
+
     def get_nuclei_results(self, token, channel_id, emails, db: Session, user_id: int, save_to_db=True):
         nuclei_vulnerabilities_details = {}
         nuclei_scan_result_path = f"{self.resultat_path}/nuclei.json"
 
         try:
-            with open(nuclei_scan_result_path, "r", encoding="utf-8") as nuclei_scan_result:
-                data = json.load(nuclei_scan_result)
+            if os.path.exists(self.jsonl_path()):
+                # Streamed scans: read back one finding per line.
+                with open(self.jsonl_path(), "r", encoding="utf-8") as nuclei_scan_result:
+                    for vuln in iter_json_lines(nuclei_scan_result):
+                        self.add_nuclei_finding(nuclei_vulnerabilities_details, vuln)
+            else:
+                with open(nuclei_scan_result_path, "r", encoding="utf-8") as nuclei_scan_result:
+                    data = json.load(nuclei_scan_result)
 
-                if not isinstance(data, list):
-                    print("Invalid JSON format: Expected a list of vulnerabilities.")
-                    return None
-                for vuln in data:
-                    template_id = vuln.get("template-id", "")
-                    details = {}
-                    res={}
-                    fields = [
-                        "name", "severity", "description", "remediation",  "url", "matched-at"
-                        ,"path", "type","host","scheme" ,"port", "request", "response" ,"ip" ,"extracted-results", "meta","interaction", "curl-command"
-                    ]
-                    for field in fields:
-                        if field in vuln:
-                            details[field] = vuln[field]
-                    if "info" in vuln:
-                        info_fields = ["severity", "description","reference",  "remediation"]
-                        details.update({key: vuln["info"].get(key) for key in info_fields if key in vuln["info"]})
-                    if template_id not in nuclei_vulnerabilities_details:
-                        nuclei_vulnerabilities_details[template_id] = [0, [], {}]
-                    res["url"]=details['matched-at']
-                    match = re.match(r"^(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD)", details['request'])
-                    res["method"]= match.group(0) if match else ""
-                    res["parameters"]= self.extract_url_parameters(res["url"])
-                    res["type"]= details["type"]
-                    res["extracted-results"]=  details.get('extracted-results', []) 
-                    nuclei_vulnerabilities_details[template_id][0] += 1
-                    nuclei_vulnerabilities_details[template_id][1].append(res)
-                    nuclei_vulnerabilities_details[template_id][2] = {
-                        "description": details.get('description', ''),
-                        "solution":  details.get('remediation', ''),
-                        "risk":  details.get('severity', ''), 
-                        "reference":  details.get('reference', []), 
-                    }
+                    if not isinstance(data, list):
+                        print("Invalid JSON format: Expected a list of vulnerabilities.")
+                        return None
+                    for vuln in data:
+                        self.add_nuclei_finding(nuclei_vulnerabilities_details, vuln)
         except FileNotFoundError:
             print(f"Nuclei scan result file not found: {nuclei_scan_result_path}")
             return None
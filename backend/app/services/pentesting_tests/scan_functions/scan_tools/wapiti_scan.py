@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 import urllib.parse
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
+from app.services.pentesting_tests.scan_functions.model_store import model_store
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 notifier= Notifier()
@@ -64,7 +65,7 @@ class wapiti_scan(Scan):
             notifier.send_to_websocket(f"An error occurred during the scan: {e}", self.db, self.user_id, notif_type="error") 
 
     def get_wapiti_results(self, token, channel_id, emails, db: Session, user_id: int, save_to_db=True):
-        wapiti_vulnerabilities_details = self.wapiti_vulnerabilities.copy()
+        wapiti_vulnerabilities_details = model_store.copy('wapiti.json')
         wapiti_scan_result_path = self.resultat_path
         if not os.path.exists(wapiti_scan_result_path):
             print(f"Wapiti scan result file not found: {wapiti_scan_result_path}")
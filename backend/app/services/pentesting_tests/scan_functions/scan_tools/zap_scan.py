@@ -8,6 +8,7 @@ import urllib
 from zapv2 import ZAPv2
 from app.services.notifier import Notifier
 from app.services.pentesting_tests.scan_functions.scan import Scan
+from app.services.pentesting_tests.scan_functions.model_store import model_store
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qs
 import requests
@@ -81,8 +82,10 @@ class ZAP_scan(Scan):
                         scanID = zap.spider.scan(self.url, recurse=False, subtreeonly=True)
                         print("scanID"+scanID)
                     while int(zap.spider.status(scanID)) < 100:
-                        print(f"Spider progress %: {zap.spider.status(scanID)}")
-                        notifier.send_to_websocket(f"Spider progress %: {zap.spider.status(scanID)}", self.db, self.user_id, notif_type="progression")
+                        spider_status = int(zap.spider.status(scanID))
+                        print(f"Spider progress %: {spider_status}")
+                        # Spider counted as the first fifth of the ZAP scan.
+                        self.report_progress("spider", spider_status * 0.2)
                         
                         time.sleep(5)
 
@@ -140,8 +143,9 @@ class ZAP_scan(Scan):
                 scanID = zap.ascan.scan(self.url)
                 time.sleep(2)
                 while int(zap.ascan.status(scanID)) < 100:
-                    print(f"Scan progress %: {zap.ascan.status(scanID)}")
-                    notifier.send_to_websocket(f"Scan progress %: {zap.ascan.status(scanID)}", self.db, self.user_id, notif_type="progression")
+                    ascan_status = int(zap.ascan.status(scanID))
+                    print(f"Scan progress %: {ascan_status}")
+                    self.report_progress("active_scan", 20 + ascan_status * 0.8)
                     
                     for alert in zap.alert.alerts(baseurl=self.url):
                         alert_message = f"URL: {alert.get('url')}, Risk '{alert.get('risk')}' , Plugin ID: {alert.get('pluginId')} detected by Zap in: {alert.get('alert')}"
@@ -165,7 +169,7 @@ class ZAP_scan(Scan):
                 zap_while_controler = "run_zap_scan"
 
     def owaspzap_get_results(self, token, channel_id, emails, db: Session, user_id: int, save_to_db=True):
-        zap_vulnerabilities_new = self.zap_vulnerabilities.copy()
+        zap_vulnerabilities_new = model_store.copy('zap.json')
         
         with open(self.results_path, 'r') as read_file:
             zap_result = json.load(read_file)
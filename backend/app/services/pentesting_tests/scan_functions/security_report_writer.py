@@ -0,0 +1,116 @@
+import json
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.report import Report
+from app.models.security import SecurityReportDetails, Vulnerability, VulnerabilityCategory
+
+
+def vulnerability_fields(vuln):
+    return {
+        "url": vuln.get("url"),
+        "method": vuln.get("method"),
+        "parameters": vuln.get("parameter"),
+        "attack": json.dumps(vuln.get("attack")),
+        "real_name": ", ".join(vuln.get("real_name", [])),
+        "detected_by": ", ".join(vuln.get("detected_by", [])),
+        "confidence": vuln.get("confidence", ""),
+        "confidence_score": str(vuln.get("confidence_score", ""))
+    }
+
+
+class SecurityReportWriter:
+    """Keeps the DB rows of a security report in step with a CompareReport.
+
+    The first sync replaces whatever rows the report had; later syncs only
+    touch the categories merged since the previous one, updating the rows
+    they already wrote, inserting the new ones and deleting the ones gone
+    from the report (streamed findings replaced by the tool's report file). The writer shares the
+    caller's session: it must only be used from one thread at a time.
+    """
+
+    def __init__(self, db: Session, report_db_id):
+        self.db = db
+        self.report_db_id = report_db_id
+        self.details = None
+        self.categories = {}
+        self.vulnerabilities = {}
+
+    def reset(self):
+        self.details = None
+        self.categories = {}
+        self.vulnerabilities = {}
+
+    def delete_category(self, category_name):
+        for row_key in [row_key for row_key in self.vulnerabilities if row_key[0] == category_name]:
+            self.db.delete(self.vulnerabilities.pop(row_key))
+        category = self.categories.pop(category_name, None)
+        if category is not None:
+            self.db.delete(category)
+
+    def sync(self, comparator, report, finished=False):
+        """Write the categories changed since the last sync; report is save_final_report()'s result."""
+        db = self.db
+        details = report["details"]
+        dirty = comparator.take_dirty_categories()
+        try:
+            db_report = db.query(Report).filter(Report.id == self.report_db_id).first()
+            if not db_report:
+                print("❌ Rapport introuvable. Impossible de modifier un rapport inexistant.")
+                return
+            if finished:
+                db_report.scan_finished_at = datetime.now()
+                db_report.status = "completed"
+
+            if self.details is None:
+                for existing in db.query(SecurityReportDetails).filter(SecurityReportDetails.report_id == db_report.id).all():
+                    db.delete(existing)
+                db.flush()
+                self.details = SecurityReportDetails(report_id=db_report.id)
+                db.add(self.details)
+                # Nothing of this comparator has been written yet.
+                dirty = set(comparator.final_report)
+            self.details.number_vulnerabilities = details.get("number_vulnerabilities", 0)
+            self.details.total_High = details.get("total_High", 0)
+            self.details.total_Medium = details.get("total_Medium", 0)
+            self.details.total_Low = details.get("total_Low", 0)
+            self.details.total_Informational = details.get("total_Informational", 0)
+            self.details.tools_used = ",".join(details.get("tools_used", []))
+            self.details.cached_tools = ",".join(details.get("cached_tools", []))
+            self.details.host_metadata = report.get("host_metadata", [])
+            db.flush()
+
+            for category_name in dirty:
+                if category_name not in comparator.final_report:
+                    self.delete_category(category_name)
+                    continue
+                category_data = comparator.final_report[category_name]
+                category = self.categories.get(category_name)
+                if category is None:
+                    category = VulnerabilityCategory(security_report_id=self.details.id, title=category_name)
+                    db.add(category)
+                    self.categories[category_name] = category
+                category.total = category_data.get("total", 0)
+                category.risk = category_data.get("risk", "")
+                category.details = json.dumps(category_data.get("details", []))
+                category.tools = ",".join(category_data.get("all_tools", []))
+                db.flush()
+                current_keys = set()
+                for key, vuln in comparator.category_vulnerabilities(category_name):
+                    current_keys.add(key)
+                    row = self.vulnerabilities.get((category_name, key))
+                    if row is None:
+                        row = Vulnerability(category_id=category.id)
+                        db.add(row)
+                        self.vulnerabilities[(category_name, key)] = row
+                    for field, value in vulnerability_fields(vuln).items():
+                        setattr(row, field, value)
+                for row_key in [row_key for row_key in self.vulnerabilities if row_key[0] == category_name and row_key[1] not in current_keys]:
+                    db.delete(self.vulnerabilities.pop(row_key))
+            db.commit()
+            print(f"✅ Rapport {self.report_db_id} mis à jour ({len(dirty)} catégorie(s))")
+        except Exception as e:
+            db.rollback()
+            # The rows in memory may not match the DB any more: rewrite everything next time.
+            self.reset()
+            comparator.dirty_categories.update(comparator.built)
+            print(f"❌ Erreur lors de la mise à jour du rapport : {e}")
@@ -0,0 +1,74 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# Cost class of each tool: "light" fingerprinting tools finish in seconds,
+# "network" tools crawl/probe the target, "heavy" ones run for a long time
+# and load the worker host (active scans, full port scans, injections).
+TOOL_COST_CLASSES = {
+    "whatweb": "light",
+    "wafw00f": "light",
+    "nuclei": "network",
+    "nikto": "network",
+    "wapiti": "network",
+    "xsstrike": "network",
+    "pwnxss": "network",
+    "nmap": "heavy",
+    "zap": "heavy",
+    "sqlmap": "heavy",
+}
+DEFAULT_COST_CLASS = "network"
+
+# Budgets are per process and shared by every scan running in it.
+COST_CLASS_LIMITS = {
+    "light": int(os.getenv("SCAN_LIGHT_TOOLS_LIMIT", 8)),
+    "network": int(os.getenv("SCAN_NETWORK_TOOLS_LIMIT", 4)),
+    "heavy": int(os.getenv("SCAN_HEAVY_TOOLS_LIMIT", 2)),
+}
+
+
+class ToolScheduler:
+    def __init__(self, limits=COST_CLASS_LIMITS):
+        self.limits = dict(limits)
+        self.slots = {cost_class: threading.BoundedSemaphore(limit) for cost_class, limit in self.limits.items()}
+        self.lock = threading.Lock()
+        self.running = {cost_class: 0 for cost_class in self.limits}
+
+    @staticmethod
+    def cost_class(tool):
+        return TOOL_COST_CLASSES.get(str(tool).lower(), DEFAULT_COST_CLASS)
+
+    def plan(self, tools):
+        """Split the selected tools into two waves.
+
+        The light fingerprinting tools run first, all at once. Then the rest
+        run with the heavy tools first: they are the longest, so starting
+        them early shortens the total scan time.
+        """
+        light = [tool for tool in tools if self.cost_class(tool) == "light"]
+        others = [tool for tool in tools if self.cost_class(tool) != "light"]
+        others.sort(key=lambda tool: self.cost_class(tool) != "heavy")
+        return [wave for wave in (light, others) if wave]
+
+    @contextmanager
+    def slot(self, tool, stop_event=None):
+        cost_class = self.cost_class(tool)
+        semaphore = self.slots[cost_class]
+        while not semaphore.acquire(timeout=1):
+            if stop_event is not None and stop_event.is_set():
+                raise RuntimeError(f"Scan {tool} annulé avant d'obtenir une place ({cost_class})")
+        with self.lock:
+            self.running[cost_class] += 1
+        try:
+            yield cost_class
+        finally:
+            with self.lock:
+                self.running[cost_class] -= 1
+            semaphore.release()
+
+    def stats(self):
+        with self.lock:
+            return {cost_class: {"running": self.running[cost_class], "limit": self.limits[cost_class]} for cost_class in self.limits}
+
+
+tool_scheduler = ToolScheduler()
@@ -0,0 +1,100 @@
+import re
+import json
+import threading
+import subprocess
+from collections import deque
+import xml.etree.ElementTree as ET
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+STDERR_TAIL_LINES = 50
+
+
+def strip_ansi(line):
+    return ANSI_ESCAPE.sub('', line)
+
+
+def stream_process(command, on_line, cwd=None):
+    """Run a tool and hand each stdout line to on_line as soon as it is printed.
+
+    Nothing is buffered beyond the current line; stderr is drained in the
+    background and only its last lines are kept for the error message.
+    Returns (returncode, stderr tail).
+    """
+    process = subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1
+    )
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    stderr_reader = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+    stderr_reader.start()
+    try:
+        for line in process.stdout:
+            on_line(line.rstrip("\r\n"))
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        stderr_reader.join(timeout=5)
+    return returncode, "".join(stderr_tail).strip()
+
+
+class NmapXMLStream:
+    """Incremental parser for `nmap -oX -`.
+
+    Each <port> is handed to on_port(port) once nmap closes it, then dropped
+    from the tree, so memory stays bounded whatever the size of the scan.
+    Lines printed around the XML document (e.g. by commands.sh) are skipped.
+    """
+
+    def __init__(self, on_port, raw_file=None):
+        self.on_port = on_port
+        self.raw_file = raw_file
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.in_document = False
+        self.closed = False
+        self.stack = []
+
+    def feed(self, line):
+        if self.closed:
+            return
+        if not self.in_document:
+            if not line.lstrip().startswith("<?xml"):
+                return
+            self.in_document = True
+        if self.raw_file is not None:
+            self.raw_file.write(line + "\n")
+        self.parser.feed(line + "\n")
+        for event, element in self.parser.read_events():
+            if event == "start":
+                self.stack.append(element)
+                continue
+            self.stack.pop()
+            if element.tag == "port":
+                self.on_port(element)
+                element.clear()
+                if self.stack:
+                    self.stack[-1].remove(element)
+            elif element.tag in ("host", "hosthint", "taskprogress", "taskbegin", "taskend"):
+                element.clear()
+                if self.stack:
+                    self.stack[-1].remove(element)
+        if "</nmaprun>" in line:
+            self.closed = True
+
+
+def iter_json_lines(lines):
+    """Yield the JSON objects of a JSON-lines stream, skipping any other output."""
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            print(f"⚠️ Ligne JSON ignorée: {line[:200]}")
@@ -0,0 +1,88 @@
+import os
+import re
+import json
+import threading
+from fuzzywuzzy import fuzz, process
+from app.configuration.scan_paths import scan_paths
+
+VULNERABILITY_MAPPING_PATH = os.getenv(
+    "VULNERABILITY_MAPPING_PATH",
+    str(scan_paths.get("vulnerabilities_model") / "vulnerability_mapping.json")
+)
+# Minimum fuzzywuzzy score (0-100) for names matching no alias exactly; 0 disables fuzzy matching.
+VULNERABILITY_FUZZY_SCORE = int(os.getenv("VULNERABILITY_FUZZY_SCORE", 0))
+
+
+def normalize_alias(name):
+    return re.sub(r"\s+", " ", str(name)).strip().casefold()
+
+
+class VulnerabilityIndex:
+    """Alias -> (canonical name, tools) index of vulnerability_mapping.json.
+
+    Built once per process and rebuilt by refresh() when the file changes on
+    disk. Lookups ignore case and extra whitespace.
+    """
+
+    def __init__(self, path=VULNERABILITY_MAPPING_PATH, fuzzy_score=VULNERABILITY_FUZZY_SCORE):
+        self.path = path
+        self.fuzzy_score = fuzzy_score
+        self.lock = threading.Lock()
+        self.mapping = {}
+        self.aliases = {}
+        self.fuzzy_matches = {}
+        self.signature = None
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        signature = self.file_signature()
+        if signature == self.signature:
+            return
+        with self.lock:
+            if signature == self.signature:
+                return
+            if signature is None:
+                print(f"❌ Fichier de mapping non trouvé: {self.path}")
+                mapping = {}
+            else:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as file:
+                        mapping = json.load(file)
+                except json.JSONDecodeError as e:
+                    # Keep the previous index rather than losing every alias to a half-written file.
+                    print(f"❌ Erreur JSON : {e}")
+                    return
+            aliases = {}
+            # First entry listing an alias wins; canonical names only fill the gaps.
+            for name, value in mapping.items():
+                for alias in value.get("aliases", []):
+                    aliases.setdefault(normalize_alias(alias), (name, value.get("tools", [])))
+            for name, value in mapping.items():
+                aliases.setdefault(normalize_alias(name), (name, value.get("tools", [])))
+            # Swapped in one go: concurrent lookups see either the old or the new index.
+            self.mapping, self.aliases, self.fuzzy_matches = mapping, aliases, {}
+            self.signature = signature
+            print(f"📚 Mapping des vulnérabilités chargé: {len(mapping)} entrées, {len(aliases)} alias")
+
+    def lookup(self, vuln_name):
+        """Return (canonical name, tools) for a tool's vulnerability name, or None."""
+        if self.signature is None:
+            self.refresh()
+        aliases = self.aliases
+        key = normalize_alias(vuln_name)
+        entry = aliases.get(key)
+        if entry is not None or not self.fuzzy_score:
+            return entry
+        if key not in self.fuzzy_matches:
+            match = process.extractOne(key, list(aliases), scorer=fuzz.token_sort_ratio, score_cutoff=self.fuzzy_score)
+            self.fuzzy_matches[key] = aliases[match[0]] if match else None
+        return self.fuzzy_matches[key]
+
+
+vulnerability_index = VulnerabilityIndex()
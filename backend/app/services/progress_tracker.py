@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import copy
+import atexit
+import threading
+import pika
+import aio_pika
+from sqlalchemy import or_, update
+from dotenv import load_dotenv
+from app.configuration.rabbitmq import PROGRESS_EXCHANGE, rabbitmq_url
+from app.database.database import SessionLocal
+from app.models.report import Report
+from app.services.notifier import Notifier
+
+load_dotenv()
+notifier = Notifier()
+
+# Seconds between two progress events of the same report; values in between are coalesced.
+PROGRESS_EVENT_INTERVAL = float(os.getenv("PROGRESS_EVENT_INTERVAL", 2))
+# Finished reports kept in memory for GET /reports/{id}/progress.
+PROGRESS_KEEP_FINISHED = int(os.getenv("PROGRESS_KEEP_FINISHED", 1000))
+PROGRESS_TRANSPORT = os.getenv("NOTIFICATION_TRANSPORT", "rabbitmq").lower()
+
+
+class ProgressStore:
+    """In-memory progress of the scans, one snapshot per report id.
+
+    A snapshot is {"report_id", "user_id", "percent", "status", "tools":
+    {tool: {"phase", "percent"}}, "updated_at"}. merge() takes partial
+    snapshots from any worker: tools are merged and the overall percent
+    never goes back.
+    """
+
+    def __init__(self, keep_finished=PROGRESS_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self.lock = threading.Lock()
+        self.reports = {}
+        self.finished = []
+
+    def merge(self, snapshot):
+        report_id = snapshot["report_id"]
+        with self.lock:
+            state = self.reports.setdefault(report_id, {
+                "report_id": report_id,
+                "user_id": snapshot.get("user_id"),
+                "percent": 0.0,
+                "status": "running",
+                "tools": {},
+                "updated_at": None
+            })
+            state["tools"].update(snapshot.get("tools") or {})
+            state["percent"] = max(state["percent"], snapshot.get("percent") or 0.0)
+            state["updated_at"] = snapshot.get("updated_at") or time.time()
+            if snapshot.get("status") and state["status"] == "running":
+                state["status"] = snapshot["status"]
+                if state["status"] != "running":
+                    self.forget_oldest(report_id)
+            return copy.deepcopy(state)
+
+    def forget_oldest(self, report_id):
+        self.finished.append(report_id)
+        while len(self.finished) > self.keep_finished:
+            self.reports.pop(self.finished.pop(0), None)
+
+    def get(self, report_id):
+        with self.lock:
+            state = self.reports.get(report_id)
+            return copy.deepcopy(state) if state is not None else None
+
+
+class ProgressTracker:
+    """Worker side: structured progress per report, emitted at a bounded rate.
+
+    update() only records the new state. A background thread sends, at most
+    every PROGRESS_EVENT_INTERVAL seconds and per report, one "scan_progress"
+    event with the latest state to the user's dashboards and to the API
+    replicas (PROGRESS_EXCHANGE), and stores the overall percent in
+    Report.progression. Intermediate values are dropped.
+    """
+
+    def __init__(self, interval=PROGRESS_EVENT_INTERVAL, transport=PROGRESS_TRANSPORT):
+        self.interval = interval
+        self.transport = transport
+        self.store = ProgressStore()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.flush_lock = threading.Lock()
+        # report_id -> partial snapshot not sent yet.
+        self.dirty = {}
+        self.totals = {}
+        self.connection = None
+        self.channel = None
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        # Same lifecycle as ws_publisher: started on first use, again in forked children.
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid is not None and self.pid != os.getpid():
+                self.dirty, self.connection, self.channel = {}, None, None
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="progress-tracker", daemon=True)
+            self.thread.start()
+
+    def start(self, report_id, user_id, tools):
+        with self.lock:
+            self.totals[report_id] = len(tools)
+        self.update(report_id, user_id, tools={tool: {"phase": "queued", "percent": 0.0} for tool in tools})
+
+    def update(self, report_id, user_id, tool=None, phase=None, percent=None, overall=None, status=None, tools=None):
+        """Record progress; tool/phase/percent for one tool, overall for the whole scan (0-100)."""
+        if report_id is None:
+            return
+        self.ensure_started()
+        tools = dict(tools or {})
+        if tool is not None:
+            tools[tool] = {"phase": phase, "percent": round(float(percent or 0), 2)}
+        with self.lock:
+            state = self.store.merge({"report_id": report_id, "user_id": user_id, "tools": tools, "status": status})
+            if overall is None and self.totals.get(report_id):
+                overall = sum(item["percent"] or 0 for item in state["tools"].values()) / self.totals[report_id]
+            if overall is not None:
+                state = self.store.merge({"report_id": report_id, "percent": round(min(float(overall), 100.0), 2)})
+            pending = self.dirty.setdefault(report_id, {"report_id": report_id, "user_id": user_id, "tools": {}})
+            pending["tools"].update(tools)
+            pending["percent"] = state["percent"]
+            pending["status"] = status or pending.get("status")
+        if status is not None and status != "running":
+            # Final state: sent right away rather than at the next tick.
+            self.wakeup.set()
+
+    def tool_done(self, report_id, user_id, tool, status="completed"):
+        self.update(report_id, user_id, tool=tool, phase=status, percent=100)
+
+    def finish(self, report_id, user_id, status="completed"):
+        self.update(report_id, user_id, overall=100 if status == "completed" else None, status=status)
+        with self.lock:
+            self.totals.pop(report_id, None)
+
+    def get(self, report_id):
+        return self.store.get(report_id)
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush_once()
+
+    def flush_once(self):
+        with self.flush_lock:
+            with self.lock:
+                pending, self.dirty = self.dirty, {}
+            if not pending:
+                return 0
+            now = time.time()
+            for snapshot in pending.values():
+                snapshot["updated_at"] = now
+                notifier.send_event({
+                    "type": "scan_progress",
+                    **snapshot,
+                    "message": f"📊 Progression: {snapshot['percent']:.0f}%"
+                }, snapshot["user_id"])
+            self.publish(list(pending.values()))
+            self.save(pending)
+            return len(pending)
+
+    def publish(self, snapshots):
+        if self.transport != "rabbitmq":
+            return
+        try:
+            if self.connection is None or self.connection.is_closed:
+                parameters = pika.URLParameters(rabbitmq_url())
+                parameters.socket_timeout = 5
+                self.connection = pika.BlockingConnection(parameters)
+                self.channel = self.connection.channel()
+                self.channel.exchange_declare(exchange=PROGRESS_EXCHANGE, exchange_type="fanout", durable=True)
+            self.channel.basic_publish(
+                exchange=PROGRESS_EXCHANGE,
+                routing_key="",
+                body=json.dumps(snapshots, default=str).encode("utf-8"),
+                properties=pika.BasicProperties(content_type="application/json")
+            )
+        except Exception as e:
+            self.connection, self.channel = None, None
+            print(f"⚠️ Progression non publiée sur {PROGRESS_EXCHANGE}: {e}")
+
+    def save(self, pending):
+        db = SessionLocal()
+        try:
+            for report_id, snapshot in pending.items():
+                # Never moves back: with per-tool dispatch several processes report the same scan.
+                db.execute(
+                    update(Report)
+                    .where(Report.id == report_id, or_(Report.progression.is_(None), Report.progression < snapshot["percent"]))
+                    .values(progression=snapshot["percent"])
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Progression non enregistrée: {e}")
+        finally:
+            db.close()
+
+    def flush(self):
+        if self.thread is not None and self.pid == os.getpid():
+            self.flush_once()
+
+
+class ProgressListener:
+    """API side: fills a ProgressStore from PROGRESS_EXCHANGE."""
+
+    def __init__(self, store):
+        self.store = store
+        self.connection = None
+
+    async def start(self):
+        self.connection = await aio_pika.connect_robust(rabbitmq_url(), heartbeat=600)
+        channel = await self.connection.channel()
+        exchange = await channel.declare_exchange(PROGRESS_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True)
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange)
+        await queue.consume(self.on_message, no_ack=True)
+        print(f"✅ Suivi de progression abonné à {PROGRESS_EXCHANGE}")
+
+    async def on_message(self, message):
+        try:
+            for snapshot in json.loads(message.body):
+                self.store.merge(snapshot)
+        except Exception as e:
+            print(f"❌ Progression invalide reçue: {e}")
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+
+progress_tracker = ProgressTracker()
+atexit.register(progress_tracker.flush)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from app.services.seo_page_cache import content_hash
+from app.services.url_discovery import normalize_url
+
+
+class SEOCrawler:
+    def __init__(self, analyze, max_pages=100, concurrency=10, per_host_limit=4, timeout=10, cache=None, on_page=None, baseline=None):
+        self.analyze = analyze
+        self.cache = cache
+        self.baseline = baseline or {}
+        self.on_page = on_page
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+
+    def run(self, start_url, seeds=()):
+        return asyncio.run(self.crawl(start_url, seeds))
+
+    async def crawl(self, start_url, seeds=()):
+        self.results = {}
+        self.pages_404 = []
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.done = 0
+        queue = asyncio.Queue()
+        self.schedule(queue, start_url)
+        # Sitemap URLs are queued right after the start page, links found while crawling come next.
+        for url in seeds:
+            self.schedule(queue, url)
+        # on_page callbacks (DB writes) are serialized on their own thread.
+        self.page_executor = ThreadPoolExecutor(max_workers=1) if self.on_page else None
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_limit, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(self.worker(session, queue)) for _ in range(self.concurrency)]
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.page_executor:
+            self.page_executor.shutdown(wait=True)
+        if self.cache:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.evict)
+
+        pages = [self.results[index] for index in sorted(self.results)]
+        return pages, self.pages_404
+
+    def progress(self):
+        # Discovered pages only grow, so this is a lower bound until the crawl ends.
+        return self.done / len(self.seen) if self.seen else 0.0
+
+    def schedule(self, queue, url):
+        url = normalize_url(url)
+        if url in self.seen or len(self.seen) >= self.max_pages:
+            return
+        if not url.startswith(('http://', 'https://')):
+            return
+        queue.put_nowait((len(self.seen), url))
+        self.seen.add(url)
+
+    async def worker(self, session, queue):
+        while True:
+            index, url = await queue.get()
+            try:
+                page_report, internal_links = await self.process(session, url)
+                self.results[index] = page_report
+                for link in internal_links:
+                    self.schedule(queue, link)
+            except Exception as e:
+                print(f"Error analyzing page {url}: {e}")
+                self.results[index] = {"url": url, "error": "Failed to fetch page"}
+                self.pages_404.append(url)
+            self.done += 1
+            try:
+                if self.on_page:
+                    await asyncio.get_running_loop().run_in_executor(self.page_executor, self.on_page, self.results[index])
+            except Exception as e:
+                print(f"Error handling crawled page {url}: {e}")
+            finally:
+                queue.task_done()
+
+    async def lookup(self, url):
+        # Pages from the previous crawl of the site win over the shared disk cache.
+        entry = self.baseline.get(url)
+        if entry is None and self.cache:
+            entry = await asyncio.get_running_loop().run_in_executor(None, self.cache.get, url)
+        return entry
+
+    def count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.cache:
+            if hit:
+                self.cache.hits += 1
+            else:
+                self.cache.misses += 1
+
+    async def process(self, session, url):
+        loop = asyncio.get_running_loop()
+        entry = await self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        start_time = time.time()
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and entry:
+                    self.count(True)
+                    page_report, internal_links = entry["report"], entry["internal_links"]
+                    body_hash, etag, last_modified = entry.get("content_hash"), entry.get("etag"), entry.get("last_modified")
+                    if self.cache:
+                        await loop.run_in_executor(
+                            None, self.cache.put, url, page_report, internal_links, body_hash, etag, last_modified
+                        )
+                    return self.page_record(page_report, internal_links, body_hash, etag, last_modified), internal_links
+                if response.status == 404:
+                    print(f"404 Not Found for {url}")
+                    self.pages_404.append(url)
+                    return {"url": url, "error": "404 Not Found"}, []
+                response.raise_for_status()
+                body = await response.read()
+                html = await response.text(errors="replace")
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching {url}: {e}")
+            return {"url": url, "error": "Failed to fetch page"}, []
+        load_time = round((time.time() - start_time) * 1000)
+
+        body_hash = content_hash(body)
+        if entry and entry.get("content_hash") == body_hash:
+            # Servers without validators still get a hit when the body is unchanged.
+            self.count(True)
+            page_report, internal_links = entry["report"], entry["internal_links"]
+        else:
+            self.count(False)
+            page_report, internal_links = await loop.run_in_executor(None, self.analyze, url, html, len(body), load_time)
+        if self.cache:
+            await loop.run_in_executor(None, self.cache.put, url, page_report, internal_links, body_hash, etag, last_modified)
+        return self.page_record(page_report, internal_links, body_hash, etag, last_modified), internal_links
+
+    @staticmethod
+    def page_record(page_report, internal_links, body_hash, etag, last_modified):
+        # Copy so cached/baseline reports are never mutated by callers.
+        return {
+            **page_report,
+            "content_hash": body_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "internal_urls": list(internal_links)
+        }
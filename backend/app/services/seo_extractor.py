@@ -0,0 +1,168 @@
+import os
+from lxml import etree
+
+SEO_PARSER_ENGINE = os.getenv("SEO_PARSER_ENGINE", "stream")
+FEED_CHUNK_SIZE = 64 * 1024
+HEADING_TAGS = {f"h{i}": i for i in range(1, 7)}
+NON_TEXT_TAGS = {"script", "style", "template"}
+
+
+def empty_signals():
+    return {
+        "title": None,
+        "meta_description": None,
+        "headings": {i: [] for i in range(1, 7)},
+        "canonical": None,
+        "images_missing_alt": [],
+        "robots": None,
+        "favicon": None,
+        "links": [],
+        "lang": None
+    }
+
+
+def extract_signals_bs4(soup):
+    signals = empty_signals()
+
+    if soup.title and soup.title.string:
+        signals["title"] = soup.title.string.strip() or None
+
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    if meta_desc and 'content' in meta_desc.attrs:
+        signals["meta_description"] = meta_desc['content'].strip()
+
+    for i in range(1, 7):
+        signals["headings"][i] = [h.get_text(strip=True) for h in soup.find_all(f"h{i}")]
+
+    canonical = soup.find("link", rel="canonical")
+    if canonical:
+        signals["canonical"] = canonical.get('href')
+
+    signals["images_missing_alt"] = [img.get('src') for img in soup.find_all("img") if not img.get('alt')]
+
+    robots = soup.find("meta", attrs={"name": "robots"})
+    if robots:
+        signals["robots"] = robots.get('content')
+
+    favicon = soup.find("link", rel=lambda x: x and 'icon' in x)
+    if favicon:
+        signals["favicon"] = favicon.get('href')
+
+    signals["links"] = [a['href'] for a in soup.find_all("a", href=True)]
+
+    html_tag = soup.find("html")
+    if html_tag:
+        signals["lang"] = html_tag.get("lang")
+    return signals
+
+
+class SEOSignalCollector:
+    """lxml parser target collecting every SEO signal in one pass over the parse events."""
+
+    def __init__(self):
+        self.signals = empty_signals()
+        self.text_parts = []
+        self.in_title = False
+        self.title_parts = None
+        self.open_headings = []
+        self.skip_depth = 0
+        self.seen_meta = set()
+
+    def start(self, tag, attrs):
+        self.flush_text()
+        tag = tag.lower() if isinstance(tag, str) else tag
+        signals = self.signals
+
+        if tag in HEADING_TAGS:
+            level = HEADING_TAGS[tag]
+            slot = len(signals["headings"][level])
+            signals["headings"][level].append("")
+            self.open_headings.append((tag, level, slot, []))
+        elif tag in NON_TEXT_TAGS:
+            self.skip_depth += 1
+        elif tag == "title" and self.title_parts is None:
+            self.in_title = True
+            self.title_parts = []
+        elif tag == "meta":
+            name = attrs.get("name")
+            if name in ("description", "robots") and name not in self.seen_meta:
+                self.seen_meta.add(name)
+                if name == "robots":
+                    signals["robots"] = attrs.get("content")
+                elif "content" in attrs:
+                    signals["meta_description"] = attrs["content"].strip()
+        elif tag == "link":
+            rel = attrs.get("rel")
+            if rel:
+                if signals["canonical"] is None and "canonical" in rel.split():
+                    signals["canonical"] = attrs.get("href")
+                if signals["favicon"] is None and "icon" in rel:
+                    signals["favicon"] = attrs.get("href")
+        elif tag == "img":
+            if not attrs.get("alt"):
+                signals["images_missing_alt"].append(attrs.get("src"))
+        elif tag == "a":
+            if "href" in attrs:
+                signals["links"].append(attrs["href"])
+        elif tag == "html" and signals["lang"] is None:
+            signals["lang"] = attrs.get("lang")
+
+    def end(self, tag):
+        self.flush_text()
+        tag = tag.lower() if isinstance(tag, str) else tag
+        if tag in HEADING_TAGS:
+            for index in range(len(self.open_headings) - 1, -1, -1):
+                if self.open_headings[index][0] == tag:
+                    _, level, slot, parts = self.open_headings.pop(index)
+                    self.signals["headings"][level][slot] = "".join(parts)
+                    break
+        elif tag in NON_TEXT_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag == "title" and self.in_title:
+            self.in_title = False
+            self.signals["title"] = "".join(self.title_parts).strip() or None
+
+    def data(self, data):
+        self.text_parts.append(data)
+
+    def comment(self, text):
+        self.flush_text()
+
+    def flush_text(self):
+        # lxml may split one text node across several data() calls; headings
+        # strip whole text nodes, like BeautifulSoup's get_text(strip=True).
+        if not self.text_parts:
+            return
+        text = "".join(self.text_parts)
+        self.text_parts = []
+        if self.in_title:
+            self.title_parts.append(text)
+        if self.open_headings and not self.skip_depth:
+            stripped = text.strip()
+            if stripped:
+                for heading in self.open_headings:
+                    heading[3].append(stripped)
+
+    def close(self):
+        self.flush_text()
+        for _, level, slot, parts in self.open_headings:
+            self.signals["headings"][level][slot] = "".join(parts)
+        self.open_headings = []
+        return self.signals
+
+
+def extract_signals_stream(html):
+    collector = SEOSignalCollector()
+    parser = etree.HTMLParser(target=collector)
+    for offset in range(0, len(html), FEED_CHUNK_SIZE):
+        parser.feed(html[offset:offset + FEED_CHUNK_SIZE])
+    if not html:
+        parser.feed("<html></html>")
+    return parser.close()
+
+
+def extract_signals(html, engine=SEO_PARSER_ENGINE):
+    if engine == "bs4":
+        from bs4 import BeautifulSoup
+        return extract_signals_bs4(BeautifulSoup(html, "lxml"))
+    return extract_signals_stream(html)
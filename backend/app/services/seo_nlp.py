@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+NLTK_DATA_DIR = os.getenv(
+    "NLTK_DATA_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "nltk_data"))
+)
+
+# ISO 639-1 codes from <html lang> mapped to NLTK stopword / punkt language names.
+LANGUAGES = {
+    "ar": "arabic", "az": "azerbaijani", "da": "danish", "de": "german", "el": "greek",
+    "en": "english", "es": "spanish", "fi": "finnish", "fr": "french", "hu": "hungarian",
+    "id": "indonesian", "it": "italian", "kk": "kazakh", "ne": "nepali", "nl": "dutch",
+    "no": "norwegian", "nb": "norwegian", "pt": "portuguese", "ro": "romanian", "ru": "russian",
+    "sl": "slovene", "sv": "swedish", "tg": "tajik", "tr": "turkish"
+}
+DEFAULT_LANGUAGE = "english"
+FALLBACK_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+_nltk_lock = threading.Lock()
+
+
+def language_from_lang(lang):
+    if not lang:
+        return DEFAULT_LANGUAGE
+    return LANGUAGES.get(str(lang).strip().lower().replace("_", "-").split("-")[0], DEFAULT_LANGUAGE)
+
+
+def load_nltk():
+    # nltk is imported lazily and pointed at the bundled data directory only:
+    # offline workers must never trigger a download.
+    import nltk
+    with _nltk_lock:
+        if NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(language):
+    load_nltk()
+    from nltk.corpus import stopwords
+    try:
+        return frozenset(stopwords.words(language))
+    except (LookupError, OSError) as e:
+        print(f"Warning: NLTK stopwords for '{language}' not available in {NLTK_DATA_DIR}: {e}")
+        return frozenset()
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(language):
+    nltk = load_nltk()
+    from nltk.tokenize import word_tokenize
+    for resource in (f"tokenizers/punkt_tab/{language}/", f"tokenizers/punkt/{language}.pickle"):
+        try:
+            nltk.data.find(resource)
+            return lambda text: word_tokenize(text, language=language)
+        except LookupError:
+            continue
+    if language != DEFAULT_LANGUAGE:
+        return get_tokenizer(DEFAULT_LANGUAGE)
+    print(f"Warning: NLTK punkt tokenizer not available in {NLTK_DATA_DIR}, using regex tokenizer")
+    return FALLBACK_TOKEN_RE.findall
+
+
+def tokenize(text, lang=None):
+    language = language_from_lang(lang)
+    stop_words = get_stopwords(language)
+    try:
+        words = get_tokenizer(language)(text.lower())
+    except Exception as e:
+        print(f"Error tokenizing text: {e}")
+        words = FALLBACK_TOKEN_RE.findall(text.lower())
+    return [word for word in words if word.isalpha() and word not in stop_words]
+
+
+def extract_text_features(text, lang=None, n=2):
+    """Keyword and n-gram counts from a single tokenization pass."""
+    words = tokenize(text, lang)
+    keywords = Counter(words)
+    phrases = Counter(" ".join(gram) for gram in zip(*(words[i:] for i in range(n))))
+    return keywords, phrases
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import time
+
+SEO_CACHE_DIR = os.getenv("SEO_CACHE_DIR", "seo_cache")
+SEO_CACHE_TTL = int(os.getenv("SEO_CACHE_TTL", 7 * 24 * 3600))
+SEO_CACHE_MAX_ENTRIES = int(os.getenv("SEO_CACHE_MAX_ENTRIES", 5000))
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class SEOPageCache:
+    def __init__(self, cache_dir=SEO_CACHE_DIR, ttl=SEO_CACHE_TTL, max_entries=SEO_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_path(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        path = self.entry_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry.get("url") != url or time.time() - entry.get("stored_at", 0) > self.ttl:
+            self.delete(path)
+            return None
+        # The file mtime doubles as the last-access time for LRU eviction.
+        os.utime(path)
+        return entry
+
+    def put(self, url, report, internal_links, body_hash, etag=None, last_modified=None):
+        entry = {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": body_hash,
+            "report": report,
+            "internal_links": internal_links
+        }
+        path = self.entry_path(url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(entry, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing SEO cache entry for {url}: {e}")
+            self.delete(tmp_path)
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if not item.name.endswith(".json"):
+                    continue
+                mtime = item.stat().st_mtime
+                if now - mtime > self.ttl:
+                    self.delete(item.path)
+                else:
+                    entries.append((mtime, item.path))
+        overflow = len(entries) - self.max_entries
+        if overflow > 0:
+            entries.sort()
+            for _, path in entries[:overflow]:
+                self.delete(path)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def delete(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,78 @@
+import os
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.seo import SEOCrawledPage
+
+SEO_WRITE_CHUNK_SIZE = int(os.getenv("SEO_WRITE_CHUNK_SIZE", 25))
+SEO_WRITE_FLUSH_INTERVAL = float(os.getenv("SEO_WRITE_FLUSH_INTERVAL", 2))
+
+
+def crawled_page_row(seo_report_id, page_data):
+    images_missing_alt = page_data.get("images_missing_alt", [])
+    return {
+        "seo_report_id": seo_report_id,
+        "url": page_data.get("url", ""),
+        "title": page_data.get("title", ""),
+        "meta_description": page_data.get("meta_description", ""),
+        "load_time_ms": page_data.get("load_time_ms"),
+        "html_size_kb": page_data.get("html_size_kb"),
+        "canonical": page_data.get("canonical", ""),
+        "robots": page_data.get("robots", ""),
+        "favicon": page_data.get("favicon", ""),
+        "internal_links_count": page_data.get("internal_links", 0),
+        "external_links_count": page_data.get("external_links", 0),
+        "seo_score": page_data.get("seo_score", 0),
+        "grade": page_data.get("grade", ""),
+        "good_practices": page_data.get("good_practices", []),
+        "bad_practices": page_data.get("bad_practices", []),
+        "header_tags": {
+            k: v for k, v in page_data.items()
+            if k.startswith("h") and k.endswith("_tags")
+        },
+        "images_missing_alt": images_missing_alt if isinstance(images_missing_alt, list) else [],
+        "lang": page_data.get("lang"),
+        "content_hash": page_data.get("content_hash"),
+        "etag": page_data.get("etag"),
+        "last_modified": page_data.get("last_modified"),
+        "internal_urls": page_data.get("internal_urls", []),
+        "change_status": page_data.get("change_status"),
+        "changes": page_data.get("changes")
+    }
+
+
+class SEOPageWriter:
+    """Buffers crawled pages and writes them with one multi-row INSERT per chunk.
+
+    Each chunk is committed on its own, so the pages crawled before a crash
+    are kept. The writer shares the caller's session: it must only be used
+    from one thread at a time.
+    """
+
+    def __init__(self, db: Session, seo_report_id, chunk_size=SEO_WRITE_CHUNK_SIZE, flush_interval=SEO_WRITE_FLUSH_INTERVAL):
+        self.db = db
+        self.seo_report_id = seo_report_id
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.rows = []
+        self.written = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, page_data):
+        self.rows.append(crawled_page_row(self.seo_report_id, page_data))
+        if len(self.rows) >= self.chunk_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        try:
+            self.db.execute(insert(SEOCrawledPage), rows)
+            self.db.commit()
+            self.written += len(rows)
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error writing {len(rows)} SEO crawled pages: {e}")
+            raise
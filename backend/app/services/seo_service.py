@@ -1,77 +1,45 @@
 import http
 import os
-import time
 from datetime import datetime
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
 from collections import Counter
 import requests
-import nltk
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.util import ngrams
 from sqlalchemy.orm import Session
 from app.models.report import Report
 from app.models.seo import SEOCrawledPage, SEOReportDetails
+from app.services.browser_pool import browser_pool
+from app.services.notifier import Notifier
+from app.services.seo_crawler import SEOCrawler
+from app.services.seo_extractor import extract_signals
+from app.services.seo_nlp import extract_text_features
+from app.services.seo_page_cache import SEOPageCache
+from app.services.seo_page_writer import SEOPageWriter
+from app.services.url_discovery import URLDiscovery
 
-def initialize_nltk():
-    try:
-        try:
-            nltk.data.find('tokenizers/punkt_tab')
-        except LookupError:
-            try:
-                nltk.download('punkt_tab', quiet=True)
-            except:
-                nltk.download('punkt', quiet=True)
-    
-    except Exception as e:
-        print(f"Warning: NLTK punkt tokenizer setup failed: {e}")
-        
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords', quiet=True)
-initialize_nltk()
+notifier = Notifier()
 
 MAX_PAGES = 100
-
-def extract_keywords_from_text(text):
-    try:
-        words = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        words = [word for word in words if word.isalpha() and word not in stop_words]
-        return Counter(words)
-    except Exception as e:
-        print(f"Error extracting keywords: {e}")
-        words = text.lower().split()
-        words = [word.strip('.,!?;:"()[]{}') for word in words if word.isalpha()]
-        return Counter(words)
-
-def extract_phrases_from_text(text, n=2):
-    try:
-        words = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        words = [word for word in words if word.isalpha() and word not in stop_words]
-        n_grams = ngrams(words, n)
-        return {" ".join(gram): count for gram, count in Counter(n_grams).items()}
-    except Exception as e:
-        print(f"Error extracting phrases: {e}")
-        words = text.lower().split()
-        words = [word.strip('.,!?;:"()[]{}') for word in words if word.isalpha()]
-        if len(words) >= n:
-            phrases = []
-            for i in range(len(words) - n + 1):
-                phrase = " ".join(words[i:i+n])
-                phrases.append(phrase)
-            return Counter(phrases)
-        return {}
+SEO_CRAWL_CONCURRENCY = int(os.getenv("SEO_CRAWL_CONCURRENCY", 10))
+SEO_CRAWL_PER_HOST = int(os.getenv("SEO_CRAWL_PER_HOST", 4))
+SEO_REQUEST_TIMEOUT = int(os.getenv("SEO_REQUEST_TIMEOUT", 10))
+SEO_USE_SITEMAPS = os.getenv("SEO_USE_SITEMAPS", "true").lower() == "true"
+SEO_DIFF_FIELDS = (
+    'title', 'meta_description', 'canonical', 'robots', 'favicon', 'lang',
+    'seo_score', 'grade', 'internal_links', 'external_links',
+    'images_missing_alt', 'good_practices', 'bad_practices'
+)
+
+def extract_keywords_from_text(text, lang=None):
+    keywords, _ = extract_text_features(text, lang)
+    return keywords
+
+def extract_phrases_from_text(text, n=2, lang=None):
+    _, phrases = extract_text_features(text, lang, n=n)
+    return phrases
 
 def get_domain(url):
     return urlparse(str(url)).netloc
@@ -80,81 +48,42 @@ def is_internal_link(link, base_url):
     parsed_link = urlparse(link)
     return parsed_link.netloc == '' or parsed_link.netloc == get_domain(base_url)
 
-def fetch_and_parse(url, pages_404=None):
-    if not url.startswith(('http://', 'https://')):
-        print(f"Skipping non-HTTP URL: {url}")
-        return None, None, None
-    try:
-        start_time = time.time()
-        response = requests.get(url, timeout=10)
-        if response.status_code == 404:
-            print(f"404 Not Found for {url}")
-            if pages_404 is not None:
-                pages_404.append(url)
-            return "404", None, None
-        response.raise_for_status()
-        load_time = round((time.time() - start_time) * 1000)
-        soup = BeautifulSoup(response.text, "lxml")
-        return soup, response, load_time
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return None, None, None
-
 def capture_screenshot(url):
-    driver = None
     try:
-        chrome_path = "C:\\Users\\Rihab-Cherni\\ZAP\\webdriver\\windows\\64\\chromedriver.exe"
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-
-        service = Service(chrome_path)
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.get(url)
-        
-        WebDriverWait(driver, 10).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )        
-        screenshot_dir = os.path.join("static", "screenshots")
-        os.makedirs(screenshot_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        domain = get_domain(url).replace('.', '_')
-        filename = f"screenshot_{domain}_{timestamp}.png"
-        filepath = os.path.join(screenshot_dir, filename)
-        
-        # Take screenshot
-        driver.save_screenshot(filepath)
-        print(f"Screenshot saved: {filepath}")
-        return filepath
-        
+        with browser_pool.tab() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 10).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            screenshot_dir = os.path.join("static", "screenshots")
+            os.makedirs(screenshot_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+            domain = get_domain(url).replace('.', '_')
+            filename = f"screenshot_{domain}_{timestamp}.png"
+            filepath = os.path.join(screenshot_dir, filename)
+
+            # Take screenshot
+            driver.save_screenshot(filepath)
+            print(f"Screenshot saved: {filepath}")
+            return filepath
+
     except Exception as e:
         print(f"Error capturing screenshot for {url}: {e}")
         return None
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception as e:
-                print(f"Error closing driver: {e}")
-
-def analyze_page(url, pages_404=None):
-    soup, response, load_time = fetch_and_parse(url, pages_404=pages_404)
-
-    if soup == "404":
-        return {"url": url, "error": "404 Not Found"}, []
-
-    if not soup:
-        return {"url": url, "error": "Failed to fetch page"}, []
-    
+
+def analyze_html(url, html, html_size, load_time):
+    return build_page_report(url, extract_signals(html), html_size, load_time)
+
+def build_page_report(url, signals, html_size, load_time):
     report = {'url': url}
     score = 100
     good = []
     bad = []
 
     report['load_time_ms'] = load_time
-    report['html_size_kb'] = round(len(response.content) / 1024, 2)
+    report['html_size_kb'] = round(html_size / 1024, 2)
 
-    title_tag = soup.title.string.strip() if soup.title else None
+    title_tag = signals['title']
     if title_tag:
         report['title'] = title_tag
         good.append("✅ Title tag is present")
@@ -163,9 +92,8 @@ def analyze_page(url, pages_404=None):
         bad.append("❌ Missing <title> tag")
         score -= 10
 
-    meta_desc = soup.find("meta", attrs={"name": "description"})
-    if meta_desc and 'content' in meta_desc.attrs:
-        report['meta_description'] = meta_desc['content'].strip()
+    if signals['meta_description'] is not None:
+        report['meta_description'] = signals['meta_description']
         good.append("✅ Meta description is set")
     else:
         report['meta_description'] = "❌ Missing meta description"
@@ -173,7 +101,7 @@ def analyze_page(url, pages_404=None):
         score -= 10
 
     for i in range(1, 7):
-        h_tags = [h.get_text(strip=True) for h in soup.find_all(f"h{i}")]
+        h_tags = signals['headings'][i]
         count = len(h_tags)
         report[f"h{i}_tags"] = h_tags if count > 0 else [f"❌ No <h{i}> tags found"]
         if count > 0:
@@ -182,17 +110,15 @@ def analyze_page(url, pages_404=None):
             bad.append(f"❌ No <h{i}> tag found")
             score -= 5
 
-    canonical = soup.find("link", rel="canonical")
-    if canonical:
-        report['canonical'] = canonical['href']
+    if signals['canonical'] is not None:
+        report['canonical'] = signals['canonical']
         good.append("✅ Canonical tag is defined")
     else:
         report['canonical'] = "❌ Missing canonical tag"
         bad.append("❌ No canonical tag found")
         score -= 5
 
-    images = soup.find_all("img")
-    missing_alt = [img.get('src') for img in images if not img.get('alt')]
+    missing_alt = signals['images_missing_alt']
     if not missing_alt:
         report['images_missing_alt'] = "✅ All images have alt attributes"
         good.append("✅ All images have alt tags")
@@ -201,25 +127,25 @@ def analyze_page(url, pages_404=None):
         bad.append(f"❌ {len(missing_alt)} images missing alt attributes")
         score -= 5
 
-    robots = soup.find("meta", attrs={"name": "robots"})
-    if robots:
-        report['robots'] = robots['content']
+    if signals['robots'] is not None:
+        report['robots'] = signals['robots']
         good.append("✅ Robots meta tag is present")
     else:
         report['robots'] = "⚠️ No robots meta tag"
         bad.append("⚠️ No robots meta tag")
         score -= 2
 
-    favicon = soup.find("link", rel=lambda x: x and 'icon' in x)
-    if favicon:
-        report['favicon'] = favicon['href']
+    if signals['favicon'] is not None:
+        report['favicon'] = signals['favicon']
         good.append("✅ Favicon is present")
     else:
         report['favicon'] = "❌ Missing favicon"
         bad.append("❌ No favicon")
         score -= 3
 
-    links = [a['href'] for a in soup.find_all("a", href=True)]
+    report['lang'] = signals['lang']
+
+    links = signals['links']
     valid_links = [link for link in links if link.startswith(('http://', 'https://', '/'))]
 
     internal_links = [urljoin(url, link) for link in valid_links if is_internal_link(link, url)]
@@ -376,103 +302,212 @@ def get_server_info(url):
             "cms": ""
         }
 
-def run_seo_analysis(report_id: int, url: str, db: Session):
+def page_report_from_row(page: SEOCrawledPage):
+    report = {
+        'url': page.url,
+        'load_time_ms': page.load_time_ms,
+        'html_size_kb': page.html_size_kb,
+        'title': page.title,
+        'meta_description': page.meta_description,
+        'canonical': page.canonical,
+        'images_missing_alt': page.images_missing_alt or "✅ All images have alt attributes",
+        'robots': page.robots,
+        'favicon': page.favicon,
+        'lang': page.lang,
+        'internal_links': page.internal_links_count,
+        'external_links': page.external_links_count,
+        'seo_score': page.seo_score,
+        'grade': page.grade,
+        'good_practices': page.good_practices or [],
+        'bad_practices': page.bad_practices or []
+    }
+    report.update(page.header_tags or {})
+    return report
+
+def load_previous_crawl(db: Session, report_id: int, url: str):
+    previous = (
+        db.query(SEOReportDetails)
+        .join(Report, SEOReportDetails.report_id == Report.id)
+        .filter(
+            Report.url == url,
+            Report.scan_type == "seo",
+            Report.status == "completed",
+            Report.id != report_id
+        )
+        .order_by(Report.id.desc())
+        .first()
+    )
+    if not previous:
+        return None, {}
+
+    baseline = {}
+    pages = db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == previous.id).all()
+    for page in pages:
+        if not page.url or not page.grade:
+            continue
+        baseline[page.url] = {
+            "etag": page.etag,
+            "last_modified": page.last_modified,
+            "content_hash": page.content_hash,
+            "report": page_report_from_row(page),
+            "internal_links": page.internal_urls or []
+        }
+    return previous.report_id, baseline
+
+def diff_page(page, previous):
+    if 'error' in page:
+        page['change_status'] = "error"
+        return page
+    if previous is None:
+        page['change_status'] = "new"
+        return page
+
+    before = previous["report"]
+    changes = {}
+    for field in SEO_DIFF_FIELDS + tuple(f"h{i}_tags" for i in range(1, 7)):
+        if before.get(field) != page.get(field):
+            changes[field] = {"before": before.get(field), "after": page.get(field)}
+    page['change_status'] = "changed" if changes else "unchanged"
+    page['changes'] = changes
+    return page
+
+def seo_page_event(page):
+    return {
+        'url': page.get('url'),
+        'error': page.get('error'),
+        'title': page.get('title'),
+        'seo_score': page.get('seo_score'),
+        'grade': page.get('grade'),
+        'load_time_ms': page.get('load_time_ms'),
+        'bad_practices': page.get('bad_practices', []),
+        'change_status': page.get('change_status')
+    }
+
+def run_seo_analysis(report_id: int, url: str, db: Session, incremental: bool = False):
     try:
         report = db.query(Report).filter(Report.id == report_id).first()
         report.scan_started_at = datetime.now() 
         report.status = "running"
+        report.progression = 0
         db.commit()
 
-        pages_404 = []
-        
-        main_page_report, internal_links = analyze_page(url, pages_404=pages_404)
-        if pages_404:
-            print("404 pages detected:", pages_404)
-        server_info = get_server_info(url)
-        
-        screenshot = capture_screenshot(url)
-        
-        processed_pages = [main_page_report]
-        pages_404 = []
-        all_text = main_page_report.get('title', '') + ' ' + main_page_report.get('meta_description', '')
-        
-        links_to_process = internal_links[:min(20, len(internal_links))]  
-        
-        for link in links_to_process:
-            try:
-                page_report, _ = analyze_page(link, pages_404=pages_404)
-                if page_report:
-                    processed_pages.append(page_report)
-                    all_text += ' ' + page_report.get('title', '') + ' ' + page_report.get('meta_description', '')
-            except Exception as e:
-                print(f"Error analyzing page {link}: {e}")
-                pages_404.append(link)        
-        
-        keywords = extract_keywords_from_text(all_text)
+        # The details row exists from the start so crawled pages can be
+        # written in chunks while the crawl is still running.
+        seo_report = db.query(SEOReportDetails).filter(SEOReportDetails.report_id == report_id).first()
+        if seo_report:
+            db.query(SEOCrawledPage).filter(SEOCrawledPage.seo_report_id == seo_report.id).delete(synchronize_session=False)
+        else:
+            seo_report = SEOReportDetails(report_id=report_id)
+            db.add(seo_report)
+        db.commit()
+        db.refresh(seo_report)
+        page_writer = SEOPageWriter(db, seo_report.id)
+
+        previous_report_id, baseline = load_previous_crawl(db, report_id, url) if incremental else (None, {})
+        if incremental:
+            print(f"Incremental SEO crawl: {len(baseline)} pages from report {previous_report_id}")
+
+        def on_page(page):
+            if incremental:
+                diff_page(page, baseline.get(page['url']))
+            # Progression is committed together with the next chunk of pages.
+            report.progression = max(report.progression or 0, round(crawler.progress() * 100, 2))
+            page_writer.add(page)
+            notifier.send_event({
+                "type": "seo_page",
+                "report_id": report_id,
+                "message": f"SEO: {page.get('url')} analysé",
+                "progress": report.progression / 100,
+                "pages_analyzed": crawler.done,
+                "pages_discovered": len(crawler.seen),
+                "page": seo_page_event(page)
+            }, report.user_id)
+
+        # Server fingerprinting and the screenshot run alongside the crawl.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            server_info_future = executor.submit(get_server_info, url)
+            screenshot_future = executor.submit(capture_screenshot, url)
+
+            page_cache = SEOPageCache()
+            crawler = SEOCrawler(
+                analyze_html,
+                max_pages=MAX_PAGES,
+                concurrency=SEO_CRAWL_CONCURRENCY,
+                per_host_limit=SEO_CRAWL_PER_HOST,
+                timeout=SEO_REQUEST_TIMEOUT,
+                cache=page_cache,
+                on_page=on_page,
+                baseline=baseline
+            )
+            seeds = []
+            if SEO_USE_SITEMAPS:
+                seeds = list(URLDiscovery(url, max_urls=MAX_PAGES, timeout=SEO_REQUEST_TIMEOUT).sitemap_urls())
+                print(f"{len(seeds)} URLs found in robots.txt / sitemaps for {url}")
+            processed_pages, pages_404 = crawler.run(url, seeds)
+            page_writer.flush()
+            if pages_404:
+                print("404 pages detected:", pages_404)
+
+            server_info = server_info_future.result()
+            screenshot = screenshot_future.result()
+
+        all_text = ' '.join(
+            page.get('title', '') + ' ' + page.get('meta_description', '')
+            for page in processed_pages
+        )
+
+        langs = Counter(page.get('lang') for page in processed_pages if page.get('lang'))
+        site_lang = langs.most_common(1)[0][0] if langs else None
+        keywords, phrases = extract_text_features(all_text, site_lang)
         keywords_json = {k: v for k, v in keywords.most_common(20)} 
         
-        phrases = extract_phrases_from_text(all_text)
         phrases_json = {k: v for k, v in sorted(phrases.items(), key=lambda x: x[1], reverse=True)[:20]}        
         
         total_score = sum(page.get('seo_score', 0) for page in processed_pages)
         average_score = total_score / len(processed_pages) if processed_pages else 0
         
-        seo_report = SEOReportDetails(
-            report_id=report_id,
-            average_score=average_score,
-            total_pages_analyzed=len(processed_pages),
-            screenshot=screenshot,
-            server_ip=server_info.get("ip", ""),
-            server_os=server_info.get("os", ""),
-            server_software=server_info.get("server", ""),
-            server_backend=server_info.get("backend", []),
-            server_frontend=server_info.get("frontend", []),
-            server_cms=server_info.get("cms", ""),
-            keywords=keywords_json,
-            phrases=phrases_json,
-            pages_404=pages_404
-        )
-        
-        db.add(seo_report)
-        db.commit()
-        db.refresh(seo_report)
-        
-        for page_data in processed_pages:
-            crawled_page = SEOCrawledPage(
-                seo_report_id=seo_report.id,
-                url=page_data.get("url", ""),
-                title=page_data.get("title", ""),
-                meta_description=page_data.get("meta_description", ""),
-                load_time_ms=page_data.get("load_time_ms"),
-                html_size_kb=page_data.get("html_size_kb"),
-                canonical=page_data.get("canonical", ""),
-                robots=page_data.get("robots", ""),
-                favicon=page_data.get("favicon", ""),
-                internal_links_count=page_data.get("internal_links", 0),
-                external_links_count=page_data.get("external_links", 0),
-                seo_score=page_data.get("seo_score", 0),
-                grade=page_data.get("grade", ""),
-                good_practices=page_data.get("good_practices", []),
-                bad_practices=page_data.get("bad_practices", []),
-                header_tags={
-                    k: v for k, v in page_data.items() 
-                    if k.startswith("h") and k.endswith("_tags")
-                },
-                images_missing_alt=(
-                    page_data.get("images_missing_alt", []) 
-                    if isinstance(page_data.get("images_missing_alt"), list) 
-                    else []
-                )
-            )
-            db.add(crawled_page)        
+        seo_report.average_score = average_score
+        seo_report.total_pages_analyzed = len(processed_pages)
+        seo_report.screenshot = screenshot
+        seo_report.server_ip = server_info.get("ip", "")
+        seo_report.server_os = server_info.get("os", "")
+        seo_report.server_software = server_info.get("server", "")
+        seo_report.server_backend = server_info.get("backend", [])
+        seo_report.server_frontend = server_info.get("frontend", [])
+        seo_report.server_cms = server_info.get("cms", "")
+        seo_report.keywords = keywords_json
+        seo_report.phrases = phrases_json
+        seo_report.pages_404 = pages_404
+        seo_report.cache_hits = crawler.hits
+        seo_report.cache_misses = crawler.misses
+        seo_report.incremental = incremental
+        seo_report.previous_report_id = previous_report_id
+        seo_report.removed_pages = sorted(set(baseline) - {page.get('url') for page in processed_pages})
         
         report.scan_finished_at = datetime.now()
         report.status = "completed"
+        report.progression = 100
         db.commit()
+        notifier.send_event({
+            "type": "seo_completed",
+            "report_id": report_id,
+            "message": f"SEO: analyse terminée pour {url}",
+            "progress": 1.0,
+            "pages_analyzed": len(processed_pages),
+            "average_score": average_score
+        }, report.user_id)
+        return True
         
     except Exception as e:
+        db.rollback()
         report = db.query(Report).filter(Report.id == report_id).first()
         report.status = "failed"
         report.error_message = str(e)[:255]  
+        # A finished crawl always has its aggregates, even a failed one.
+        seo_report = db.query(SEOReportDetails).filter(SEOReportDetails.report_id == report_id).first()
+        if seo_report and seo_report.average_score is None:
+            seo_report.average_score = 0
+            seo_report.total_pages_analyzed = 0
         db.commit()
-        print(f"Error in SEO analysis: {e}")
\ No newline at end of file
+        print(f"Error in SEO analysis: {e}")
+        return False
\ No newline at end of file
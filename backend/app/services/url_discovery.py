@@ -0,0 +1,141 @@
+import gzip
+import io
+import os
+from collections import deque
+from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from lxml import etree
+
+from app.services.seo_extractor import extract_signals
+
+URL_DISCOVERY_MAX_URLS = int(os.getenv("URL_DISCOVERY_MAX_URLS", 500))
+URL_DISCOVERY_MAX_SITEMAPS = int(os.getenv("URL_DISCOVERY_MAX_SITEMAPS", 50))
+URL_DISCOVERY_TIMEOUT = int(os.getenv("URL_DISCOVERY_TIMEOUT", 10))
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url, keep_query=True):
+    parsed = urlparse(str(url).strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    netloc = host
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parsed.port}"
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+    path = parsed.path or "/"
+    return urlunparse((scheme, netloc, path, parsed.params, parsed.query if keep_query else "", ""))
+
+
+class URLDiscovery:
+    """Same-host URL discovery from robots.txt, sitemaps and HTML links.
+
+    Every generator shares one set of normalized URLs, so a URL is yielded
+    (and fetched) at most once per instance.
+    """
+
+    def __init__(self, base_url, keep_query=True, max_urls=URL_DISCOVERY_MAX_URLS,
+                 max_sitemaps=URL_DISCOVERY_MAX_SITEMAPS, timeout=URL_DISCOVERY_TIMEOUT, session=None):
+        self.base_url = normalize_url(base_url, keep_query)
+        self.host = urlparse(self.base_url).netloc
+        self.keep_query = keep_query
+        self.max_urls = max_urls
+        self.max_sitemaps = max_sitemaps
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.seen = set()
+
+    def accept(self, url):
+        if not url:
+            return None
+        url = normalize_url(url, self.keep_query)
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != self.host:
+            return None
+        if url in self.seen or len(self.seen) >= self.max_urls:
+            return None
+        self.seen.add(url)
+        return url
+
+    def fetch(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                return None
+            return response
+        except requests.RequestException as e:
+            print(f"❌ Erreur lors de la récupération de {url} : {e}")
+            return None
+
+    def robots_sitemaps(self):
+        robots_url = urljoin(self.base_url, "/robots.txt")
+        response = self.fetch(robots_url)
+        sitemaps = []
+        if response is not None:
+            parser = RobotFileParser(robots_url)
+            parser.parse(response.text.splitlines())
+            sitemaps = parser.site_maps() or []
+        return sitemaps or [urljoin(self.base_url, "/sitemap.xml")]
+
+    @staticmethod
+    def parse_sitemap(content):
+        """Yield ("sitemap" | "url", loc) pairs from a urlset or sitemapindex document."""
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        context = etree.iterparse(
+            io.BytesIO(content), events=("end",), resolve_entities=False, no_network=True, recover=True
+        )
+        for _, element in context:
+            if not isinstance(element.tag, str) or etree.QName(element).localname != "loc":
+                continue
+            parent = element.getparent()
+            kind = etree.QName(parent).localname if parent is not None else "url"
+            if element.text:
+                yield ("sitemap" if kind == "sitemap" else "url"), element.text.strip()
+            element.clear()
+
+    def sitemap_urls(self):
+        pending = deque(self.robots_sitemaps())
+        visited_sitemaps = set()
+        while pending and len(visited_sitemaps) < self.max_sitemaps and len(self.seen) < self.max_urls:
+            sitemap_url = pending.popleft()
+            if sitemap_url in visited_sitemaps:
+                continue
+            visited_sitemaps.add(sitemap_url)
+            response = self.fetch(sitemap_url)
+            if response is None:
+                continue
+            try:
+                for kind, loc in self.parse_sitemap(response.content):
+                    if kind == "sitemap":
+                        pending.append(urljoin(sitemap_url, loc))
+                        continue
+                    url = self.accept(loc)
+                    if url:
+                        yield url
+            except (etree.XMLSyntaxError, OSError, EOFError) as e:
+                print(f"❌ Sitemap invalide {sitemap_url} : {e}")
+
+    def crawl(self, max_depth=2, use_sitemaps=True):
+        """Breadth-first crawl of HTML links, seeded with the base URL and the sitemaps."""
+        queue = deque()
+        start = self.accept(self.base_url)
+        if start:
+            queue.append((start, 0))
+        if use_sitemaps:
+            queue.extend((url, 0) for url in self.sitemap_urls())
+
+        while queue:
+            url, depth = queue.popleft()
+            yield url
+            if depth >= max_depth:
+                continue
+            response = self.fetch(url)
+            if response is None or "html" not in response.headers.get("Content-Type", "html"):
+                continue
+            for href in extract_signals(response.text)["links"]:
+                link = self.accept(urljoin(url, href))
+                if link:
+                    queue.append((link, depth + 1))
@@ -0,0 +1,62 @@
+import json
+import asyncio
+import aio_pika
+from app.configuration.rabbitmq import NOTIFICATION_EXCHANGE, rabbitmq_url, user_routing_key
+
+
+class NotificationSubscriber:
+    """websocket_server side of NOTIFICATION_EXCHANGE.
+
+    Each replica owns a private, auto-deleted queue and binds to it the
+    routing key of every user it currently holds a connection for, so the
+    broker routes a user's notifications only to the replicas serving that
+    user. deliver(user_id, payloads) is awaited for every message received.
+    """
+
+    def __init__(self, deliver, exchange=NOTIFICATION_EXCHANGE):
+        self.deliver = deliver
+        self.exchange_name = exchange
+        self.connection = None
+        self.exchange = None
+        self.queue = None
+        self.bound_users = set()
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        # Robust connection: the queue, its bindings and the consumer are restored after a reconnect.
+        self.connection = await aio_pika.connect_robust(rabbitmq_url(), heartbeat=600)
+        channel = await self.connection.channel()
+        await channel.set_qos(prefetch_count=100)
+        self.exchange = await channel.declare_exchange(self.exchange_name, aio_pika.ExchangeType.DIRECT, durable=True)
+        self.queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await self.queue.consume(self.on_message)
+        print(f"✅ Abonné à l'exchange {self.exchange_name} (file {self.queue.name})")
+
+    async def on_message(self, message):
+        async with message.process(ignore_processed=True):
+            try:
+                data = json.loads(message.body)
+                await self.deliver(int(data["user_id"]), data.get("payloads", []))
+            except Exception as e:
+                print(f"❌ Notification invalide reçue de RabbitMQ: {e}")
+
+    async def subscribe(self, user_id):
+        async with self.lock:
+            if self.queue is None or user_id in self.bound_users:
+                return
+            await self.queue.bind(self.exchange, routing_key=user_routing_key(user_id))
+            self.bound_users.add(user_id)
+
+    async def unsubscribe(self, user_id):
+        async with self.lock:
+            if self.queue is None or user_id not in self.bound_users:
+                return
+            self.bound_users.discard(user_id)
+            await self.queue.unbind(self.exchange, routing_key=user_routing_key(user_id))
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+            self.queue = None
+            self.bound_users = set()
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from urllib.parse import quote
+import pika
+from websockets.sync.client import connect
+from dotenv import load_dotenv
+from app.configuration.rabbitmq import NOTIFICATION_EXCHANGE, rabbitmq_url, user_routing_key
+
+load_dotenv()
+
+# "rabbitmq": through NOTIFICATION_EXCHANGE, to every websocket_server replica.
+# "websocket": straight to a single websocket_server's /ws/publish (no broker needed).
+NOTIFICATION_TRANSPORT = os.getenv("NOTIFICATION_TRANSPORT", "rabbitmq").lower()
+WS_PUBLISH_URL = os.getenv("WS_PUBLISH_URL", "ws://localhost:8001/ws/publish")
+# Shared secret required by websocket_server's /ws/publish (same value on both sides).
+WS_PUBLISH_TOKEN = os.getenv("WS_PUBLISH_TOKEN", "")
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 10000))
+WS_BATCH_SIZE = int(os.getenv("WS_BATCH_SIZE", 200))
+WS_RECONNECT_DELAY = float(os.getenv("WS_RECONNECT_DELAY", 2))
+# Idle time after which the sender services its connection (RabbitMQ heartbeats).
+WS_KEEPALIVE_INTERVAL = float(os.getenv("WS_KEEPALIVE_INTERVAL", 30))
+
+
+class WebSocketTransport:
+    """One frame per batch to websocket_server's /ws/publish."""
+
+    def __init__(self, url=WS_PUBLISH_URL, token=WS_PUBLISH_TOKEN):
+        if not token:
+            print("⚠️ WS_PUBLISH_TOKEN non défini: websocket_server refusera les notifications")
+        self.url = f"{url}?token={quote(token, safe='')}" if token else url
+        self.connection = None
+
+    def send(self, batch):
+        frame = json.dumps({"messages": [{"user_id": user_id, "payload": payload} for user_id, payload in batch]}, default=str)
+        if self.connection is None:
+            self.connection = connect(self.url, open_timeout=5)
+        self.connection.send(frame)
+
+    def keepalive(self):
+        pass
+
+    def reset(self):
+        # In a forked child: the parent's socket must be dropped, not closed.
+        self.connection = None
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+
+class RabbitMQTransport:
+    """One message per user and batch on NOTIFICATION_EXCHANGE, routed by user.
+
+    Only the websocket_server replicas holding a connection of that user have
+    its routing key bound, so the others never see the message; nobody bound
+    means nobody is watching and the broker drops it.
+    """
+
+    def __init__(self, exchange=NOTIFICATION_EXCHANGE):
+        self.exchange = exchange
+        self.connection = None
+        self.channel = None
+
+    def open(self):
+        parameters = pika.URLParameters(rabbitmq_url())
+        parameters.heartbeat = 600
+        parameters.socket_timeout = 5
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+        self.channel.exchange_declare(exchange=self.exchange, exchange_type="direct", durable=True)
+
+    def send(self, batch):
+        if self.connection is None or self.connection.is_closed:
+            self.open()
+        by_user = {}
+        for user_id, payload in batch:
+            by_user.setdefault(user_id, []).append(payload)
+        for user_id, payloads in by_user.items():
+            self.channel.basic_publish(
+                exchange=self.exchange,
+                routing_key=user_routing_key(user_id),
+                body=json.dumps({"user_id": user_id, "payloads": payloads}, default=str).encode("utf-8"),
+                properties=pika.BasicProperties(content_type="application/json")
+            )
+
+    def keepalive(self):
+        # BlockingConnection only answers heartbeats while it does I/O.
+        if self.connection is not None and self.connection.is_open:
+            self.connection.process_data_events(0)
+
+    def reset(self):
+        self.connection = None
+        self.channel = None
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.reset()
+
+
+def make_transport(name=NOTIFICATION_TRANSPORT):
+    if name == "websocket":
+        return WebSocketTransport()
+    if name != "rabbitmq":
+        print(f"⚠️ NOTIFICATION_TRANSPORT inconnu: {name}, utilisation de rabbitmq")
+    return RabbitMQTransport()
+
+
+class WebSocketPublisher:
+    """Pushes live messages to websocket_server over one long-lived connection.
+
+    publish() only puts the message on a bounded queue and never waits on the
+    network: a background thread sends whatever is queued in batches through
+    the transport (see NOTIFICATION_TRANSPORT), reconnecting when needed. When the queue is full (server down for
+    a long time), new messages are dropped rather than blocking the scan.
+    """
+
+    def __init__(self, transport=None, queue_size=WS_QUEUE_SIZE, batch_size=WS_BATCH_SIZE, reconnect_delay=WS_RECONNECT_DELAY):
+        self.transport = transport or make_transport()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.reconnect_delay = reconnect_delay
+        self.thread = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        self.dropped = 0
+
+    def ensure_started(self):
+        # Started on first use, and again in forked children: threads do not survive a fork.
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.start_lock:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+                self.transport.reset()
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="ws-publisher", daemon=True)
+            self.thread.start()
+
+    def publish(self, user_id, payload):
+        self.ensure_started()
+        try:
+            self.queue.put_nowait((user_id, payload))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                print(f"⚠️ File WebSocket pleine: {self.dropped} message(s) abandonné(s)")
+
+    def next_batch(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=WS_KEEPALIVE_INTERVAL)]
+                break
+            except queue.Empty:
+                try:
+                    self.transport.keepalive()
+                except Exception:
+                    self.transport.close()
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                self.send(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def send(self, batch):
+        for attempt in range(2):
+            try:
+                self.transport.send(batch)
+                return
+            except Exception as e:
+                self.transport.close()
+                if attempt == 0:
+                    continue
+                print(f"Notification transport error, {len(batch)} message(s) not delivered: {e}")
+                time.sleep(self.reconnect_delay)
+
+    def flush(self, timeout=2):
+        """Wait (bounded) for the queued messages to be sent, e.g. before a script exits."""
+        if self.thread is None or self.pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+ws_publisher = WebSocketPublisher()
+atexit.register(ws_publisher.flush)
@@ -0,0 +1,103 @@
+"""Scanner path lookups: os.walk of the working tree vs the scan_paths registry.
+
+Usage (from the backend directory):
+    python -m benchmarks.scan_paths_benchmark [--sizes 0 1000 5000] [--repeat N]
+
+A copy of the backend layout is built in a temporary directory and its
+Results folder is filled with more and more scan folders. For each size,
+the lookups one scanner construction does (vulnerabilities_model, Reports,
+Results and tools, as for XSStrike) are timed both ways.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.configuration.scan_paths import ScanPaths
+
+SCANNER_FOLDERS = ["vulnerabilities_model", "Reports", "Results", "tools"]
+FILES_PER_SCAN = ["nmap.xml", "nuclei.jsonl", "XSStrike.txt"]
+
+
+def legacy_get_folder_path(folder):
+    # Scan.get_folder_path before the registry.
+    current_path = None
+    for root, dirs, files in os.walk(os.path.abspath('.')):
+        if folder in dirs:
+            current_path = os.path.join(root, folder)
+            break
+    return Path(current_path) if current_path else None
+
+
+def build_tree(base, with_tools):
+    pentesting = base / "app" / "services" / "pentesting_tests"
+    for folder in ("Reports", "Results", "vulnerabilities_model"):
+        (pentesting / folder).mkdir(parents=True, exist_ok=True)
+    with open(pentesting / "vulnerabilities_model" / "nmap.json", "w", encoding="utf-8") as file:
+        json.dump({}, file)
+    if with_tools:
+        (base / "tools" / "XSStrike").mkdir(parents=True, exist_ok=True)
+    return pentesting
+
+
+def grow_results(results, count):
+    existing = len(os.listdir(results))
+    for i in range(existing, count):
+        scan_dir = results / f"target.example-{1700000000 + i}"
+        scan_dir.mkdir()
+        for name in FILES_PER_SCAN:
+            (scan_dir / name).touch()
+
+
+def construct(get_folder_path):
+    for folder in SCANNER_FOLDERS:
+        get_folder_path(folder)
+    with open(get_folder_path("vulnerabilities_model") / "nmap.json", "r") as file:
+        json.load(file)
+
+
+def time_construction(get_folder_path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        construct(get_folder_path)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 500, 2000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--with-tools", action="store_true", help="create tools/ (missing from a fresh checkout)")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "backend"
+        pentesting = build_tree(base, args.with_tools)
+        registry = ScanPaths()
+        registry.configure(
+            Reports=pentesting / "Reports",
+            Results=pentesting / "Results",
+            vulnerabilities_model=pentesting / "vulnerabilities_model",
+            tools=base / "tools"
+        )
+        os.chdir(base)
+        try:
+            print(f"{'scans in Results':>16} | {'os.walk (ms)':>12} | {'registry (ms)':>13}")
+            for size in sorted(args.sizes):
+                grow_results(pentesting / "Results", size)
+                legacy = time_construction(legacy_get_folder_path, args.repeat)
+                indexed = time_construction(registry.get, args.repeat)
+                print(f"{size:>16} | {legacy * 1000:>12.3f} | {indexed * 1000:>13.3f}")
+        finally:
+            os.chdir(cwd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
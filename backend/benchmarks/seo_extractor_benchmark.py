@@ -0,0 +1,72 @@
+"""Compare the single-pass SEO extractor against the BeautifulSoup path.
+
+Usage (from the backend directory):
+    python -m benchmarks.seo_extractor_benchmark [corpus_dir_or_file ...] [--repeat N]
+
+Without arguments the saved report pages of the repository are used as corpus.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bs4 import BeautifulSoup
+from app.services.seo_extractor import extract_signals_bs4, extract_signals_stream
+
+DEFAULT_CORPUS = [
+    os.path.join(os.path.dirname(__file__), "..", "..", "*.html"),
+    os.path.join(os.path.dirname(__file__), "..", "templates", "*.html"),
+]
+
+
+def load_corpus(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, "*.htm*")
+        files.extend(sorted(glob.glob(path)))
+    corpus = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+            corpus.append((file_path, file.read()))
+    return corpus
+
+
+def time_engine(extract, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in corpus:
+            extract(html)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", nargs="*", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("❌ No HTML pages found in the corpus.")
+        return 1
+
+    bs4_extract = lambda html: extract_signals_bs4(BeautifulSoup(html, "lxml"))
+    mismatches = [path for path, html in corpus if bs4_extract(html) != extract_signals_stream(html)]
+    for path in mismatches:
+        print(f"⚠️ Signals differ for {path}")
+
+    total_kb = sum(len(html) for _, html in corpus) / 1024
+    bs4_time = time_engine(bs4_extract, corpus, args.repeat)
+    stream_time = time_engine(extract_signals_stream, corpus, args.repeat)
+    print(f"Corpus: {len(corpus)} pages, {total_kb:.1f} KB, {args.repeat} rounds")
+    print(f"BeautifulSoup : {bs4_time:.3f}s")
+    print(f"Single pass   : {stream_time:.3f}s ({bs4_time / stream_time:.1f}x faster)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
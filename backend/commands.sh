@@ -23,12 +23,18 @@ case "$TOOL" in
   
   nmap)
     echo "[+] Running Nmap scan..."
-    docker exec nmap_container nmap -n -p- --script vuln "$HOSTNAME"  -oX "$RESULTS_DIR" 
+    # No results path: XML on stdout, parsed while nmap runs (nmap_scan.start)
+    docker exec nmap_container nmap -n -p- --script vuln "$HOSTNAME"  -oX "${RESULTS_DIR:--}" 
     ;;
   nuclei)
     echo "[+] Running Nuclei scan..."
-    docker exec nuclei_container nuclei -u "$TARGET_URL" \
-      -json-export "$RESULTS_DIR/nuclei_$(basename $TARGET_URL).json"
+    if [[ -n "$RESULTS_DIR" ]]; then
+      docker exec nuclei_container nuclei -u "$TARGET_URL" \
+        -json-export "$RESULTS_DIR/nuclei_$(basename $TARGET_URL).json"
+    else
+      # One JSON object per finding on stdout, read as they come (nuclei_scan.start)
+      docker exec nuclei_container nuclei -u "$TARGET_URL" -jsonl -silent
+    fi
     ;;
   
   sqlmap)
@@ -24,20 +24,37 @@ from app.api.Route_security_preferences import router as router_preferences_util
 from app.api.Route_parametres_envoi_rapports import router as router_parametres_envoi_rapports
 from app.api.Route_permissions import router as router_permissions
 from app.database.database import Base, engine, get_session
+from app.database.migrations import upgrade_schema
 from contextlib import asynccontextmanager
+from app.configuration.rabbitmq_publisher import publisher
+from app.services.progress_tracker import ProgressListener, progress_tracker
 
 load_dotenv()
+progress_listener = ProgressListener(progress_tracker.store)
 
 class Controller:
     Base.metadata.create_all(engine)
+    upgrade_schema(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🔄 Starting up app...")
     db: Session = next(get_session())
     utils.add_administrator(db)
+    try:
+        await publisher.start()
+    except Exception as e:
+        # The first publish retries the connection.
+        print(f"⚠️ RabbitMQ indisponible au démarrage: {e}")
+    try:
+        await progress_listener.start()
+    except Exception as e:
+        # GET /reports/{id}/progress falls back to Report.progression.
+        print(f"⚠️ Suivi de progression indisponible: {e}")
     yield
     print("🔻 Shutting down app...")
+    await progress_listener.close()
+    await publisher.close()
 
 combined_app = FastAPI(
     title="Vulnerability Scanner & Testing Automation API",
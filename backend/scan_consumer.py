@@ -1,15 +1,20 @@
 import time
-import pika
 import json
-import threading
 import os
+import functools
+import traceback
 from concurrent.futures import ThreadPoolExecutor
 
 from app.services.pentesting_tests.scan_functions.scan_thread import ThreadScan
-from app.database.database import get_session
+from app.services.pentesting_tests.scan_functions.model_store import model_store
+from app.database.database import SessionLocal
+from app.models.report import Report
 from app.configuration.configuration_manager import slack_configurator, jira_configurator, email_configurator
+from app.configuration.rabbitmq import SCAN_QUEUE, LEGACY_SCAN_QUEUE, connect_to_rabbitmq, declare_queue, move_legacy_queue
 
-MAX_WORKERS = 3
+# Scans run inside the pool threads and prefetch equals the pool size:
+# at most MAX_WORKERS scans are in flight, the rest waits in the queue.
+MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", 3))
 executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
 scans_running = {}
 
@@ -20,44 +25,6 @@ except FileNotFoundError:
     print("⚠️  Fichier setting.json non trouvé, utilisation des paramètres par défaut")
     setting = {}
 
-def connect_to_rabbitmq(max_retries=10, delay=5):
-    rabbitmq_host = os.getenv('RABBITMQ_HOST', 'localhost')
-    rabbitmq_user = os.getenv('RABBITMQ_USER', 'user')
-    rabbitmq_pass = os.getenv('RABBITMQ_PASS', 'pass')
-    rabbitmq_port = int(os.getenv('RABBITMQ_PORT', '5672'))
-    
-    print(f"🔍 Tentative de connexion à RabbitMQ: {rabbitmq_host}:{rabbitmq_port}")
-    print(f"   Utilisateur: {rabbitmq_user}")
-    
-    for i in range(max_retries):
-        try:
-            credentials = pika.PlainCredentials(rabbitmq_user, rabbitmq_pass)
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_host, 
-                port=rabbitmq_port, 
-                credentials=credentials,
-                heartbeat=600,
-                blocked_connection_timeout=300,
-                # Add connection timeout
-                socket_timeout=10,
-                connection_attempts=3,
-                retry_delay=2
-            )
-            connection = pika.BlockingConnection(parameters)
-            print(f"✅ Connexion RabbitMQ réussie sur {rabbitmq_host}:{rabbitmq_port}")
-            return connection
-        except pika.exceptions.AMQPConnectionError as e:
-            print(f"❌ Connexion échouée à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}). Tentative {i + 1}/{max_retries}")
-            print(f"   Erreur: {e}")
-            if i < max_retries - 1:
-                time.sleep(delay)
-        except Exception as e:
-            print(f"❌ Erreur inattendue lors de la connexion RabbitMQ: {e}")
-            if i < max_retries - 1:
-                time.sleep(delay)
-    
-    raise Exception(f"⛔ Impossible de se connecter à RabbitMQ ({rabbitmq_host}:{rabbitmq_port}) après {max_retries} tentatives.")
-
 def get_jira_config():
     return {
         "jira_email": getattr(jira_configurator, 'jira_email', None),
@@ -69,49 +36,40 @@ def get_jira_config():
 
 def start_scan(scanner, slack_token, slack_channel_id, email_list, jira_config, db, user_id, scan_request):
     report_id = scanner.report_db_id
-    thread_scan_instance = scanner
-
-    def run_scan():
-        try:
-            thread_scan_instance.run_all_scans(
-                slack_token,
-                slack_channel_id,
-                email_list,
-                jira_config['jira_email'],
-                jira_config['jira_token'],
-                jira_config['jira_domain'],
-                jira_config['jira_board'],
-                jira_config['jira_project_key'],
-                db,
-                user_id,
-                scan_request.get("username"),
-                scan_request.get("password"),
-                scan_request.get("token_auth"),
-                scan_request.get("cookies")
-            )
-            print(f"✅ Scan terminé pour {scanner.url}")
-        except Exception as e:
-            print(f"❌ Erreur lors du scan pour {scanner.url}: {e}")
-        finally:
-            scans_running.pop(report_id, None)
-
-    thread = threading.Thread(target=run_scan)
-    thread.start()
-    scans_running[report_id] = thread_scan_instance
+    scans_running[report_id] = scanner
+    try:
+        scanner.run_all_scans(
+            slack_token,
+            slack_channel_id,
+            email_list,
+            jira_config['jira_email'],
+            jira_config['jira_token'],
+            jira_config['jira_domain'],
+            jira_config['jira_board'],
+            jira_config['jira_project_key'],
+            db,
+            user_id,
+            scan_request.get("username"),
+            scan_request.get("password"),
+            scan_request.get("token_auth"),
+            scan_request.get("cookies")
+        )
+        print(f"✅ Scan terminé pour {scanner.url}")
+    finally:
+        scans_running.pop(report_id, None)
     return report_id
 
 def handle_scan(data):
-    try:
-        print("📩 Traitement du message:", data)
+    print("📩 Traitement du message:", data)
 
-        url = data["url"]
-        scan_tools = data["scan_tools"]
-        user_id = data["user_id"]
-        auth = data.get("auth", {})
-        report_id = data.get("report_id")
-
-        db = next(get_session())
+    url = data["url"]
+    scan_tools = data["scan_tools"]
+    user_id = data["user_id"]
+    auth = data.get("auth", {})
+    report_id = data.get("report_id")
 
+    db = SessionLocal()
+    try:
         scanner = ThreadScan(script_dir="/scanner", setting=setting, url=url, scan_tools=scan_tools)
 
         if report_id:
@@ -133,53 +91,87 @@ def handle_scan(data):
             user_id=user_id,
             scan_request=auth
         )
-        
+    finally:
+        db.close()
+
+def mark_report_failed(report_id):
+    if not report_id:
+        return
+    db = SessionLocal()
+    try:
+        report = db.query(Report).filter(Report.id == report_id).first()
+        if report and report.status not in ("completed", "canceled"):
+            report.status = "failed"
+            db.commit()
+    except Exception as e:
+        print(f"❌ Impossible de marquer le rapport {report_id} en échec: {e}")
+    finally:
+        db.close()
+
+def process_message(connection, channel, delivery_tag, data):
+    try:
+        handle_scan(data)
+        settle = functools.partial(channel.basic_ack, delivery_tag=delivery_tag)
     except Exception as e:
         print(f"❌ Erreur lors du traitement du message: {e}")
-        import traceback
         traceback.print_exc()
+        mark_report_failed(data.get("report_id"))
+        # Dead-lettered to SCAN_QUEUE's .dlq for inspection instead of being retried blindly.
+        settle = functools.partial(channel.basic_nack, delivery_tag=delivery_tag, requeue=False)
 
-def callback(ch, method, properties, body):
+    # Ack/nack only once the scan reached a terminal state, from the connection thread
+    # (pika is not thread-safe). If the worker dies before, RabbitMQ redelivers the message.
     try:
-        data = json.loads(body)
-        if len(scans_running) >= MAX_WORKERS:
-            print("⏳ Tous les workers sont occupés, attente en file...")
-        
-        print("📥 Message reçu de RabbitMQ:", data)
-        executor.submit(handle_scan, data)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        connection.add_callback_threadsafe(settle)
     except Exception as e:
-        print(f"❌ Erreur lors du traitement du callback: {e}")
+        print(f"⚠️ Impossible d'acquitter le message du rapport {data.get('report_id')}: {e}")
+
+def callback(connection, ch, method, properties, body):
+    try:
+        data = json.loads(body)
+        if not isinstance(data, dict) or "url" not in data or "scan_tools" not in data or "user_id" not in data:
+            raise ValueError("champs url/scan_tools/user_id manquants")
+    except ValueError as e:
+        print(f"❌ Message invalide envoyé en dead-letter: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return
+
+    if method.redelivered:
+        print(f"🔁 Message redélivré pour le rapport {data.get('report_id')}")
+    print("📥 Message reçu de RabbitMQ:", data)
+    executor.submit(process_message, connection, ch, method.delivery_tag, data)
 
 def start_consuming():
-    try:
-        connection = connect_to_rabbitmq()
-        channel = connection.channel()
-        
-        channel.queue_declare(queue='scan_queue', durable=True)
-        channel.basic_qos(prefetch_count=MAX_WORKERS)
-        channel.basic_consume(queue='scan_queue', on_message_callback=callback)
-        
-        print("🔄 En attente de messages dans la file 'scan_queue'...")
-        print(f"📊 Nombre maximum de workers: {MAX_WORKERS}")
-        
-        channel.start_consuming()
-        
-    except KeyboardInterrupt:
-        print("\n🛑 Arrêt demandé par l'utilisateur")
+    while True:
         try:
-            channel.stop_consuming()
-            connection.close()
-        except:
-            pass
-    except Exception as e:
-        print(f"❌ Erreur fatale: {e}")
-        import traceback
-        traceback.print_exc()
-        time.sleep(5)  # Attendre avant de relancer
-        start_consuming()  # Relancer automatiquement
+            connection = connect_to_rabbitmq()
+            channel = connection.channel()
+
+            declare_queue(channel, SCAN_QUEUE)
+            # Scans queued by an older version in the classic queue.
+            move_legacy_queue(connection, LEGACY_SCAN_QUEUE, SCAN_QUEUE)
+            channel.basic_qos(prefetch_count=MAX_WORKERS)
+            channel.basic_consume(queue=SCAN_QUEUE, on_message_callback=functools.partial(callback, connection))
+
+            print(f"🔄 En attente de messages dans la file '{SCAN_QUEUE}'...")
+            print(f"📊 Nombre maximum de workers: {MAX_WORKERS}")
+
+            channel.start_consuming()
+
+        except KeyboardInterrupt:
+            print("\n🛑 Arrêt demandé par l'utilisateur")
+            try:
+                channel.stop_consuming()
+                connection.close()
+            except Exception:
+                pass
+            break
+        except Exception as e:
+            print(f"❌ Erreur fatale: {e}")
+            traceback.print_exc()
+            time.sleep(5)  # Attendre avant de relancer
 
 if __name__ == "__main__":
     print("🚀 Démarrage du consumer de scans...")
+    model_store.load_all()
     start_consuming()
\ No newline at end of file
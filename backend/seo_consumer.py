@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import functools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import pika
+
+from app.configuration.rabbitmq import connect_to_rabbitmq, declare_queue, SEO_QUEUE
+from app.database.database import SessionLocal
+from app.models.report import Report
+from app.services.browser_pool import browser_pool
+from app.services.seo_service import run_seo_analysis
+
+SEO_WORKERS = int(os.getenv("SEO_WORKERS", 4))
+SEO_MAX_RETRIES = int(os.getenv("SEO_MAX_RETRIES", 2))
+SEO_RETRY_DELAY = int(os.getenv("SEO_RETRY_DELAY", 10))
+
+executor = ThreadPoolExecutor(max_workers=SEO_WORKERS)
+
+
+def run_job(data):
+    db = SessionLocal()
+    try:
+        return run_seo_analysis(data["report_id"], data["url"], db, data.get("incremental", False))
+    finally:
+        db.close()
+
+
+def mark_queued(report_id):
+    db = SessionLocal()
+    try:
+        report = db.query(Report).filter(Report.id == report_id).first()
+        if report:
+            report.status = "queued"
+            db.commit()
+    finally:
+        db.close()
+
+
+def finish(channel, delivery_tag, body, retry):
+    # Runs on the connection thread: pika channels must not be used from the workers.
+    if retry:
+        channel.basic_publish(
+            exchange='',
+            routing_key=SEO_QUEUE,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2, headers={"x-retries": retry})
+        )
+    channel.basic_ack(delivery_tag=delivery_tag)
+
+
+def handle_seo_job(connection, channel, delivery_tag, headers, body):
+    data = json.loads(body)
+    retries = int((headers or {}).get("x-retries", 0))
+    print(f"📩 Analyse SEO {data.get('report_id')} pour {data.get('url')} (tentative {retries + 1})")
+
+    try:
+        succeeded = run_job(data)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'analyse SEO {data.get('report_id')}: {e}")
+        traceback.print_exc()
+        succeeded = False
+
+    retry = None
+    if not succeeded and retries < SEO_MAX_RETRIES:
+        retry = retries + 1
+        print(f"🔁 Nouvelle tentative {retry}/{SEO_MAX_RETRIES} pour le rapport SEO {data.get('report_id')}")
+        mark_queued(data["report_id"])
+        time.sleep(SEO_RETRY_DELAY * retry)
+
+    # The message is only acked once the job is done, so a crashed worker leaves it in the queue.
+    try:
+        connection.add_callback_threadsafe(functools.partial(finish, channel, delivery_tag, body, retry))
+    except Exception as e:
+        # Connection lost meanwhile: the broker redelivers the unacked message.
+        print(f"⚠️ Impossible d'acquitter le message SEO {data.get('report_id')}: {e}")
+
+
+def callback(connection, ch, method, properties, body):
+    try:
+        json.loads(body)
+    except ValueError as e:
+        print(f"❌ Message SEO invalide, rejeté: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return
+    executor.submit(handle_seo_job, connection, ch, method.delivery_tag, properties.headers, body)
+
+
+def start_consuming():
+    while True:
+        try:
+            connection = connect_to_rabbitmq()
+            channel = connection.channel()
+
+            declare_queue(channel, SEO_QUEUE)
+            # Prefetch bounds the jobs in flight to the worker pool size; the rest stays in the queue.
+            channel.basic_qos(prefetch_count=SEO_WORKERS)
+            channel.basic_consume(queue=SEO_QUEUE, on_message_callback=functools.partial(callback, connection))
+
+            print(f"🔄 En attente d'analyses SEO dans la file '{SEO_QUEUE}'...")
+            print(f"📊 Nombre de workers SEO: {SEO_WORKERS}")
+
+            channel.start_consuming()
+
+        except KeyboardInterrupt:
+            print("\n🛑 Arrêt demandé par l'utilisateur")
+            try:
+                channel.stop_consuming()
+                connection.close()
+            except Exception:
+                pass
+            break
+        except Exception as e:
+            print(f"❌ Erreur fatale: {e}")
+            traceback.print_exc()
+            time.sleep(5)
+
+
+if __name__ == "__main__":
+    print("🚀 Démarrage du consumer SEO...")
+    # Screenshots are taken here, not in the API process.
+    threading.Thread(target=browser_pool.warm_up, daemon=True).start()
+    try:
+        start_consuming()
+    finally:
+        executor.shutdown(wait=True)
+        browser_pool.shutdown()
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import functools
+import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from app.configuration.configuration_manager import slack_configurator, jira_configurator, email_configurator
+from app.configuration.rabbitmq import connect_to_rabbitmq, declare_queue
+from app.database.database import SessionLocal
+from app.models.report import Report
+from app.services.progress_tracker import progress_tracker
+from app.services.pentesting_tests.scan_functions.scan_dispatch import tool_queue, mark_tool_done, claim_start, claim_finalization
+from app.services.pentesting_tests.scan_functions.scan_thread import ThreadScan
+from app.services.pentesting_tests.scan_functions.model_store import model_store
+
+# Tools served by this worker, e.g. "python tool_worker.py nmap nuclei" or SCAN_WORKER_TOOLS=zap
+WORKER_TOOLS = [tool.lower() for tool in (sys.argv[1:] or os.getenv("SCAN_WORKER_TOOLS", "").split())]
+TOOL_WORKER_CONCURRENCY = int(os.getenv("TOOL_WORKER_CONCURRENCY", 1))
+
+executor = ThreadPoolExecutor(max_workers=TOOL_WORKER_CONCURRENCY)
+
+try:
+    with open("setting.json") as setting_file:
+        setting = json.load(setting_file)
+except FileNotFoundError:
+    print("⚠️  Fichier setting.json non trouvé, utilisation des paramètres par défaut")
+    setting = {}
+
+
+def run_tool_job(data):
+    tool = data["tool"]
+    user_id = data["user_id"]
+    auth = data.get("auth") or {}
+    scanner = ThreadScan(
+        script_dir="/scanner",
+        setting=setting,
+        url=data["url"],
+        scan_tools=[tool],
+        unique_id=data["unique_id"],
+        start_time=data.get("start_time")
+    )
+    scanner.report_db_id = data["report_id"]
+
+    db = SessionLocal()
+    try:
+        if claim_start(scanner.results_path):
+            scanner.notify_scan_start(slack_configurator.slack_token, slack_configurator.slack_channel_id, db, user_id)
+        status = "completed"
+        try:
+            succeeded = scanner.run_scan(
+                tool,
+                slack_configurator.slack_token,
+                slack_configurator.slack_channel_id,
+                email_configurator.scan_emails,
+                getattr(jira_configurator, 'jira_email', None),
+                getattr(jira_configurator, 'jira_token', None),
+                getattr(jira_configurator, 'jira_domain', None),
+                getattr(jira_configurator, 'jira_board', None),
+                getattr(jira_configurator, 'jira_project_key', None),
+                db,
+                user_id,
+                auth.get("username"),
+                auth.get("password"),
+                auth.get("token_auth"),
+                auth.get("cookies")
+            )
+            if not succeeded:
+                status = "failed"
+        except Exception as e:
+            # A failed tool still reports back, otherwise the scan would never be finalized.
+            status = "failed"
+            print(f"❌ Erreur lors du scan {tool}: {e}")
+            traceback.print_exc()
+
+        try:
+            done, total = mark_tool_done(scanner.results_path, tool, status)
+        except FileNotFoundError:
+            # No manifest (Results volume not shared, or cleaned up): the scan can never be merged.
+            print(f"❌ Manifeste introuvable pour le rapport {data['report_id']}, scan marqué en échec")
+            fail_report(db, data["report_id"])
+            progress_tracker.finish(data["report_id"], user_id, status="failed")
+            return
+        percent_done = int(done / total * 100) if total else 100
+        print(f"📊 Progression: {percent_done}% ({done}/{total})")
+        # Other tools of the scan run in other processes: the overall percent comes from the manifest.
+        progress_tracker.tool_done(data["report_id"], user_id, tool, status)
+        progress_tracker.update(data["report_id"], user_id, overall=percent_done)
+
+        if done >= total and claim_finalization(scanner.results_path):
+            print(f"🧩 Tous les outils ont terminé pour le rapport {data['report_id']}, fusion des résultats...")
+            authentification = bool(auth.get("username") or auth.get("password") or auth.get("token_auth") or auth.get("cookies"))
+            scanner.finalize_scan(slack_configurator.slack_token, slack_configurator.slack_channel_id, db, user_id, authentification)
+    finally:
+        db.close()
+
+
+def fail_report(db, report_id):
+    try:
+        report = db.query(Report).filter(Report.id == report_id).first()
+        if report:
+            report.status = "failed"
+            report.scan_finished_at = datetime.now()
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Impossible de marquer le rapport {report_id} en échec: {e}")
+
+
+def handle_tool_job(connection, channel, delivery_tag, body):
+    try:
+        run_tool_job(json.loads(body))
+    except Exception as e:
+        print(f"❌ Erreur lors du traitement du job: {e}")
+        traceback.print_exc()
+    try:
+        connection.add_callback_threadsafe(functools.partial(channel.basic_ack, delivery_tag=delivery_tag))
+    except Exception as e:
+        print(f"⚠️ Impossible d'acquitter le job: {e}")
+
+
+def callback(connection, ch, method, properties, body):
+    print(f"📥 Job reçu sur {method.routing_key}")
+    executor.submit(handle_tool_job, connection, ch, method.delivery_tag, body)
+
+
+def start_consuming():
+    if not WORKER_TOOLS:
+        raise SystemExit("Aucun outil configuré: python tool_worker.py <outil> [<outil> ...] ou SCAN_WORKER_TOOLS")
+    while True:
+        try:
+            connection = connect_to_rabbitmq()
+            channel = connection.channel()
+            channel.basic_qos(prefetch_count=TOOL_WORKER_CONCURRENCY)
+            for tool in WORKER_TOOLS:
+                declare_queue(channel, tool_queue(tool))
+                channel.basic_consume(queue=tool_queue(tool), on_message_callback=functools.partial(callback, connection))
+            print(f"🔄 En attente de jobs sur: {', '.join(tool_queue(tool) for tool in WORKER_TOOLS)}")
+            print(f"📊 Nombre de workers: {TOOL_WORKER_CONCURRENCY}")
+            channel.start_consuming()
+        except KeyboardInterrupt:
+            print("\n🛑 Arrêt demandé par l'utilisateur")
+            try:
+                channel.stop_consuming()
+                connection.close()
+            except Exception:
+                pass
+            break
+        except Exception as e:
+            print(f"❌ Erreur fatale: {e}")
+            traceback.print_exc()
+            time.sleep(5)
+
+
+if __name__ == "__main__":
+    print("🚀 Démarrage du worker d'outils de scan...")
+    model_store.load_all()
+    start_consuming()
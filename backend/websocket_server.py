@@ -1,16 +1,95 @@
 import os
+import hmac
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from starlette.websockets import WebSocketDisconnect
 from app.configuration.config import configure_cors
+from app.services.ws_fanout import NotificationSubscriber
 from dotenv import load_dotenv
 import json
 
 load_dotenv()
 
-app = FastAPI()
-configure_cors(app)
 connected_clients = {}
+# Shared secret of /ws/publish; without it every publisher is refused.
+WS_PUBLISH_TOKEN = os.getenv("WS_PUBLISH_TOKEN", "")
+NOTIFICATION_TRANSPORT = os.getenv("NOTIFICATION_TRANSPORT", "rabbitmq").lower()
+# Backoff between two attempts to subscribe to RabbitMQ, doubled up to the max.
+SUBSCRIBER_RETRY_DELAY = float(os.getenv("WS_SUBSCRIBER_RETRY_DELAY", 2))
+SUBSCRIBER_RETRY_MAX_DELAY = float(os.getenv("WS_SUBSCRIBER_RETRY_MAX_DELAY", 60))
+
+async def deliver_from_broker(user_id, payloads):
+    for payload in payloads:
+        await send_to_user_clients(json.dumps(payload, default=str), user_id)
+
+subscriber = NotificationSubscriber(deliver_from_broker)
+
+async def start_subscriber():
+    delay = SUBSCRIBER_RETRY_DELAY
+    while True:
+        try:
+            await subscriber.start()
+            break
+        except Exception as e:
+            # Meanwhile notifications only arrive through /ws/publish, for this replica.
+            print(f"⚠️ RabbitMQ indisponible, nouvel essai dans {delay:.0f}s: {e}")
+            await subscriber.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SUBSCRIBER_RETRY_MAX_DELAY)
+    # Users who connected while the broker was down.
+    for user_id in list(connected_clients):
+        await subscriber.subscribe(user_id)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    subscriber_task = None
+    if NOTIFICATION_TRANSPORT == "rabbitmq":
+        subscriber_task = asyncio.create_task(start_subscriber())
+    elif not WS_PUBLISH_TOKEN:
+        print("⚠️ WS_PUBLISH_TOKEN non défini: /ws/publish refuse toutes les connexions")
+    yield
+    if subscriber_task is not None:
+        subscriber_task.cancel()
+        try:
+            await subscriber_task
+        except asyncio.CancelledError:
+            pass
+    await subscriber.close()
+
+app = FastAPI(lifespan=lifespan)
+configure_cors(app)
+
+# Declared before /ws/{user_id} so that "publish" is not taken for a user id.
+# Broker-less transport (NOTIFICATION_TRANSPORT=websocket): reaches this replica's clients only.
+@app.websocket("/ws/publish")
+async def publish_websocket(websocket: WebSocket):
+    # Long-lived connection of the backend's notifiers: each frame carries a batch of messages.
+    token = websocket.query_params.get("token") or ""
+    if not WS_PUBLISH_TOKEN or not hmac.compare_digest(token.encode(), WS_PUBLISH_TOKEN.encode()):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    print("Publisher connected.")
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                messages = json.loads(frame).get("messages", [])
+            except (ValueError, AttributeError) as e:
+                print(f"Invalid publisher frame: {str(e)}")
+                continue
+            for item in messages:
+                try:
+                    user_id = int(item["user_id"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                await send_to_user_clients(json.dumps(item.get("payload"), default=str), user_id)
+    except WebSocketDisconnect:
+        print("Publisher disconnected.")
+    except Exception as e:
+        print(f"An error occurred in publisher connection: {str(e)}")
 
 @app.websocket("/ws/{user_id}")
 async def start_websocket(websocket: WebSocket, user_id: int):
@@ -19,6 +98,7 @@ async def start_websocket(websocket: WebSocket, user_id: int):
     if user_id not in connected_clients:
         connected_clients[user_id] = set()
     connected_clients[user_id].add(websocket)
+    await subscriber.subscribe(user_id)
 
     try:
         while True:
@@ -34,24 +114,31 @@ async def start_websocket(websocket: WebSocket, user_id: int):
             connected_clients[user_id].discard(websocket)
             if not connected_clients[user_id]:
                 del connected_clients[user_id]
+                await subscriber.unsubscribe(user_id)
+                if user_id in connected_clients:
+                    # Reconnected while the binding was being removed.
+                    await subscriber.subscribe(user_id)
+
+async def send_to_client(client, message, user_id):
+    try:
+        await client.send_text(message)
+        return None
+    except Exception as e:
+        print(f"Error sending message to user {user_id} client: {str(e)}")
+        return client
 
 async def send_to_user_clients(message, user_id, sender_websocket=None):
     if user_id not in connected_clients:
         return
     
-    clients_to_remove = []
-    for client in list(connected_clients[user_id]):
-        if client != sender_websocket:  
-            try:
-                await client.send_text(message)
-                print(f"Message sent to user {user_id} client: {message}")
-            except Exception as e:
-                print(f"Error sending message to user {user_id} client: {str(e)}")
-                clients_to_remove.append(client)
+    # Sent concurrently: one slow dashboard does not hold back the user's other tabs.
+    clients = [client for client in list(connected_clients[user_id]) if client != sender_websocket]
+    results = await asyncio.gather(*(send_to_client(client, message, user_id) for client in clients))
     
     # Nettoyer les connexions fermées
-    for client in clients_to_remove:
-        connected_clients[user_id].discard(client)
+    for client in results:
+        if client is not None and user_id in connected_clients:
+            connected_clients[user_id].discard(client)
 
 async def send_notification_to_user(user_id: int, message: str, notif_type: str = "info"):
     if user_id not in connected_clients: